@@ -1,22 +1,37 @@
 # app.py (fixed: no truthy tests on PyMongo collections)
 import os
+import atexit
+import threading
+import time
 from datetime import datetime
 import random
-import io
-import base64
 import secrets as _secrets  # only for fallback secret generation during dev
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response
+from functools import wraps
+
+from flask import Flask, Blueprint, render_template, request, jsonify, session, redirect, url_for, Response, g
 from flask_cors import CORS
 from pymongo import MongoClient
-from werkzeug.security import generate_password_hash, check_password_hash
-import cv2
 import numpy as np
-from tensorflow.keras.preprocessing.image import img_to_array
-from tensorflow.keras.models import load_model
-from PIL import Image
 from bson import ObjectId
 
+# TensorFlow, cv2 and PIL are imported lazily (model loader thread, frame
+# decoding, video feed) so the server can answer auth/admin requests at once
+import metrics
+from metrics import stage
+from batching import BatchingPredictor
+from model_loader import BackgroundLoader, load_in_background_from_env, LOADING, READY
+from prediction_cache import cache_from_env, phash
+from stress_smoothing import SmootherRegistry, smoothing_half_life_from_env
+from log_writer import writer_from_env
+from db_indexes import provision_indexes, USERNAME_ONLY_PROJECTION, LOGIN_PROJECTION
+from log_queries import find_log_page, parse_time, QueryError
+from log_export import export_response, parse_export_args
+from stream_sessions import manager_from_env, read_frames, StreamLimitError
+from rollups import GLOBAL_USER_ID, GRANULARITIES, apply_rollups, query_rollups, default_range
+from password_hashing import hasher_from_env, HashingBusyError
+from login_limiter import limiter_from_env
+
 # Optional: load .env in development
 try:
     from dotenv import load_dotenv
@@ -32,6 +47,37 @@ MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
 DB_NAME = os.environ.get('DB_NAME', 'stress_detection_db')
 
 MODEL_PATH = os.environ.get('MODEL_PATH', os.path.join("backend", "scripts", "emotion_model.h5"))
+# keras | tf-function | tflite | auto (fastest available)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'auto')
+
+# Micro-batching of model calls across concurrent requests
+INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', 32))
+INFERENCE_MAX_WAIT_MS = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5))
+
+# INFERENCE_WORKERS > 0 serves the model from separate processes (inference_pool.py);
+# INFERENCE_INTRA_OP_THREADS / INFERENCE_INTER_OP_THREADS cap each model copy's threads
+
+# Largest client-cropped face accepted by /api/detect-stress/roi (pixels per side)
+ROI_MAX_SIDE = int(os.environ.get('ROI_MAX_SIDE', 256))
+
+# Shared /video_feed capture: camera index or video file, output rate and analysis cadence
+VIDEO_SOURCE = os.environ.get('VIDEO_SOURCE', '0')
+VIDEO_SOURCE = int(VIDEO_SOURCE) if VIDEO_SOURCE.isdigit() else VIDEO_SOURCE
+VIDEO_TARGET_FPS = float(os.environ.get('VIDEO_TARGET_FPS', 15))
+VIDEO_JPEG_QUALITY = int(os.environ.get('VIDEO_JPEG_QUALITY', 80))
+VIDEO_ANALYZE_EVERY = int(os.environ.get('VIDEO_ANALYZE_EVERY', 3))
+VIDEO_ANALYZE_INTERVAL_MS = float(os.environ.get('VIDEO_ANALYZE_INTERVAL_MS', 0))
+
+# Bearer token required by GET /metrics; unset leaves the endpoint open (scrape from a private network)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Continuous analysis streams (stream_sessions.py, STREAM_* env vars): a stress log is
+# stored at most once per STREAM_LOG_INTERVAL_S per stream instead of for every frame
+STREAM_LOG_INTERVAL_S = float(os.environ.get('STREAM_LOG_INTERVAL_S', 5))
+
+# Reverse proxies in front of the app whose X-Forwarded-For is trusted; request.remote_addr
+# (the failed-login limiter's client address) is otherwise the nearest proxy's address
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
 
 FLASK_DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() in ('1', 'true', 'yes')
 FLASK_PORT = int(os.environ.get('FLASK_PORT', 5000))
@@ -40,49 +86,245 @@ FLASK_PORT = int(os.environ.get('FLASK_PORT', 5000))
 SECRET_KEY = os.environ.get('SECRET_KEY') or _secrets.token_hex(16)
 
 # --------- Flask ----------
-app = Flask(__name__)
-app.secret_key = SECRET_KEY
-CORS(app, supports_credentials=True)
+bp = Blueprint('main', __name__)
+
+# --------- Shared state ----------
+# MongoDB handles and the stress log writer, set by init_db()
+client = None
+db = None
+users_collection = None
+stress_logs_collection = None
+stress_rollups_collection = None
+stress_log_writer = None
+
+# Detector, trackers and model, set by load_models() once loading finished
+face_detector = None
+session_trackers = video_tracker = None
+emotion_model = None
+emotion_predictor = None
+# Model output order and the stress value of each output, from the model's
+# metadata file (model_metadata.py)
+emotion_labels = []
+stress_weights = None
+model_loader = None
+# Held while this web process owns an InferencePool (inference_pool.claim_web_pool)
+web_pool_lock = None
+
+# Continuous analysis streams, set by create_app()
+stream_manager = None
+
+# Per-user exponentially weighted stress score (STRESS_SMOOTHING_HALF_LIFE_S)
+session_smoothers = SmootherRegistry(smoothing_half_life_from_env())
+
+# Softmax of recently seen faces by perceptual hash (PREDICTION_CACHE_SIZE / _TTL_S)
+prediction_cache = cache_from_env()
+
+# Password hashing policy and thread pool (PASSWORD_HASH_*), failed login lockout (LOGIN_*)
+password_hasher = hasher_from_env()
+login_limiter = limiter_from_env()
+
+# --------- Metrics (GET /metrics) ----------
+DETECTIONS = metrics.Counter('stress_detections_total', 'Detection requests by outcome (face, no_face, error)',
+                             ['result'])
+FACES_FOUND = metrics.Counter('stress_faces_detected_total', 'Faces found by detection requests')
+STREAM_FRAMES_DROPPED = metrics.Counter('stress_stream_frames_dropped_total',
+                                        'Stream frames replaced by a newer one before analysis')
+LOGINS = metrics.Counter('stress_logins_total', 'Login attempts by outcome (success, failure, limited, busy)',
+                         ['result'])
+HTTP_SECONDS = metrics.Histogram('http_request_seconds', 'Request latency by endpoint',
+                                 ['endpoint', 'method', 'status'])
+metrics.Gauge('stress_model_ready', '1 once the model is loaded and warmed up',
+              lambda: int(model_loader is not None and model_loader.ready))
+metrics.Gauge('stress_log_queue_depth', 'Stress logs waiting for the write-behind flush',
+              lambda: stress_log_writer.stats()['queued'] if stress_log_writer is not None else None)
+metrics.Gauge('stress_log_dropped', 'Stress logs dropped by the write-behind queue since start',
+              lambda: stress_log_writer.stats()['dropped'] if stress_log_writer is not None else None)
+metrics.Gauge('stress_streams_open', 'Open continuous analysis streams',
+              lambda: stream_manager.stats()['streams'] if stream_manager is not None else None)
+metrics.Gauge('stress_prediction_cache_entries', 'Faces held by the prediction cache',
+              lambda: prediction_cache.stats()['entries'] if prediction_cache is not None else None)
+metrics.Gauge('stress_prediction_cache_hit_ratio', 'Prediction cache hits / lookups since start',
+              lambda: prediction_cache.stats()['hit_rate'] if prediction_cache is not None else None)
+metrics.Gauge('stress_password_hashes_in_flight', 'Password hashes running or waiting for a hashing thread',
+              lambda: password_hasher.stats()['in_flight'])
+
+def create_app():
+    global model_loader, stream_manager
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    if TRUSTED_PROXY_HOPS > 0:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+    CORS(app, supports_credentials=True)
+    init_db()
+    app.register_blueprint(bp)
+    stream_manager = manager_from_env(analyze_stream_frame, on_frame_dropped=STREAM_FRAMES_DROPPED.inc)
+
+    # MODEL_LOAD_IN_BACKGROUND=0 loads the model before returning
+    model_loader = BackgroundLoader(load_models).start(background=load_in_background_from_env())
+    return app
 
 # --------- MongoDB ----------
-try:
-    client = MongoClient(MONGO_URI)
-    db = client[DB_NAME]
-    users_collection = db['users']
-    stress_logs_collection = db['stress_logs']
-except Exception as e:
-    print(f"MongoDB connection error: {e}")
-    client = None
-    db = None
-    users_collection = None
-    stress_logs_collection = None
+def init_db():
+    global client, db, users_collection, stress_logs_collection, stress_rollups_collection, stress_log_writer
+    try:
+        # Command monitoring feeds mongo_command_seconds for every driver call
+        client = MongoClient(MONGO_URI, event_listeners=[metrics.mongo_command_listener()])
+        db = client[DB_NAME]
+        users_collection = db['users']
+        stress_logs_collection = db['stress_logs']
+        stress_rollups_collection = db['stress_rollups']
+    except Exception as e:
+        print(f"MongoDB connection error: {e}")
+        client = None
+        db = None
+        users_collection = None
+        stress_logs_collection = None
+        stress_rollups_collection = None
+
+    # Index provisioning runs in the background so an unreachable MongoDB does not
+    # hold up startup for the server selection timeout; it retries until MongoDB answers
+    if db is not None:
+        threading.Thread(target=provision_indexes, args=(db,), name='ensure-indexes', daemon=True).start()
+
+    # Write-behind buffer for stress_logs (LOG_WRITE_BEHIND / LOG_* env vars);
+    # None means a synchronous insert_one per request
+    stress_log_writer = (writer_from_env(stress_logs_collection, on_written=update_rollups)
+                         if stress_logs_collection is not None else None)
+    if stress_log_writer is not None:
+        atexit.register(stress_log_writer.close)
+
+# Every stored log is folded into the hourly/daily rollups served by /api/stress-stats
+def update_rollups(docs):
+    if stress_rollups_collection is None:
+        return
+    try:
+        apply_rollups(stress_rollups_collection, docs)
+    except Exception as e:
+        print(f"Stress rollup update error: {e}")
 
 # --------- Models ----------
-try:
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+def load_models():
+    # Runs on the model loader thread; globals are only published once
+    # everything is built and warmed up
+    global face_detector, session_trackers, video_tracker, emotion_model, emotion_predictor
+    global emotion_labels, stress_weights
+    from face_detection import create_face_detector
+    from face_tracking import FaceTracker, TrackerRegistry, tracker_config_from_env, tracking_enabled
+    from inference_backends import load_backend, set_thread_counts
+    from inference_pool import InferencePool, claim_web_pool, pool_config_from_env
+    from inference_server import InferenceClient, client_from_env
+    from model_metadata import load_metadata
+
+    # FACE_DETECTOR / FACE_* env vars choose the detector and its parameters
+    detector = create_face_detector()
+    # FACE_TRACKING / FACE_REDETECT_EVERY / ...: reuse boxes between frames of
+    # the same user (API) or camera (video feed) instead of full-frame scans
+    if tracking_enabled():
+        trackers = TrackerRegistry(detector, **tracker_config_from_env())
+        tracker = FaceTracker(detector, **tracker_config_from_env())
+    else:
+        trackers = tracker = None
 
     base_dir = os.path.dirname(__file__) if '__file__' in globals() else os.getcwd()
     model_path_abs = MODEL_PATH if os.path.isabs(MODEL_PATH) else os.path.join(base_dir, MODEL_PATH)
 
-    if os.path.exists(model_path_abs):
-        emotion_model = load_model(model_path_abs)
-        print(f"✅ Emotion model loaded successfully from: {model_path_abs}")
+    # Label order, input shape and normalization the model was trained with
+    meta = load_metadata(model_path_abs)
+    if meta['source'] is None:
+        print(f"⚠️  No metadata file next to {model_path_abs}; assuming labels {', '.join(meta['labels'])}")
+    norm = meta['normalization']
+    if list(meta['input_shape']) != [48, 48, 1] or not np.isclose(norm.get('scale'), 1.0 / 255.0) or norm.get('offset'):
+        raise ValueError(f"Model expects input {meta['input_shape']} normalized by {meta['normalization']}; "
+                         f"the app serves 48x48x1 faces scaled to [0, 1]")
+    labels = list(meta['labels'])
+
+    pool_config = pool_config_from_env()
+    shared = client_from_env()
+    if shared is not None:
+        # One inference server (inference_server.py) holds the model for every web worker
+        model = shared
+        atexit.register(model.close)
+    elif pool_config['workers'] > 0:
+        # Worker processes hold the model; batches go through shared memory.
+        # Only one web process per host may own a pool.
+        global web_pool_lock
+        web_pool_lock = claim_web_pool()
+        model = InferencePool(model_path_abs, INFERENCE_BACKEND, max_batch=INFERENCE_MAX_BATCH,
+                              num_classes=len(labels), **pool_config)
+        atexit.register(model.close)
     else:
-        raise FileNotFoundError(f"Model not found at: {model_path_abs}")
-
-    emotion_labels = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
-except Exception as e:
-    print(f"Error loading models: {e}")
-    emotion_model = None
-    emotion_labels = []
+        set_thread_counts(pool_config['intra_op_threads'], pool_config['inter_op_threads'])
+        model = load_backend(INFERENCE_BACKEND, model_path_abs)
+    print(f"✅ Emotion model loaded successfully from: {model_path_abs} (backend: {model.name})")
+
+    # Warmup: graph tracing / interpreter allocation and the detector's first
+    # pass happen here instead of in the first user's request
+    probe = model.predict(np.zeros((1, 48, 48, 1), dtype=np.float32))
+    if probe.shape[1] != len(labels):
+        raise ValueError(f"Model has {probe.shape[1]} outputs but its metadata lists {len(labels)} labels")
+    detector.detect(np.zeros((240, 320), dtype=np.uint8))
+
+    # One predictor per process; requests enqueue ROIs and block on their own result
+    # (the pool's and the server client's submit() return a Future, so several batches run at once)
+    predictor = BatchingPredictor(
+        metrics.instrument_model_call(model.submit if isinstance(model, (InferencePool, InferenceClient))
+                                      else model.predict),
+        max_batch=INFERENCE_MAX_BATCH,
+        max_wait_ms=INFERENCE_MAX_WAIT_MS,
+    )
+
+    face_detector, session_trackers, video_tracker = detector, trackers, tracker
+    emotion_model, emotion_predictor = model, predictor
+    emotion_labels, stress_weights = labels, stress_weights_for(labels)
+
+def requires_models(view):
+    # Detection routes answer 503 until the model loader has finished
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if model_loader is None or not model_loader.ready:
+            loading = model_loader is None or model_loader.state == LOADING
+            message = 'Model is still loading, please retry shortly' if loading else 'Model unavailable'
+            return jsonify({'success': False, 'message': message}), 503, {'Retry-After': '2'}
+        return view(*args, **kwargs)
+    return wrapper
+
+# Request latency for every endpoint; "X-Profile: 1" adds a Server-Timing
+# header with this request's pipeline stage breakdown
+@bp.before_app_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if request.headers.get('X-Profile') == '1':
+        metrics.start_profile()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None:
+        HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=request.endpoint or 'unmatched',
+                             method=request.method, status=response.status_code)
+    timings = metrics.end_profile()
+    if timings is not None:
+        response.headers['Server-Timing'] = metrics.server_timing(timings)
+    return response
+
+@bp.teardown_app_request
+def clear_request_profile(exc):
+    metrics.end_profile()
 
 # -------------------- ROUTES --------------------
 
-@app.route('/')
+def hashing_busy(e):
+    # Every password hashing thread is busy and the wait queue is full
+    response = jsonify({'success': False, 'message': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@bp.route('/')
 def index():
     return render_template('login.html')
 
-@app.route('/register', methods=['POST'])
+@bp.route('/register', methods=['POST'])
 def register():
     # DB guard
     if users_collection is None:
@@ -95,10 +337,10 @@ def register():
         if not username or not password:
             return jsonify({'success': False, 'message': 'Username and password are required'}), 400
 
-        if users_collection.find_one({'username': username}):
+        if users_collection.find_one({'username': username}, USERNAME_ONLY_PROJECTION):
             return jsonify({'success': False, 'message': 'Username already exists'}), 400
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         users_collection.insert_one({
             'username': username,
             'password': hashed_password,
@@ -106,18 +348,30 @@ def register():
             'created_at': datetime.utcnow()
         })
         return jsonify({'success': True, 'message': 'Registration successful'})
+    except HashingBusyError as e:
+        return hashing_busy(e)
     except Exception as e:
         return jsonify({'success': False, 'message': f"Registration error: {str(e)}"}), 500
 
-@app.route('/login', methods=['POST'])
+@bp.route('/login', methods=['POST'])
 def login():
     try:
         data = request.get_json(force=True)
         username = data.get('username')
         password = data.get('password')
 
+        # Refused before any password check while the username or address is locked out
+        retry_after = login_limiter.retry_after(username, request.remote_addr)
+        if retry_after:
+            LOGINS.inc(result='limited')
+            response = jsonify({'success': False, 'message': 'Too many failed login attempts, try again later'})
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+
         # Super-admin from environment (doesn't touch DB)
         if ADMIN_USERNAME and ADMIN_PASSWORD and username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+            login_limiter.succeeded(username, request.remote_addr)
+            LOGINS.inc(result='success')
             session['user_id'] = 'admin'
             session['username'] = username
             session['role'] = 'admin'
@@ -127,40 +381,52 @@ def login():
         if users_collection is None:
             return jsonify({'success': False, 'message': 'Database unavailable'}), 500
 
-        user = users_collection.find_one({'username': username})
-        if user and check_password_hash(user['password'], password):
+        user = users_collection.find_one({'username': username}, LOGIN_PROJECTION)
+        if user and password_hasher.verify(user['password'], password):
+            login_limiter.succeeded(username, request.remote_addr)
+            LOGINS.inc(result='success')
+            if password_hasher.needs_rehash(user['password']):
+                # Hash made under an older PASSWORD_HASH_* policy; only replaced if unchanged meanwhile
+                old = {'_id': user['_id'], 'password': user['password']}
+                password_hasher.rehash_in_background(
+                    password, lambda new_hash: users_collection.update_one(old, {'$set': {'password': new_hash}}))
             session['user_id'] = str(user['_id'])
             session['username'] = username
             session['role'] = user.get('role', 'user')
             return jsonify({'success': True, 'role': session['role'], 'message': 'Login successful'})
 
+        login_limiter.failed(username, request.remote_addr)
+        LOGINS.inc(result='failure')
         return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
+    except HashingBusyError as e:
+        LOGINS.inc(result='busy')
+        return hashing_busy(e)
     except Exception as e:
         return jsonify({'success': False, 'message': f"Login error: {str(e)}"}), 500
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 def dashboard():
     if 'user_id' not in session:
-        return redirect(url_for('index'))
+        return redirect(url_for('.index'))
     if session.get('role') == 'admin':
         return render_template('admin.html', username=session['username'])
     else:
         return render_template('dashboard.html', username=session['username'])
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.clear()
-    return redirect(url_for('index'))
+    return redirect(url_for('.index'))
 
-@app.route('/stress-detection')
+@bp.route('/stress-detection')
 def stress_detection_page():
     if 'user_id' not in session:
-        return redirect(url_for('index'))
+        return redirect(url_for('.index'))
     return render_template('stress-detection.html', username=session['username'])
 
 # -------------------- ADMIN ROUTES --------------------
 
-@app.route('/api/users', methods=['GET'])
+@bp.route('/api/users', methods=['GET'])
 def get_users():
     if session.get('role') != 'admin':
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
@@ -176,7 +442,7 @@ def get_users():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/users', methods=['POST'])
+@bp.route('/api/users', methods=['POST'])
 def create_user():
     if session.get('role') != 'admin':
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
@@ -193,21 +459,23 @@ def create_user():
             return jsonify({'success': False, 'message': 'Username and password required'}), 400
         if role not in ('user', 'admin'):
             return jsonify({'success': False, 'message': 'Invalid role'}), 400
-        if users_collection.find_one({'username': username}):
+        if users_collection.find_one({'username': username}, USERNAME_ONLY_PROJECTION):
             return jsonify({'success': False, 'message': 'Username already exists'}), 400
 
         users_collection.insert_one({
             'username': username,
             'email': email,
-            'password': generate_password_hash(password),
+            'password': password_hasher.hash(password),
             'role': role,
             'created_at': datetime.utcnow()
         })
         return jsonify({'success': True, 'message': 'User created'})
+    except HashingBusyError as e:
+        return hashing_busy(e)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/users/<user_id>', methods=['PUT', 'PATCH'])
+@bp.route('/api/users/<user_id>', methods=['PUT', 'PATCH'])
 def update_user(user_id):
     if session.get('role') != 'admin':
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
@@ -221,7 +489,7 @@ def update_user(user_id):
             new_username = (data.get('username') or '').strip()
             if not new_username:
                 return jsonify({'success': False, 'message': 'Username cannot be empty'}), 400
-            existing = users_collection.find_one({'username': new_username, '_id': {'$ne': ObjectId(user_id)}})
+            existing = users_collection.find_one({'username': new_username, '_id': {'$ne': ObjectId(user_id)}}, {'_id': 1})
             if existing:
                 return jsonify({'success': False, 'message': 'Username already in use'}), 400
             updates['username'] = new_username
@@ -247,7 +515,7 @@ def update_user(user_id):
             updates['role'] = new_role
 
         if 'password' in data and (data.get('password') or '').strip():
-            updates['password'] = generate_password_hash(data['password'])
+            updates['password'] = password_hasher.hash(data['password'])
 
         if not updates:
             return jsonify({'success': False, 'message': 'No updates provided'}), 400
@@ -257,10 +525,12 @@ def update_user(user_id):
             return jsonify({'success': False, 'message': 'User not found'}), 404
 
         return jsonify({'success': True, 'message': 'User updated'})
+    except HashingBusyError as e:
+        return hashing_busy(e)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
-@app.route('/api/users/<user_id>', methods=['DELETE'])
+@bp.route('/api/users/<user_id>', methods=['DELETE'])
 def delete_user(user_id):
     if session.get('role') != 'admin':
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
@@ -285,97 +555,413 @@ def delete_user(user_id):
 
 # -------------------- STRESS DETECTION --------------------
 
-@app.route('/api/detect-stress', methods=['POST'])
+@bp.route('/api/detect-stress', methods=['POST'])
+@requires_models
 def detect_stress():
+    # Legacy JSON route: {"image": "data:image/jpeg;base64,..."}
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Unauthorized'})
     try:
-        data = request.get_json(force=True)
+        with stage('json_parse'):
+            data = request.get_json(force=True)
         if not data or 'image' not in data:
             return jsonify({'success': False, 'message': 'No image provided'}), 400
 
-        image_data = data['image'].split(',')[-1]
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
-        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+        from frame_decoding import decode_base64_frame
+        gray = decode_base64_frame(data['image'])
+        return run_stress_analysis(gray)
+    except Exception as e:
+        DETECTIONS.inc(result='error')
+        print("Detection error:", e)
+        return jsonify({'success': False, 'message': f'Detection error: {str(e)}'}), 500
 
-        if len(faces) == 0:
-            return jsonify({'success': False, 'message': 'No face detected'}), 200
+@bp.route('/api/detect-stress/frame', methods=['POST'])
+@requires_models
+def detect_stress_frame():
+    # Binary route: raw image/jpeg body, or multipart/form-data with an "image" file
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    try:
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('image')
+            image_bytes = upload.read() if upload else b''
+        else:
+            image_bytes = request.get_data(cache=False)
+        if not image_bytes:
+            return jsonify({'success': False, 'message': 'No image provided'}), 400
 
-        stress_level, top_emotion = analyze_stress_with_model(gray, faces)
+        from frame_decoding import decode_image_gray
+        gray = decode_image_gray(image_bytes)
+        if gray is None:
+            return jsonify({'success': False, 'message': 'Could not decode image'}), 400
+        return run_stress_analysis(gray)
+    except Exception as e:
+        DETECTIONS.inc(result='error')
+        print("Detection error:", e)
+        return jsonify({'success': False, 'message': f'Detection error: {str(e)}'}), 500
 
-        # Explicit None check for collection
-        if stress_logs_collection is not None:
-            stress_logs_collection.insert_one({
-                'user_id': session['user_id'],
-                'username': session['username'],
-                'stress_level': stress_level,
-                'detected_emotion': top_emotion,
-                'timestamp': datetime.utcnow()
-            })
-
-        return jsonify({
-            'success': True,
-            'stress_level': stress_level,
-            'emotion': top_emotion,
-            'message': get_stress_message(stress_level)
-        })
+@bp.route('/api/detect-stress/roi', methods=['POST'])
+@requires_models
+def detect_stress_roi():
+    # Client-cropped face: raw 8-bit grayscale pixels, row-major, width*height bytes.
+    # ?width=&height= default to the 48x48 model input. Face detection is skipped.
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    try:
+        width = request.args.get('width', 48, type=int)
+        height = request.args.get('height', 48, type=int)
+        if not (16 <= width <= ROI_MAX_SIDE and 16 <= height <= ROI_MAX_SIDE):
+            return jsonify({'success': False, 'message': f'ROI sides must be between 16 and {ROI_MAX_SIDE} pixels'}), 400
+
+        expected = width * height
+        if request.content_length is not None and request.content_length != expected:
+            return jsonify({'success': False, 'message': f'Expected {expected} bytes for a {width}x{height} grayscale ROI'}), 400
+        pixels = request.get_data(cache=False)
+        if len(pixels) != expected:
+            return jsonify({'success': False, 'message': f'Expected {expected} bytes for a {width}x{height} grayscale ROI'}), 400
+
+        roi_gray = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+        stress_level, top_emotion, probs = analyze_face_roi(roi_gray)
+        DETECTIONS.inc(result='face')
+        return record_stress_result(stress_level, top_emotion, probs)
     except Exception as e:
+        DETECTIONS.inc(result='error')
         print("Detection error:", e)
         return jsonify({'success': False, 'message': f'Detection error: {str(e)}'}), 500
 
-@app.route('/api/stress-logs')
+def run_stress_analysis(gray):
+    tracker = session_trackers.get(session['user_id']) if session_trackers is not None else None
+    faces = detect_faces(gray, tracker)
+
+    if len(faces) == 0:
+        DETECTIONS.inc(result='no_face')
+        return jsonify({'success': False, 'message': 'No face detected'}), 200
+    DETECTIONS.inc(result='face')
+    FACES_FOUND.inc(len(faces))
+
+    if request.args.get('faces') == 'all':
+        # Multi-face mode: per-face results; the largest face is logged and
+        # reported in the top-level fields as in single-face mode
+        results = analyze_all_faces(gray, faces)
+        primary = max(results, key=lambda r: r['box']['w'] * r['box']['h'])
+        probs = [primary['probabilities'][label] for label in emotion_labels]
+        return record_stress_result(primary['stress_level'], primary['emotion'], probs, faces=results)
+
+    stress_level, top_emotion, probs = analyze_stress_with_model(gray, faces)
+    return record_stress_result(stress_level, top_emotion, probs)
+
+def record_stress_result(stress_level, top_emotion, probs=None, **extra):
+    result = stress_result(session['user_id'], session['username'], stress_level, top_emotion, probs)
+    return jsonify({**result, **extra})
+
+def stress_result(user_id, username, stress_level, top_emotion, probs=None, log=True):
+    # Instant value plus the user's moving average over the full softmax
+    smoothed = None
+    if probs is not None:
+        smoothed = session_smoothers.get(user_id).update(probs, stress_weights)
+    smoothed_level = int(round(smoothed)) if smoothed is not None else stress_level
+
+    if log:
+        save_stress_log({
+            'user_id': user_id,
+            'username': username,
+            'stress_level': stress_level,
+            'smoothed_stress_level': smoothed_level,
+            'detected_emotion': top_emotion,
+            'timestamp': datetime.utcnow()
+        })
+
+    return {
+        'success': True,
+        'stress_level': stress_level,
+        'smoothed_stress_level': smoothed_level,
+        'emotion': top_emotion,
+        'message': get_stress_message(stress_level)
+    }
+
+# -------------------- CONTINUOUS ANALYSIS STREAMS --------------------
+
+@bp.route('/api/stream', methods=['POST'])
+@requires_models
+def open_stream():
+    # Starts a stream: push frames to frame_url, read results from events_url (SSE)
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    try:
+        stream = stream_manager.create(session['user_id'], session['username'])
+    except StreamLimitError as e:
+        return jsonify({'success': False, 'message': str(e)}), 503, {'Retry-After': '5'}
+    return jsonify({
+        'success': True,
+        'stream_id': stream.id,
+        'frame_url': url_for('.stream_frame', stream_id=stream.id),
+        'events_url': url_for('.stream_events', stream_id=stream.id),
+        'suggested_interval_ms': stream_manager.suggested_interval_ms()
+    })
+
+def current_stream(stream_id):
+    if 'user_id' not in session:
+        return None
+    return stream_manager.get(stream_id, session['user_id'])
+
+@bp.route('/api/stream/<stream_id>/frame', methods=['POST'])
+def stream_frame(stream_id):
+    # One raw image/jpeg (or png) frame; answers 202 before the frame is analyzed
+    stream = current_stream(stream_id)
+    if stream is None:
+        return jsonify({'success': False, 'message': 'Stream not found'}), 404
+    frame = request.get_data(cache=False)
+    if not frame:
+        return jsonify({'success': False, 'message': 'No image provided'}), 400
+    try:
+        seq, replaced = stream_manager.submit(stream, frame)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 413
+    except KeyError:
+        return jsonify({'success': False, 'message': 'Stream not found'}), 404
+    return jsonify({'success': True, 'seq': seq, 'replaced_pending': replaced}), 202
+
+@bp.route('/api/stream/<stream_id>/upload', methods=['POST'])
+def stream_upload(stream_id):
+    # Chunked upload of many frames in one request: [4-byte big-endian length][image bytes]...
+    stream = current_stream(stream_id)
+    if stream is None:
+        return jsonify({'success': False, 'message': 'Stream not found'}), 404
+    frames = 0
+    try:
+        for frame in read_frames(request.stream, stream_manager.max_frame_bytes):
+            stream_manager.submit(stream, frame)
+            frames += 1
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e), 'frames': frames}), 400
+    except KeyError:
+        return jsonify({'success': False, 'message': 'Stream closed', 'frames': frames}), 404
+    return jsonify({'success': True, 'frames': frames, **stream.stats()})
+
+@bp.route('/api/stream/<stream_id>/events')
+def stream_events(stream_id):
+    stream = current_stream(stream_id)
+    if stream is None:
+        return jsonify({'success': False, 'message': 'Stream not found'}), 404
+    last_event_id = request.headers.get('Last-Event-ID', '0')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else 0
+    return Response(stream_manager.events(stream, last_event_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/api/stream/<stream_id>', methods=['DELETE'])
+def close_stream(stream_id):
+    stream = current_stream(stream_id)
+    if stream is None:
+        return jsonify({'success': False, 'message': 'Stream not found'}), 404
+    stream_manager.close(stream)
+    return jsonify({'success': True, **stream.stats()})
+
+def analyze_stream_frame(stream, frame):
+    # Runs on a stream worker thread (no request context): same pipeline as
+    # /api/detect-stress/frame, result published to the stream's SSE channel
+    from frame_decoding import decode_image_gray
+    gray = decode_image_gray(frame)
+    if gray is None:
+        return {'success': False, 'message': 'Could not decode image'}
+
+    tracker = session_trackers.get(stream.user_id) if session_trackers is not None else None
+    faces = detect_faces(gray, tracker)
+    if len(faces) == 0:
+        DETECTIONS.inc(result='no_face')
+        return {'success': False, 'message': 'No face detected'}
+    DETECTIONS.inc(result='face')
+    FACES_FOUND.inc(len(faces))
+
+    stress_level, top_emotion, probs = analyze_stress_with_model(gray, faces)
+    now = time.monotonic()
+    log = now - stream.last_logged >= STREAM_LOG_INTERVAL_S
+    if log:
+        stream.last_logged = now
+    return stress_result(stream.user_id, stream.username, stress_level, top_emotion, probs, log=log)
+
+@bp.route('/api/stress-logs')
 def get_stress_logs():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Unauthorized'})
     if stress_logs_collection is None:
         return jsonify({'success': False, 'message': 'Database unavailable'}), 500
+    is_admin = session.get('role') == 'admin'
     try:
-        if session.get('role') == 'admin':
-            logs = list(stress_logs_collection.find().sort('timestamp', -1).limit(50))
-        else:
-            logs = list(stress_logs_collection.find({'user_id': session['user_id']}).sort('timestamp', -1).limit(20))
-        for log in logs:
-            log['_id'] = str(log.get('_id'))
-            log['timestamp'] = log.get('timestamp').isoformat() if log.get('timestamp') else ''
-        return jsonify({'success': True, 'logs': logs}), 200
+        page = find_log_page(stress_logs_collection, {} if is_admin else {'user_id': session['user_id']},
+                             request.args, 50 if is_admin else 20)
+        serialize_logs(page['logs'])
+        return jsonify({'success': True, **page}), 200
+    except QueryError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@bp.route('/api/dashboard')
+def get_dashboard():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    if stress_logs_collection is None:
+        return jsonify({'success': False, 'message': 'Database unavailable'}), 500
+    is_admin = session.get('role') == 'admin'
+    try:
+        page = find_log_page(stress_logs_collection, {} if is_admin else {'user_id': session['user_id']},
+                             {}, 50 if is_admin else 20)
+        logs = page['logs']
+        summary = {'count': len(logs)}
+        if is_admin:
+            summary['total_logs'] = stress_logs_collection.estimated_document_count()
+            summary['total_users'] = users_collection.estimated_document_count() if users_collection is not None else 0
+        # The daily series behind the stress pattern chart, as /api/stress-stats would return it
+        stats = None
+        if stress_rollups_collection is not None:
+            buckets, stats_summary = query_rollups(stress_rollups_collection,
+                                                   GLOBAL_USER_ID if is_admin else session['user_id'],
+                                                   'day', *default_range('day'))
+            stats = {'buckets': buckets, 'summary': stats_summary}
+        serialize_logs(logs)
+        return jsonify({'success': True, 'username': session.get('username'), 'role': session.get('role'),
+                        'summary': summary, 'stats': stats, **page}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@bp.route('/api/stress-logs/export')
+def export_stress_logs():
+    if session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    if stress_logs_collection is None:
+        return jsonify({'success': False, 'message': 'Database unavailable'}), 500
+    try:
+        fmt, columns, query = parse_export_args(request.args)
+    except QueryError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return export_response(stress_logs_collection, fmt, columns, query,
+                           filename=f"stress_logs_{datetime.utcnow():%Y%m%d_%H%M%S}")
+
+@bp.route('/api/stress-stats')
+def get_stress_stats():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    if stress_rollups_collection is None:
+        return jsonify({'success': False, 'message': 'Database unavailable'}), 500
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'success': False, 'message': f"'granularity' must be one of: {', '.join(GRANULARITIES)}"}), 400
+    # Admins see everyone's aggregate unless they ask for one user
+    if session.get('role') == 'admin':
+        user_id = request.args.get('user_id') or GLOBAL_USER_ID
+    else:
+        user_id = session['user_id']
+    try:
+        start, end = default_range(granularity)
+        start = parse_time(request.args.get('from'), 'from') or start
+        end = parse_time(request.args.get('to'), 'to') or end
+        buckets, summary = query_rollups(stress_rollups_collection, user_id, granularity, start, end)
+        return jsonify({'success': True, 'granularity': granularity,
+                        'user_id': None if user_id == GLOBAL_USER_ID else user_id,
+                        'from': start.isoformat(), 'to': end.isoformat(),
+                        'buckets': buckets, 'summary': summary}), 200
+    except QueryError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 # -------------------- HELPERS --------------------
 
+def serialize_logs(logs):
+    for log in logs:
+        log['_id'] = str(log.get('_id'))
+        log['timestamp'] = log.get('timestamp').isoformat() if log.get('timestamp') else ''
+    return logs
+
+def save_stress_log(doc):
+    with stage('log_write'):
+        if stress_log_writer is not None:
+            stress_log_writer.write(doc)
+        # Explicit None check for collection
+        elif stress_logs_collection is not None:
+            stress_logs_collection.insert_one(doc)
+            update_rollups([doc])
+
+def detect_faces(gray, tracker=None):
+    with stage('face_detect'):
+        return tracker.detect(gray) if tracker is not None else face_detector.detect(gray)
+
+STRESS_MAP = {
+    'Angry': 85,
+    'Disgust': 75,
+    'Fear': 80,
+    'Sad': 65,
+    'Surprise': 50,
+    'Neutral': 40,
+    'Happy': 25
+}
+
+def stress_weights_for(labels):
+    # Stress value of each model output, in the model's label order
+    return np.array([STRESS_MAP.get(label, 50) for label in labels], dtype=float)
+
+def preprocess_face(roi_gray):
+    import cv2
+    with stage('resize'):
+        roi_gray = cv2.resize(roi_gray, (48, 48))
+        return (roi_gray.astype("float32") / 255.0)[..., np.newaxis]
+
+def predict_emotions(rois):
+    # One model call for all ROIs not already cached; returns an (N, num_classes) array
+    if emotion_predictor is None:
+        return np.zeros((len(rois), len(emotion_labels)))
+    if prediction_cache is None:
+        with stage('predict'):
+            return emotion_predictor.predict_many(np.stack(rois))
+
+    with stage('cache_lookup'):
+        keys = [phash(roi) for roi in rois]
+        preds = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, p in enumerate(preds) if p is None]
+    if missing:
+        with stage('predict'):
+            fresh = emotion_predictor.predict_many(np.stack([rois[i] for i in missing]))
+        for i, row in zip(missing, fresh):
+            prediction_cache.put(keys[i], row)
+            preds[i] = row
+    return np.stack(preds)
+
+def label_for(preds):
+    return emotion_labels[int(np.argmax(preds))] if emotion_labels else "Unknown"
+
+def stress_from_emotion(emotion):
+    stress_level = STRESS_MAP.get(emotion, 50)
+    stress_level += random.randint(-5, 5)
+    return max(0, min(100, stress_level))
+
 def analyze_stress_with_model(gray_frame, faces):
+    (x, y, w, h) = max(faces, key=lambda f: f[2] * f[3])
+    return analyze_face_roi(gray_frame[y:y + h, x:x + w])
+
+def analyze_face_roi(roi_gray):
+    # -> (stress_level, emotion, softmax); softmax is None when the model failed
     try:
-        (x, y, w, h) = max(faces, key=lambda f: f[2] * f[3])
-        roi_gray = gray_frame[y:y + h, x:x + w]
-        roi_gray = cv2.resize(roi_gray, (48, 48))
-        roi_gray = roi_gray.astype("float") / 255.0
-        roi_gray = img_to_array(roi_gray)
-        roi_gray = np.expand_dims(roi_gray, axis=0)
-
-        preds = emotion_model.predict(roi_gray)[0] if emotion_model is not None else np.zeros((7,))
-        emotion_index = int(np.argmax(preds)) if preds is not None else 0
-        emotion = emotion_labels[emotion_index] if emotion_labels else "Unknown"
-
-        stress_map = {
-            'Angry': 85,
-            'Disgust': 75,
-            'Fear': 80,
-            'Sad': 65,
-            'Surprise': 50,
-            'Neutral': 40,
-            'Happy': 25
-        }
-
-        stress_level = stress_map.get(emotion, 50)
-        stress_level += random.randint(-5, 5)
-        return max(0, min(100, stress_level)), emotion
+        preds = predict_emotions([preprocess_face(roi_gray)])[0]
+        emotion = label_for(preds)
+        return stress_from_emotion(emotion), emotion, preds
     except Exception as e:
         print(f"Model stress analysis error: {e}")
-        return random.randint(20, 80), "Unknown"
+        return random.randint(20, 80), "Unknown", None
+
+def analyze_all_faces(gray_frame, faces):
+    # Every face in the frame, classified in a single batched model call
+    rois = [preprocess_face(gray_frame[y:y + h, x:x + w]) for (x, y, w, h) in faces]
+    all_preds = predict_emotions(rois)
+    results = []
+    for (x, y, w, h), preds in zip(faces, all_preds):
+        emotion = label_for(preds)
+        results.append({
+            'box': {'x': int(x), 'y': int(y), 'w': int(w), 'h': int(h)},
+            'emotion': emotion,
+            'probabilities': {label: round(float(p), 4) for label, p in zip(emotion_labels, preds)},
+            'stress_level': stress_from_emotion(emotion),
+        })
+    return results
 
 def get_stress_message(stress_level):
     if stress_level < 30:
@@ -388,35 +974,74 @@ def get_stress_message(stress_level):
         return "High stress detected. Please take care of yourself! 😟"
 
 # -------------------- OPTIONAL: REAL-TIME VIDEO FEED --------------------
-@app.route('/video_feed')
+def annotate_faces(frame):
+    import cv2
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    faces = detect_faces(gray, video_tracker)
+    if len(faces) == 0:
+        return []
+    all_preds = predict_emotions([preprocess_face(gray[y:y+h, x:x+w]) for (x, y, w, h) in faces])
+    return [((int(x), int(y), int(w), int(h)), label_for(preds))
+            for (x, y, w, h), preds in zip(faces, all_preds)]
+
+def video_stream():
+    from video_stream import get_camera_stream
+    return get_camera_stream(
+        VIDEO_SOURCE,
+        analyze_fn=annotate_faces,
+        target_fps=VIDEO_TARGET_FPS,
+        jpeg_quality=VIDEO_JPEG_QUALITY,
+        analyze_every=VIDEO_ANALYZE_EVERY,
+        analyze_interval_ms=VIDEO_ANALYZE_INTERVAL_MS,
+    )
+
+@bp.route('/video_feed')
+@requires_models
 def video_feed():
-    def generate_frames():
-        cap = cv2.VideoCapture(0)
-        while True:
-            success, frame = cap.read()
-            if not success:
-                break
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-
-            for (x, y, w, h) in faces:
-                roi_gray = cv2.resize(gray[y:y+h, x:x+w], (48, 48))
-                roi_gray = roi_gray.astype("float") / 255.0
-                roi_gray = img_to_array(roi_gray)
-                roi_gray = np.expand_dims(roi_gray, axis=0)
-
-                preds = emotion_model.predict(roi_gray)[0] if emotion_model is not None else np.zeros((7,))
-                label = emotion_labels[np.argmax(preds)] if emotion_labels else "Unknown"
-                cv2.putText(frame, label, (x, y - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-
-            _, buffer = cv2.imencode('.jpg', frame)
-            frame = buffer.tobytes()
-            yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-
-    return Response(generate_frames(),
+    # All viewers share one capture/analysis/encode pipeline per camera
+    return Response(video_stream().viewer_frames(),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@bp.route('/video_feed/stats')
+def video_feed_stats():
+    from video_stream import all_stream_stats
+    return jsonify({
+        'success': True,
+        'streams': all_stream_stats(),
+        'tracking': video_tracker.stats() if video_tracker is not None else None,
+        'inference_pool': emotion_model.stats() if hasattr(emotion_model, 'stats') else None
+    })
+
+@bp.route('/api/prediction-cache/stats')
+def prediction_cache_stats():
+    if session.get('role') != 'admin':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return jsonify({'success': True, 'cache': prediction_cache.stats() if prediction_cache is not None else None})
+
+@bp.route('/metrics')
+def metrics_endpoint():
+    # Prometheus text exposition format
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# -------------------- HEALTH --------------------
+
+@bp.route('/healthz')
+def healthz():
+    # Liveness: the process is up and serving requests
+    return jsonify({'status': 'ok'})
+
+@bp.route('/readyz')
+def readyz():
+    # Readiness: the model is loaded and warmed up, detection requests will succeed
+    status = model_loader.status() if model_loader is not None else {'state': LOADING}
+    ready = status['state'] == READY
+    return jsonify({
+        'ready': ready,
+        'model': status,
+        'database': users_collection is not None
+    }), 200 if ready else 503
+
 if __name__ == '__main__':
-    app.run(debug=FLASK_DEBUG, port=FLASK_PORT)
+    create_app().run(debug=FLASK_DEBUG, port=FLASK_PORT)
@@ -0,0 +1,124 @@
+# batching.py - micro-batching front-end for the emotion model
+#
+# Concurrent requests each hand over one 48x48x1 face ROI (or a stack of them
+# for multi-face frames); a single worker thread collects them into one batch
+# and calls the model once.  A batch is flushed as soon as it holds
+# `max_batch` rows or the oldest queued item has waited `max_wait_ms`,
+# whichever comes first.  A stack submitted with submit_many() is never split
+# across model calls.
+#
+# predict_fn may also return a Future (e.g. InferencePool.submit): the worker
+# thread then hands the batch off and goes straight back to collecting the
+# next one, so several batches can be in flight at once.
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchingPredictor:
+    def __init__(self, predict_fn, max_batch=32, max_wait_ms=5.0, name="emotion-batcher"):
+        self.predict_fn = predict_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # ---------- client side ----------
+    def submit_many(self, rois):
+        # Future resolves to an (N, num_classes) array, one row per ROI
+        if self._closed:
+            raise RuntimeError("BatchingPredictor is closed")
+        future = Future()
+        self._queue.put((np.asarray(rois, dtype=np.float32), future))
+        return future
+
+    def submit(self, roi):
+        future = Future()
+        inner = self.submit_many(np.expand_dims(roi, axis=0))
+
+        def _unwrap(f):
+            if f.exception() is not None:
+                future.set_exception(f.exception())
+            else:
+                future.set_result(f.result()[0])
+        inner.add_done_callback(_unwrap)
+        return future
+
+    def predict(self, roi, timeout=None):
+        return self.submit(roi).result(timeout=timeout)
+
+    def predict_many(self, rois, timeout=None):
+        return self.submit_many(rois).result(timeout=timeout)
+
+    def close(self, timeout=None):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # ---------- worker side ----------
+    def _resolve(self, items, preds):
+        offset = 0
+        for rois, future in items:
+            future.set_result(preds[offset:offset + len(rois)])
+            offset += len(rois)
+
+    def _resolve_future(self, items, preds_future):
+        if preds_future.exception() is not None:
+            self._fail(items, preds_future.exception())
+        else:
+            self._resolve(items, preds_future.result())
+
+    def _fail(self, items, error):
+        for _, future in items:
+            if not future.done():
+                future.set_exception(error)
+
+    def _collect(self, first):
+        items = [first]
+        rows = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # put the sentinel back so the run loop sees it after this flush
+                self._queue.put(None)
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            items = self._collect(first)
+            try:
+                preds = self.predict_fn(np.concatenate([rois for rois, _ in items]))
+            except Exception as e:
+                self._fail(items, e)
+                continue
+            if isinstance(preds, Future):
+                preds.add_done_callback(lambda f, items=items: self._resolve_future(items, f))
+            else:
+                self._resolve(items, preds)
+
+        # fail anything still queued after close()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("BatchingPredictor is closed"))
@@ -0,0 +1,76 @@
+# db_indexes.py - MongoDB indexes and list projections used by app.py
+#
+# ensure_indexes() is idempotent: create_index is a no-op when an index with
+# the same keys and options already exists.  provision_indexes() repeats it
+# with backoff until MongoDB could be reached, for app startup.
+import time
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure
+
+INDEXES = {
+    'users': [
+        # register/login/create_user/update_user look users up by name
+        ([('username', ASCENDING)], {'name': 'username_unique', 'unique': True}),
+    ],
+    'stress_logs': [
+        # per-user history, newest first; _id breaks timestamp ties for keyset paging
+        ([('user_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)], {'name': 'user_id_timestamp_id'}),
+        # admin view of all logs, newest first
+        ([('timestamp', DESCENDING), ('_id', DESCENDING)], {'name': 'timestamp_id_desc'}),
+    ],
+    'stress_rollups': [
+        # one document per bucket; also the $merge key of the rollup backfill
+        ([('granularity', ASCENDING), ('user_id', ASCENDING), ('start', ASCENDING)],
+         {'name': 'granularity_user_start_unique', 'unique': True}),
+    ],
+}
+
+# Fields the dashboard/admin log lists actually render
+LOG_LIST_PROJECTION = {
+    'username': 1,
+    'stress_level': 1,
+    'smoothed_stress_level': 1,
+    'detected_emotion': 1,
+    'timestamp': 1,
+}
+
+# Existence checks answered from the username index alone (covered query)
+USERNAME_ONLY_PROJECTION = {'_id': 0, 'username': 1}
+
+# What login needs from a user document
+LOGIN_PROJECTION = {'password': 1, 'role': 1}
+
+
+def ensure_indexes(db):
+    """Create the indexes; returns False if MongoDB could not be reached, so the caller can retry."""
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        for keys, options in indexes:
+            try:
+                collection.create_index(keys, **options)
+            except ConnectionFailure as e:
+                print(f"Could not reach MongoDB to create index {options['name']} on {collection_name}: {e}")
+                return False
+            except Exception as e:
+                # e.g. duplicate usernames already stored block the unique index
+                print(f"Could not create index {options['name']} on {collection_name}: {e}")
+    return True
+
+
+def provision_indexes(db, initial_delay=1.0, max_delay=60.0):
+    # Runs on a daemon thread from app.init_db(); keeps retrying while MongoDB is down or slow to start
+    delay = initial_delay
+    while not ensure_indexes(db):
+        print(f"Retrying index provisioning in {delay:g}s")
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+def drop_indexes(db):
+    for collection_name, indexes in INDEXES.items():
+        for _, options in indexes:
+            try:
+                db[collection_name].drop_index(options['name'])
+            except Exception:
+                pass
@@ -0,0 +1,147 @@
+# face_detection.py - configurable face detectors shared by the API and the video feed
+#
+# Detection runs on a downscaled copy of the frame (longest side <= max_side)
+# and boxes are mapped back to full-resolution coordinates, so callers always
+# crop from the original frame.  Configuration comes from the environment:
+#
+#   FACE_DETECTOR          haar (default) | dnn
+#   FACE_DETECT_MAX_SIDE   longest side used for detection, 0 = full resolution (default 480)
+#   FACE_SCALE_FACTOR      Haar scaleFactor (default 1.3)
+#   FACE_MIN_NEIGHBORS     Haar minNeighbors (default 5)
+#   FACE_MIN_SIZE          smallest face side in full-res pixels (default 30)
+#   FACE_MAX_SIZE          largest face side in full-res pixels, 0 = unlimited (default 0)
+#   FACE_DNN_MODEL         OpenCV DNN face model, e.g. res10_300x300_ssd_iter_140000.caffemodel
+#   FACE_DNN_CONFIG        matching network description, e.g. deploy.prototxt
+#   FACE_DNN_CONFIDENCE    minimum detection score for the DNN detector (default 0.5)
+import os
+import threading
+
+import cv2
+import numpy as np
+
+
+def _downscale(gray, max_side):
+    h, w = gray.shape[:2]
+    longest = max(h, w)
+    if not max_side or longest <= max_side:
+        return gray, 1.0
+    scale = max_side / float(longest)
+    small = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    return small, scale
+
+
+def _to_full_res(boxes, scale):
+    if len(boxes) == 0:
+        return np.empty((0, 4), dtype=int)
+    return np.round(np.asarray(boxes, dtype=float) / scale).astype(int)
+
+
+class HaarFaceDetector:
+    name = 'haar'
+
+    def __init__(self, cascade_path=None, scale_factor=1.3, min_neighbors=5,
+                 min_size=30, max_size=0, max_side=480):
+        cascade_path = cascade_path or cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise FileNotFoundError(f"Could not load Haar cascade: {cascade_path}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_side = max_side
+
+    def detect(self, gray, min_size=None, max_size=None):
+        # min_size/max_size override the configured limits for this call only
+        min_size = self.min_size if min_size is None else min_size
+        max_size = self.max_size if max_size is None else max_size
+        small, scale = _downscale(gray, self.max_side)
+        min_side = max(1, int(min_size * scale)) if min_size else 0
+        max_side = int(max_size * scale) if max_size else 0
+        boxes = self.cascade.detectMultiScale(
+            small,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(min_side, min_side),
+            maxSize=(max_side, max_side),
+        )
+        return _to_full_res(boxes, scale)
+
+
+class DnnFaceDetector:
+    name = 'dnn'
+
+    def __init__(self, model_path, config_path=None, confidence=0.5,
+                 min_size=30, max_size=0, max_side=300, input_size=300):
+        if not model_path or not os.path.exists(model_path):
+            raise FileNotFoundError(f"DNN face model not found at: {model_path}")
+        self.net = cv2.dnn.readNet(model_path, config_path or '')
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.confidence = confidence
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_side = max_side
+        self.input_size = input_size
+        # cv2.dnn.Net.forward is not safe to call from several threads at once
+        self._lock = threading.Lock()
+
+    def detect(self, gray, min_size=None, max_size=None):
+        min_size = self.min_size if min_size is None else min_size
+        max_size = self.max_size if max_size is None else max_size
+        small, scale = _downscale(gray, self.max_side)
+        bgr = cv2.cvtColor(small, cv2.COLOR_GRAY2BGR) if small.ndim == 2 else small
+        h, w = bgr.shape[:2]
+        blob = cv2.dnn.blobFromImage(bgr, 1.0, (self.input_size, self.input_size), (104.0, 177.0, 123.0))
+        with self._lock:
+            self.net.setInput(blob)
+            detections = self.net.forward()
+
+        boxes = []
+        for score, x1, y1, x2, y2 in detections[0, 0, :, 2:7]:
+            if score < self.confidence:
+                continue
+            x1, y1 = max(0.0, x1 * w), max(0.0, y1 * h)
+            x2, y2 = min(float(w), x2 * w), min(float(h), y2 * h)
+            bw, bh = x2 - x1, y2 - y1
+            side = max(bw, bh) / scale
+            if side < min_size or (max_size and side > max_size):
+                continue
+            boxes.append((x1, y1, bw, bh))
+        return _to_full_res(boxes, scale)
+
+
+def detector_config_from_env():
+    return {
+        'detector': os.environ.get('FACE_DETECTOR', 'haar').lower(),
+        'max_side': int(os.environ.get('FACE_DETECT_MAX_SIDE', 480)),
+        'scale_factor': float(os.environ.get('FACE_SCALE_FACTOR', 1.3)),
+        'min_neighbors': int(os.environ.get('FACE_MIN_NEIGHBORS', 5)),
+        'min_size': int(os.environ.get('FACE_MIN_SIZE', 30)),
+        'max_size': int(os.environ.get('FACE_MAX_SIZE', 0)),
+        'dnn_model': os.environ.get('FACE_DNN_MODEL', ''),
+        'dnn_config': os.environ.get('FACE_DNN_CONFIG', ''),
+        'dnn_confidence': float(os.environ.get('FACE_DNN_CONFIDENCE', 0.5)),
+    }
+
+
+def create_face_detector(config=None):
+    config = dict(detector_config_from_env(), **(config or {}))
+    if config['detector'] == 'dnn':
+        return DnnFaceDetector(
+            config['dnn_model'],
+            config['dnn_config'],
+            confidence=config['dnn_confidence'],
+            min_size=config['min_size'],
+            max_size=config['max_size'],
+            max_side=config['max_side'],
+        )
+    if config['detector'] != 'haar':
+        raise ValueError(f"Unknown FACE_DETECTOR '{config['detector']}', expected haar or dnn")
+    return HaarFaceDetector(
+        scale_factor=config['scale_factor'],
+        min_neighbors=config['min_neighbors'],
+        min_size=config['min_size'],
+        max_size=config['max_size'],
+        max_side=config['max_side'],
+    )
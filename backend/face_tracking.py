@@ -0,0 +1,129 @@
+# face_tracking.py - reuse face boxes between frames instead of re-scanning every frame
+#
+# FaceTracker wraps a face detector with the same detect(gray) interface.  Once
+# faces are known, the next frames are only searched inside a window around
+# each previous box, with the face size limited to a band around the previous
+# size.  A full-frame detection happens when:
+#   - there is no previous box, or the frame size changed
+#   - any tracked face is not found again in its window (tracking lost)
+#   - redetect_every frames have passed (to pick up newly arrived faces)
+#   - the previous result is older than max_age_s (e.g. slow API callers)
+#
+#   FACE_TRACKING          1 (default) / 0 to always detect on the full frame
+#   FACE_REDETECT_EVERY    full-frame detection at least every K frames (default 10)
+#   FACE_TRACK_MARGIN      search window margin as a fraction of the face size (default 0.5)
+#   FACE_TRACK_MAX_AGE_S   previous boxes older than this are not trusted (default 5)
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FaceTracker:
+    def __init__(self, detector, redetect_every=10, search_margin=0.5, size_band=0.35, max_age_s=5.0):
+        self.detector = detector
+        self.redetect_every = max(1, int(redetect_every))
+        self.search_margin = float(search_margin)
+        self.size_band = float(size_band)
+        self.max_age_s = float(max_age_s)
+
+        self._boxes = np.empty((0, 4), dtype=int)
+        self._shape = None
+        self._since_full = 0
+        self._updated_at = 0.0
+        self._lock = threading.Lock()
+
+        self.frames = 0
+        self.full_detections = 0
+        self.window_detections = 0
+
+    def _full(self, gray):
+        self.full_detections += 1
+        self._since_full = 0
+        return self.detector.detect(gray)
+
+    def _search_window(self, gray, box):
+        x, y, w, h = box
+        img_h, img_w = gray.shape[:2]
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(img_w, x + w + mx), min(img_h, y + h + my)
+
+        self.window_detections += 1
+        side = max(w, h)
+        found = self.detector.detect(
+            gray[y0:y1, x0:x1],
+            min_size=int(side * (1.0 - self.size_band)),
+            max_size=int(side * (1.0 + self.size_band)) + 1,
+        )
+        if len(found) == 0:
+            return None
+        # the candidate whose centre is closest to the previous one
+        cx, cy = x + w / 2.0 - x0, y + h / 2.0 - y0
+        best = min(found, key=lambda b: (b[0] + b[2] / 2.0 - cx) ** 2 + (b[1] + b[3] / 2.0 - cy) ** 2)
+        return (best[0] + x0, best[1] + y0, best[2], best[3])
+
+    def detect(self, gray):
+        with self._lock:
+            self.frames += 1
+            self._since_full += 1
+            now = time.monotonic()
+            stale = (
+                len(self._boxes) == 0
+                or gray.shape != self._shape
+                or self._since_full >= self.redetect_every
+                or now - self._updated_at > self.max_age_s
+            )
+
+            boxes = None
+            if not stale:
+                tracked = [self._search_window(gray, box) for box in self._boxes]
+                if all(b is not None for b in tracked):
+                    boxes = np.asarray(tracked, dtype=int)
+            if boxes is None:
+                boxes = self._full(gray)
+
+            self._boxes, self._shape, self._updated_at = boxes, gray.shape, now
+            return boxes
+
+    def stats(self):
+        with self._lock:
+            return {
+                'frames': self.frames,
+                'full_detections': self.full_detections,
+                'window_detections': self.window_detections,
+            }
+
+
+class TrackerRegistry:
+    # One FaceTracker per key (user session, camera), least recently used evicted first
+    def __init__(self, detector, max_trackers=1024, **tracker_kwargs):
+        self.detector = detector
+        self.max_trackers = max_trackers
+        self.tracker_kwargs = tracker_kwargs
+        self._trackers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            tracker = self._trackers.pop(key, None)
+            if tracker is None:
+                tracker = FaceTracker(self.detector, **self.tracker_kwargs)
+            self._trackers[key] = tracker
+            while len(self._trackers) > self.max_trackers:
+                self._trackers.popitem(last=False)
+            return tracker
+
+
+def tracker_config_from_env():
+    return {
+        'redetect_every': int(os.environ.get('FACE_REDETECT_EVERY', 10)),
+        'search_margin': float(os.environ.get('FACE_TRACK_MARGIN', 0.5)),
+        'max_age_s': float(os.environ.get('FACE_TRACK_MAX_AGE_S', 5)),
+    }
+
+
+def tracking_enabled():
+    return os.environ.get('FACE_TRACKING', '1').lower() in ('1', 'true', 'yes')
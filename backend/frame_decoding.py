@@ -0,0 +1,32 @@
+# frame_decoding.py - turn uploaded webcam frames into grayscale numpy arrays
+import base64
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from metrics import stage
+
+
+def decode_base64_frame(data_url):
+    # Legacy JSON path: "data:image/jpeg;base64,..." -> RGB -> BGR -> gray
+    with stage('base64_decode'):
+        image_data = data_url.split(',')[-1]
+        image_bytes = base64.b64decode(image_data)
+    with stage('image_decode'):
+        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+    with stage('color_convert'):
+        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+        return cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+
+
+def decode_image_gray(image_bytes):
+    # Binary path: one libjpeg/libpng decode straight to a single gray channel.
+    # Returns None when the bytes are not a decodable image.
+    buf = np.frombuffer(image_bytes, dtype=np.uint8)
+    if buf.size == 0:
+        return None
+    with stage('image_decode'):
+        return cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
@@ -0,0 +1,197 @@
+# inference_backends.py - interchangeable ways of running emotion_model.h5
+#
+# INFERENCE_BACKEND selects how predictions are served:
+#   keras        model.predict() (builds a tf.data pipeline per call, slowest)
+#   tf-function  the Keras model traced once into a tf.function graph
+#   tflite       the model converted to a TFLite flatbuffer, cached next to MODEL_PATH
+#   auto         fastest available: tflite, falling back to tf-function
+#
+# A MODEL_PATH ending in .tflite (e.g. the float16/int8 variants written by
+# scripts/quantize_model.py) is always served by the tflite backend.
+#
+# Every backend exposes predict(batch) taking float32 (N, 48, 48, 1) in [0, 1]
+# and returning an (N, num_classes) numpy array of softmax scores.
+#
+# set_thread_counts() caps the threads a backend uses: TensorFlow's intra-/
+# inter-op pools (applied when TF is first imported here) and the TFLite
+# interpreter's num_threads (intra-op).  Call it before load_backend().
+import os
+import threading
+
+import numpy as np
+
+BACKENDS = ('keras', 'tf-function', 'tflite')
+
+_thread_counts = {'intra_op': None, 'inter_op': None}
+
+
+def set_thread_counts(intra_op=None, inter_op=None):
+    _thread_counts['intra_op'] = intra_op or None
+    _thread_counts['inter_op'] = inter_op or None
+
+
+def _import_tf():
+    import tensorflow as tf
+
+    intra, inter = _thread_counts['intra_op'], _thread_counts['inter_op']
+    try:
+        if intra and tf.config.threading.get_intra_op_parallelism_threads() != intra:
+            tf.config.threading.set_intra_op_parallelism_threads(intra)
+        if inter and tf.config.threading.get_inter_op_parallelism_threads() != inter:
+            tf.config.threading.set_inter_op_parallelism_threads(inter)
+    except RuntimeError as e:
+        # the TF runtime is already initialized in this process
+        print(f"TensorFlow thread counts not applied: {e}")
+    return tf
+
+
+class KerasBackend:
+    name = 'keras'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, batch):
+        return self.model.predict(batch, verbose=0)
+
+
+class TFFunctionBackend:
+    name = 'tf-function'
+
+    def __init__(self, model):
+        tf = _import_tf()
+
+        self.model = model
+        input_shape = (None,) + tuple(model.input_shape[1:])
+        self._fn = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec(input_shape, tf.float32)],
+            autograph=False,
+        )
+
+    def predict(self, batch):
+        return self._fn(np.asarray(batch, dtype=np.float32)).numpy()
+
+
+class TFLiteBackend:
+    name = 'tflite'
+
+    def __init__(self, tflite_path):
+        self.path = tflite_path
+        self._interpreter = _make_interpreter(tflite_path)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        # full-int8 models take and return quantized tensors
+        self._in_scale, self._in_zero = self._input['quantization']
+        self._out_scale, self._out_zero = self._output['quantization']
+        self._int_input = np.issubdtype(self._input['dtype'], np.integer)
+        self._int_output = np.issubdtype(self._output['dtype'], np.integer)
+        # a TFLite interpreter must not be invoked from two threads at once
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        if self._int_input:
+            info = np.iinfo(self._input['dtype'])
+            batch = np.clip(np.round(batch / self._in_scale + self._in_zero), info.min, info.max)
+            batch = batch.astype(self._input['dtype'])
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input['index'], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self._interpreter.set_tensor(self._input['index'], batch)
+            self._interpreter.invoke()
+            out = self._interpreter.get_tensor(self._output['index']).copy()
+        if self._int_output:
+            out = (out.astype(np.float32) - self._out_zero) * self._out_scale
+        return out
+
+
+def _make_interpreter(tflite_path):
+    # Prefer the standalone runtimes when installed; they load much faster than TF
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            Interpreter = _import_tf().lite.Interpreter
+    return Interpreter(model_path=tflite_path, num_threads=_thread_counts['intra_op'])
+
+
+def tflite_path_for(model_path):
+    return os.path.splitext(model_path)[0] + '.tflite'
+
+
+def convert_to_tflite(model, tflite_path, quantization=None, representative_dataset=None):
+    """Write `model` as a TFLite flatbuffer; quantization is None, 'float16' or 'int8'."""
+    tf = _import_tf()
+
+    input_shape = (None,) + tuple(model.input_shape[1:])
+    fn = tf.function(lambda x: model(x, training=False),
+                     input_signature=[tf.TensorSpec(input_shape, tf.float32)], autograph=False)
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([fn.get_concrete_function()])
+    if quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if representative_dataset is None:
+            raise ValueError("int8 quantization needs a representative dataset")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif quantization is not None:
+        raise ValueError(f"Unknown quantization '{quantization}'")
+
+    flatbuffer = converter.convert()
+    # per-process name: several inference workers may convert at once
+    tmp_path = f'{tflite_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(flatbuffer)
+    os.replace(tmp_path, tflite_path)
+    return tflite_path
+
+
+def _cached_tflite(model_path):
+    # Re-convert only when the cached flatbuffer is missing or older than the .h5
+    tflite_path = tflite_path_for(model_path)
+    if os.path.exists(tflite_path) and os.path.getmtime(tflite_path) >= os.path.getmtime(model_path):
+        return tflite_path
+
+    load_model = _import_tf().keras.models.load_model
+    print(f"Converting {model_path} to TFLite ...")
+    convert_to_tflite(load_model(model_path), tflite_path)
+    print(f"✅ TFLite model cached at: {tflite_path}")
+    return tflite_path
+
+
+def load_backend(name, model_path):
+    name = (name or 'auto').lower()
+    if name not in BACKENDS + ('auto',):
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{name}', expected one of: auto, {', '.join(BACKENDS)}")
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model not found at: {model_path}")
+
+    if model_path.endswith('.tflite'):
+        if name not in ('tflite', 'auto'):
+            raise ValueError(f"INFERENCE_BACKEND '{name}' cannot serve a .tflite model")
+        return TFLiteBackend(model_path)
+
+    if name in ('tflite', 'auto'):
+        try:
+            return TFLiteBackend(_cached_tflite(model_path))
+        except Exception as e:
+            if name == 'tflite':
+                raise
+            print(f"TFLite backend unavailable ({e}), falling back to tf-function")
+            name = 'tf-function'
+
+    model = _import_tf().keras.models.load_model(model_path)
+    if name == 'keras':
+        return KerasBackend(model)
+    return TFFunctionBackend(model)
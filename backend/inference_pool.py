@@ -0,0 +1,275 @@
+# inference_pool.py - emotion model served by dedicated worker processes
+#
+# With INFERENCE_WORKERS > 0 the Flask process no longer holds the model:
+# N spawned worker processes each load one copy (any INFERENCE_BACKEND) and
+# take batches from a shared task queue.  ROIs are never pickled: the pool
+# owns two shared-memory blocks divided into slots, one slot per in-flight
+# batch.  The web process copies a batch into a free input slot and sends
+# only (slot, rows) to the workers; the worker that picks it up writes the
+# softmax rows into the matching output slot and answers (slot, error).
+# A listener thread resolves the caller's Future and frees the slot.  When
+# every slot is busy, submit() waits for one, which bounds the work queued
+# behind slow workers.
+#
+# The pool belongs to the process that creates it.  A web process may only
+# own one when it is the only one on the host (claim_web_pool()); with
+# several web workers, inference_server.py runs a single pool they share.
+#
+#   INFERENCE_WORKERS            worker processes (default 0: model runs in the web process)
+#   INFERENCE_INTRA_OP_THREADS   TF intra-op / TFLite interpreter threads per model copy
+#   INFERENCE_INTER_OP_THREADS   TF inter-op threads per model copy
+# Both default to 1 in pool workers (the workers already use the cores) and
+# to the runtime's own default when the model runs in the web process.
+import multiprocessing as mp
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no multi-process WSGI servers to guard against
+    fcntl = None
+
+ROI_SHAPE = (48, 48, 1)
+WEB_POOL_LOCK = os.path.join(tempfile.gettempdir(), 'stress-inference-pool.lock')
+
+
+def _worker_main(worker_id, model_path, backend_name, in_name, out_name, in_shape, out_shape,
+                 tasks, results, intra_op_threads, inter_op_threads):
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    inputs = np.ndarray(in_shape, dtype=np.float32, buffer=in_shm.buf)
+    outputs = np.ndarray(out_shape, dtype=np.float32, buffer=out_shm.buf)
+    try:
+        from inference_backends import load_backend, set_thread_counts
+
+        set_thread_counts(intra_op_threads or 1, inter_op_threads or 1)
+        backend = load_backend(backend_name, model_path)
+        # warmup, and make sure the model's output fits the output slots
+        probe = backend.predict(np.zeros((1,) + ROI_SHAPE, dtype=np.float32))
+        if probe.shape[1] != out_shape[2]:
+            raise ValueError(f"model has {probe.shape[1]} outputs, pool expects {out_shape[2]}")
+    except Exception as e:
+        results.put(('failed', worker_id, f"{type(e).__name__}: {e}"))
+        return
+    results.put(('ready', worker_id, backend.name))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        slot, rows = task
+        try:
+            outputs[slot, :rows] = backend.predict(inputs[slot, :rows])
+            results.put(('done', slot, None))
+        except Exception as e:
+            results.put(('done', slot, f"{type(e).__name__}: {e}"))
+
+    del inputs, outputs
+    in_shm.close()
+    out_shm.close()
+
+
+class InferencePool:
+    def __init__(self, model_path, backend='auto', workers=2, max_batch=32, num_classes=7, slots=None,
+                 intra_op_threads=1, inter_op_threads=1, start_timeout=300):
+        self.workers = max(1, int(workers))
+        self.max_batch = max(1, int(max_batch))
+        self.slots = int(slots or 2 * self.workers)
+        self.num_classes = int(num_classes)
+
+        in_shape = (self.slots, self.max_batch) + ROI_SHAPE
+        out_shape = (self.slots, self.max_batch, self.num_classes)
+        self._in_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(in_shape)) * 4)
+        self._out_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(out_shape)) * 4)
+        self._inputs = np.ndarray(in_shape, dtype=np.float32, buffer=self._in_shm.buf)
+        self._outputs = np.ndarray(out_shape, dtype=np.float32, buffer=self._out_shm.buf)
+
+        # spawn, not fork: the web process may already run threads (and TF)
+        ctx = mp.get_context('spawn')
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._free = queue.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._broken = None
+        self._listener = None
+        self.batches = 0
+        self.rows = 0
+
+        self._procs = [
+            ctx.Process(target=_worker_main, name=f'inference-worker-{i}', daemon=True,
+                        args=(i, model_path, backend, self._in_shm.name, self._out_shm.name, in_shape, out_shape,
+                              self._tasks, self._results, intra_op_threads, inter_op_threads))
+            for i in range(self.workers)
+        ]
+        for proc in self._procs:
+            proc.start()
+        try:
+            self.name = f"pool[{self._wait_for_workers(start_timeout)}]x{self.workers}"
+        except Exception:
+            self.close()
+            raise
+
+        self._listener = threading.Thread(target=self._listen, name='inference-pool-results', daemon=True)
+        self._listener.start()
+
+    def _wait_for_workers(self, timeout):
+        backend_name = None
+        for _ in self._procs:
+            try:
+                state, worker_id, detail = self._results.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"inference workers did not start within {timeout}s")
+            if state == 'failed':
+                raise RuntimeError(f"inference worker {worker_id} failed to load the model: {detail}")
+            backend_name = detail
+        return backend_name
+
+    # ---------- client side ----------
+    def submit(self, batch):
+        # Future resolves to an (N, num_classes) array; batches larger than
+        # max_batch are spread over several slots (and workers)
+        batch = np.asarray(batch, dtype=np.float32).reshape((-1,) + ROI_SHAPE)
+        if len(batch) <= self.max_batch:
+            return self._submit_chunk(batch)
+
+        parts = [self._submit_chunk(batch[i:i + self.max_batch]) for i in range(0, len(batch), self.max_batch)]
+        future = Future()
+        remaining = [len(parts)]
+
+        def _part_done(_):
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            errors = [p.exception() for p in parts if p.exception() is not None]
+            if errors:
+                future.set_exception(errors[0])
+            else:
+                future.set_result(np.concatenate([p.result() for p in parts]))
+        for part in parts:
+            part.add_done_callback(_part_done)
+        return future
+
+    def predict(self, batch, timeout=None):
+        return self.submit(batch).result(timeout=timeout)
+
+    def _submit_chunk(self, chunk):
+        if self._closed or self._broken:
+            raise RuntimeError(self._broken or "InferencePool is closed")
+        while True:
+            try:
+                slot = self._free.get(timeout=1.0)
+                break
+            except queue.Empty:
+                if self._closed or self._broken:
+                    raise RuntimeError(self._broken or "InferencePool is closed")
+        rows = len(chunk)
+        self._inputs[slot, :rows] = chunk
+        future = Future()
+        with self._lock:
+            self._pending[slot] = (future, rows)
+            self.batches += 1
+            self.rows += rows
+        self._tasks.put((slot, rows))
+        return future
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'alive': sum(p.is_alive() for p in self._procs),
+                'slots': self.slots,
+                'in_flight': len(self._pending),
+                'batches': self.batches,
+                'rows': self.rows,
+            }
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._procs:
+            self._tasks.put(None)
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self._results.put(None)
+        if getattr(self, '_listener', None) is not None:
+            self._listener.join(timeout)
+        self._fail_pending(RuntimeError("InferencePool is closed"))
+        self._inputs = self._outputs = None
+        for shm in (self._in_shm, self._out_shm):
+            shm.close()
+            shm.unlink()
+
+    # ---------- result side ----------
+    def _listen(self):
+        next_check = time.monotonic() + 1.0
+        while True:
+            try:
+                msg = self._results.get(timeout=1.0)
+            except queue.Empty:
+                msg = False
+            if msg is None:
+                break
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + 1.0
+                # a worker that died mid-batch never answers: fail what is in flight
+                if not self._closed and not all(p.is_alive() for p in self._procs):
+                    self._broken = "an inference worker exited unexpectedly"
+                    self._fail_pending(RuntimeError(self._broken))
+                    break
+            if msg is False:
+                continue
+            _, slot, error = msg
+            with self._lock:
+                future, rows = self._pending.pop(slot)
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(self._outputs[slot, :rows].copy())
+            self._free.put(slot)
+
+    def _fail_pending(self, error):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+def pool_config_from_env():
+    intra = os.environ.get('INFERENCE_INTRA_OP_THREADS')
+    inter = os.environ.get('INFERENCE_INTER_OP_THREADS')
+    return {
+        'workers': int(os.environ.get('INFERENCE_WORKERS', 0)),
+        'intra_op_threads': int(intra) if intra else None,
+        'inter_op_threads': int(inter) if inter else None,
+    }
+
+
+def claim_web_pool(path=WEB_POOL_LOCK):
+    # Exclusive lock held for the life of the web process that owns a pool, so
+    # gunicorn -w M with INFERENCE_WORKERS=N fails loudly instead of loading M x N models
+    if fcntl is None:
+        return None
+    lock = open(path, 'a')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        raise RuntimeError("another web process on this host already runs an inference pool; with several "
+                           "web workers run backend/inference_server.py once and set INFERENCE_SERVER instead")
+    return lock
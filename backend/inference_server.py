@@ -0,0 +1,238 @@
+# inference_server.py - one inference pool shared by every web worker on the host
+#
+# InferencePool lives inside the process that creates it, so each gunicorn
+# worker with INFERENCE_WORKERS=N would start its own N model copies.  Run
+# the pool once instead:
+#
+#   INFERENCE_WORKERS=4 python backend/inference_server.py               # listens on INFERENCE_SERVER
+#   INFERENCE_SERVER=/tmp/stress-inference.sock gunicorn -w 8 "app:create_app()"
+#
+# and the web processes hold no model at all: InferenceClient sends each
+# batch of 48x48 ROIs as raw float32 bytes over a local socket (no pickling
+# in either direction) and gets the softmax rows back the same way.  The
+# server answers each connection on its own thread and hands the batches to
+# the pool, whose shared-memory slots bound the work in flight.  A client
+# opens one connection per batch it keeps in flight (the pool's slot count
+# by default), so several web workers' batches reach the model workers at
+# once.
+#
+#   INFERENCE_SERVER              unix socket path, or host:port (default /tmp/stress-inference.sock
+#                                 for the server; the web app only uses a server when this is set)
+#   INFERENCE_SERVER_KEY          shared secret both sides must present (default: none)
+#   INFERENCE_SERVER_CONNECTIONS  batches a web process keeps in flight (default: the pool's slots)
+#   INFERENCE_SERVER_TIMEOUT      seconds a web process waits for the server at startup (default 300)
+# plus the pool's INFERENCE_WORKERS / INFERENCE_*_OP_THREADS and the app's
+# MODEL_PATH / INFERENCE_BACKEND / INFERENCE_MAX_BATCH.
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+import numpy as np
+
+from inference_pool import ROI_SHAPE, InferencePool, pool_config_from_env
+
+DEFAULT_ADDRESS = '/tmp/stress-inference.sock'
+OK, ERROR = b'\x00', b'\x01'
+
+
+def parse_address(address):
+    # "host:port" -> TCP, anything else is a unix socket path
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+def _authkey():
+    key = os.environ.get('INFERENCE_SERVER_KEY')
+    return key.encode() if key else None
+
+
+# ---------- server ----------
+def _serve_connection(conn, pool, hello):
+    try:
+        conn.send_bytes(json.dumps(hello).encode())
+        while True:
+            data = conn.recv_bytes()
+            try:
+                batch = np.frombuffer(data, dtype=np.float32).reshape((-1,) + ROI_SHAPE)
+                reply = OK + np.ascontiguousarray(pool.predict(batch), dtype=np.float32).tobytes()
+            except Exception as e:
+                reply = ERROR + f"{type(e).__name__}: {e}".encode()
+            conn.send_bytes(reply)
+    except (EOFError, OSError):
+        pass  # client went away
+    finally:
+        conn.close()
+
+
+def _remove_stale_socket(address):
+    if not isinstance(address, str) or not os.path.exists(address):
+        return
+    try:
+        Client(address, authkey=_authkey()).close()
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(address)
+        return
+    except (AuthenticationError, EOFError, OSError):
+        pass
+    raise RuntimeError(f"another inference server is already listening on {address}")
+
+
+def serve(pool, address, model_path):
+    _remove_stale_socket(address)
+    listener = Listener(address, authkey=_authkey())
+    hello = {'name': pool.name, 'num_classes': pool.num_classes, 'max_batch': pool.max_batch,
+             'slots': pool.slots, 'model_path': model_path}
+    print(f"✅ Inference server on {address}: {pool.name}, model {model_path}", flush=True)
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as e:
+                print(f"Inference server rejected a connection: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(conn, pool, hello),
+                             name='inference-connection', daemon=True).start()
+    finally:
+        listener.close()
+
+
+def main():
+    from model_metadata import load_metadata
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    model_path = os.environ.get('MODEL_PATH', os.path.join('backend', 'scripts', 'emotion_model.h5'))
+    if not os.path.isabs(model_path):
+        # the same resolution as app.load_models()
+        model_path = os.path.join(base_dir, model_path)
+    config = pool_config_from_env()
+    if config['workers'] <= 0:
+        sys.exit("❌ INFERENCE_WORKERS must be at least 1 for the inference server")
+    address = parse_address(os.environ.get('INFERENCE_SERVER') or DEFAULT_ADDRESS)
+
+    pool = InferencePool(model_path, os.environ.get('INFERENCE_BACKEND', 'auto'),
+                         max_batch=int(os.environ.get('INFERENCE_MAX_BATCH', 32)),
+                         num_classes=len(load_metadata(model_path)['labels']), **config)
+    # SIGTERM (systemd, docker stop) unwinds through the finally blocks below
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        serve(pool, address, model_path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)
+
+
+# ---------- client ----------
+class InferenceClient:
+    """Drop-in for InferencePool in the web process: predict() / submit() / stats() / close()."""
+
+    def __init__(self, address, connections=None, start_timeout=300):
+        self.address = parse_address(address)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns = []
+        self.batches = 0
+        self.rows = 0
+        self.reconnects = 0
+
+        # the server may still be loading its model when the web process starts
+        deadline = time.monotonic() + start_timeout
+        while True:
+            try:
+                self._conn()
+                break
+            except (ConnectionRefusedError, FileNotFoundError) as e:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"no inference server on {address} after {start_timeout}s: {e}")
+                time.sleep(1.0)
+        hello = self._hello
+        self.num_classes = hello['num_classes']
+        self.name = f"server[{hello['name']}]"
+        self.connections = int(connections or hello['slots'])
+        self._executor = ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix='inference-client')
+
+    def _conn(self):
+        # one connection per calling thread; each carries one batch at a time
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, authkey=_authkey())
+            self._hello = json.loads(conn.recv_bytes())
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def _drop_conn(self):
+        conn, self._local.conn = self._local.conn, None
+        with self._lock:
+            self._conns.remove(conn)
+        conn.close()
+
+    def _call(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32).reshape((-1,) + ROI_SHAPE)
+        for attempt in (0, 1):
+            try:
+                conn = self._conn()
+                conn.send_bytes(batch.tobytes())
+                reply = conn.recv_bytes()
+                break
+            except (EOFError, OSError):
+                # server restarted: reconnect once, predictions are safe to repeat
+                if getattr(self._local, 'conn', None) is not None:
+                    self._drop_conn()
+                if attempt:
+                    raise
+                with self._lock:
+                    self.reconnects += 1
+        if reply[:1] != OK:
+            raise RuntimeError(reply[1:].decode(errors='replace'))
+        with self._lock:
+            self.batches += 1
+            self.rows += len(batch)
+        return np.frombuffer(reply, dtype=np.float32, offset=1).reshape(len(batch), self.num_classes).copy()
+
+    def submit(self, batch):
+        return self._executor.submit(self._call, batch)
+
+    def predict(self, batch, timeout=None):
+        return self.submit(batch).result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'server': str(self.address),
+                'connections': len(self._conns),
+                'batches': self.batches,
+                'rows': self.rows,
+                'reconnects': self.reconnects,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+
+
+def client_from_env():
+    # None: no shared server configured, the web process runs the model (or its own pool)
+    address = os.environ.get('INFERENCE_SERVER')
+    if not address:
+        return None
+    connections = os.environ.get('INFERENCE_SERVER_CONNECTIONS')
+    return InferenceClient(address, connections=int(connections) if connections else None,
+                           start_timeout=float(os.environ.get('INFERENCE_SERVER_TIMEOUT', 300)))
+
+
+if __name__ == '__main__':
+    main()
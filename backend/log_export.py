@@ -0,0 +1,117 @@
+# log_export.py - streaming NDJSON/CSV export of stress_logs
+#
+# export_response() wraps a MongoDB cursor in a Flask streaming Response:
+# documents are pulled from the server batch_size at a time and written out
+# in chunks of the same size, so memory use stays flat however many logs are
+# exported.
+#
+#   EXPORT_BATCH_SIZE   documents per cursor batch / response chunk (default 1000)
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+from flask import Response
+
+from log_queries import ALLOWED_FIELDS, QueryError, parse_time
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Column order for exports; _id and timestamp always come first
+EXPORT_FIELDS = ['user_id', 'username', 'stress_level', 'smoothed_stress_level', 'detected_emotion']
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+# Spreadsheets run a CSV cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def parse_export_args(args):
+    fmt = args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        raise QueryError(f"'format' must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    fields = EXPORT_FIELDS
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in ALLOWED_FIELDS]
+        if unknown:
+            raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+        fields = [f for f in fields if f != 'timestamp']
+
+    query = {}
+    if args.get('user_id'):
+        query['user_id'] = args['user_id']
+    start, end = parse_time(args.get('from'), 'from'), parse_time(args.get('to'), 'to')
+    if start or end:
+        query['timestamp'] = {}
+        if start:
+            query['timestamp']['$gte'] = start
+        if end:
+            query['timestamp']['$lt'] = end
+    return fmt, ['_id', 'timestamp'] + fields, query
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)  # ObjectId
+
+
+def _csv_value(value):
+    value = _value(value)
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value  # a username like '=HYPERLINK(...)' stays text
+    return value
+
+
+def _ndjson_chunks(cursor, columns, batch_size):
+    lines = []
+    for doc in cursor:
+        lines.append(json.dumps({c: _value(doc.get(c)) for c in columns}))
+        if len(lines) >= batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _csv_chunks(cursor, columns, batch_size):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    rows = 0
+    for doc in cursor:
+        writer.writerow([_csv_value(doc.get(c)) for c in columns])
+        rows += 1
+        if rows >= batch_size:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            rows = 0
+    yield buf.getvalue()
+
+
+def export_response(collection, fmt, columns, query, batch_size=None, filename='stress_logs'):
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    # Oldest first; walks the (timestamp, _id) index backwards, no in-memory sort
+    cursor = (collection.find(query, {c: 1 for c in columns}, batch_size=batch_size)
+              .sort([('timestamp', 1), ('_id', 1)]))
+    chunks = _csv_chunks if fmt == 'csv' else _ndjson_chunks
+
+    def generate():
+        try:
+            yield from chunks(cursor, columns, batch_size)
+        finally:
+            cursor.close()
+
+    return Response(generate(), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}.{fmt}"'})
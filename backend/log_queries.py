@@ -0,0 +1,121 @@
+# log_queries.py - keyset pagination, time-range filters and projections for stress_logs
+#
+# Pages are ordered newest first on (timestamp, _id).  A cursor is an opaque
+# token for one log's (timestamp, _id); `before=<cursor>` returns the page of
+# older logs, `after=<cursor>` the page of newer logs, so paging never skips
+# or repeats documents even when several logs share a timestamp.
+import base64
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from db_indexes import LOG_LIST_PROJECTION
+
+MAX_PAGE_SIZE = 500
+
+# Fields a client may ask for with ?fields=; _id and timestamp always come back
+ALLOWED_FIELDS = set(LOG_LIST_PROJECTION) | {'user_id'}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def encode_cursor(log):
+    raw = f"{log['timestamp'].isoformat()}|{log['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        ts, oid = raw.split('|', 1)
+        return datetime.fromisoformat(ts), ObjectId(oid)
+    except (ValueError, InvalidId, UnicodeDecodeError):
+        raise QueryError('Invalid cursor')
+
+
+def parse_time(value, name):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise QueryError(f"'{name}' must be an ISO 8601 date/time")
+    # stored timestamps are naive UTC (datetime.utcnow())
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_fields(value):
+    if not value:
+        return dict(LOG_LIST_PROJECTION)
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in ALLOWED_FIELDS]
+    if unknown:
+        raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+    projection = {f: 1 for f in fields}
+    projection['timestamp'] = 1
+    return projection
+
+
+def parse_limit(value, default):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise QueryError("'limit' must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise QueryError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def find_log_page(collection, base_filter, args, default_limit):
+    """Run one page query; `args` are the request's query parameters."""
+    before, after = args.get('before'), args.get('after')
+    if before and after:
+        raise QueryError("Use either 'before' or 'after', not both")
+    limit = parse_limit(args.get('limit'), default_limit)
+    projection = parse_fields(args.get('fields'))
+
+    clauses = [dict(base_filter)] if base_filter else []
+    # Legacy or partial logs without a timestamp have no place in the
+    # (timestamp, _id) order and could not be encoded as a cursor
+    time_range = {'$type': 'date'}
+    start, end = parse_time(args.get('from'), 'from'), parse_time(args.get('to'), 'to')
+    if start:
+        time_range['$gte'] = start
+    if end:
+        time_range['$lt'] = end
+    clauses.append({'timestamp': time_range})
+
+    newer_first = True
+    if before or after:
+        ts, oid = decode_cursor(before or after)
+        op = '$lt' if before else '$gt'
+        clauses.append({'$or': [{'timestamp': {op: ts}}, {'timestamp': ts, '_id': {op: oid}}]})
+        newer_first = bool(before)
+
+    query = {'$and': clauses} if len(clauses) > 1 else (clauses[0] if clauses else {})
+    direction = -1 if newer_first else 1
+    logs = list(collection.find(query, projection)
+                .sort([('timestamp', direction), ('_id', direction)])
+                .limit(limit + 1))
+
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    if not newer_first:
+        logs.reverse()
+
+    # next = older logs, prev = newer logs; a page reached through a cursor
+    # always has something on the side it came from
+    has_older = has_more if newer_first else True
+    has_newer = bool(before) or (bool(after) and has_more)
+    return {
+        'logs': logs,
+        'next_cursor': encode_cursor(logs[-1]) if logs and has_older else None,
+        'prev_cursor': encode_cursor(logs[0]) if logs and has_newer else None,
+    }
@@ -0,0 +1,191 @@
+# log_writer.py - write-behind buffering of stress_logs inserts
+#
+# Requests hand their log document to BufferedLogWriter.write(), which only
+# enqueues it.  A background thread drains the queue with
+# insert_many(ordered=False) whenever flush_size documents are waiting or the
+# oldest one has waited flush_interval_ms.  When the queue is full the
+# configured policy decides what happens:
+#   drop-newest   the new document is dropped (default, never blocks a request)
+#   drop-oldest   the oldest queued document is dropped to make room
+#   block         the request waits up to block_timeout_ms, then drops
+# close() (registered with atexit by the app) flushes everything still queued.
+# on_written(docs), when given, runs on the writer thread after each flush
+# with the documents that were actually stored (the app updates rollups).
+#
+# A flush that fails without per-document write errors (connection reset,
+# failover, server selection timeout) is retried with backoff; meanwhile new
+# documents queue up under the policy above.  Documents are only counted as
+# failed once the retries are used up or MongoDB rejected them individually.
+# A retry may repeat documents an earlier attempt stored before its reply was
+# lost: their duplicate _id errors count as stored.
+#
+#   LOG_WRITE_BEHIND          1 (default) / 0 for a synchronous insert_one per request
+#   LOG_QUEUE_SIZE            max queued documents (default 10000)
+#   LOG_FLUSH_SIZE            documents per insert_many (default 200)
+#   LOG_FLUSH_INTERVAL_MS     max time a document waits before a flush (default 200)
+#   LOG_QUEUE_FULL_POLICY     drop-newest | drop-oldest | block (default drop-newest)
+#   LOG_FLUSH_RETRIES         retries of a failed flush before its documents are lost (default 5)
+import os
+import queue
+import threading
+import time
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+POLICIES = ('drop-newest', 'drop-oldest', 'block')
+DUPLICATE_KEY = 11000
+MAX_RETRY_DELAY_S = 5.0
+
+
+class BufferedLogWriter:
+    def __init__(self, collection, max_queue=10000, flush_size=200, flush_interval_ms=200,
+                 policy='drop-newest', block_timeout_ms=50, name='stress-log-writer', on_written=None,
+                 max_retries=5, retry_delay_ms=100):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue-full policy '{policy}', expected one of: {', '.join(POLICIES)}")
+        self.collection = collection
+        self.on_written = on_written
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = max(0.0, float(flush_interval_ms)) / 1000.0
+        self.policy = policy
+        self.block_timeout = max(0.0, float(block_timeout_ms)) / 1000.0
+        self.max_retries = max(0, int(max_retries))
+        self.retry_delay = max(0.0, float(retry_delay_ms)) / 1000.0
+
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _count(self, field, n=1):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    # ---------- request side ----------
+    def write(self, doc):
+        # Returns False when the document was dropped
+        if self._closed:
+            self._count('dropped')
+            return False
+        try:
+            if self.policy == 'block':
+                self._queue.put(doc, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(doc)
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == 'drop-oldest':
+            try:
+                self._queue.get_nowait()
+                self._count('dropped')
+                self._queue.put_nowait(doc)
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+        self._count('dropped')
+        return False
+
+    def close(self, timeout=10.0):
+        if self._closed:
+            return
+        self._closed = True
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'retries': self.retries,
+                'batches': self.batches,
+            }
+
+    # ---------- worker side ----------
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        stored, lost = [], []
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.collection.insert_many(batch, ordered=False)
+                stored = batch
+                break
+            except BulkWriteError as e:
+                # with ordered=False everything without a write error was inserted
+                rejected = {err.get('index') for err in (e.details or {}).get('writeErrors', [])
+                            if err.get('code') != DUPLICATE_KEY}
+                stored = [doc for i, doc in enumerate(batch) if i not in rejected]
+                lost = [doc for i, doc in enumerate(batch) if i in rejected]
+                if lost:
+                    print(f"Stress log flush error ({len(lost)}/{len(batch)} documents rejected): {e}")
+                break
+            except PyMongoError as e:
+                # nothing is known about the batch; insert_many set each _id, so a retry cannot store twice
+                if attempt == self.max_retries:
+                    lost = batch
+                    print(f"Stress log flush error ({len(batch)} documents lost after "
+                          f"{self.max_retries} retries): {e}")
+                    break
+                self._count('retries')
+                print(f"Stress log flush error, retrying in {delay:g}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY_S)
+            except Exception as e:
+                lost = batch
+                print(f"Stress log flush error ({len(batch)} documents lost): {e}")
+                break
+        self._count('written', len(stored))
+        self._count('failed', len(lost))
+        self._count('batches')
+        if self.on_written is not None and stored:
+            try:
+                self.on_written(stored)
+            except Exception as e:
+                print(f"Stress log post-write hook error: {e}")
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._closed:
+                break
+
+
+def writer_from_env(collection, on_written=None):
+    if os.environ.get('LOG_WRITE_BEHIND', '1').lower() not in ('1', 'true', 'yes'):
+        return None
+    return BufferedLogWriter(
+        collection,
+        max_queue=int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+        flush_size=int(os.environ.get('LOG_FLUSH_SIZE', 200)),
+        flush_interval_ms=float(os.environ.get('LOG_FLUSH_INTERVAL_MS', 200)),
+        policy=os.environ.get('LOG_QUEUE_FULL_POLICY', 'drop-newest'),
+        on_written=on_written,
+        max_retries=int(os.environ.get('LOG_FLUSH_RETRIES', 5)),
+    )
@@ -0,0 +1,111 @@
+# login_limiter.py - lock out repeated failed logins before their password is hashed
+#
+# Failed attempts are counted per (username, client address) pair and per
+# client address over a sliding window.  Once a count reaches its limit,
+# further attempts are refused with the number of seconds until the oldest
+# failure leaves the window, without touching the database or the password
+# hasher.  A successful login clears that username's failures from that
+# address.  Counts are kept in memory, so each server process limits on its
+# own.
+#
+# The username limit is per address so that nobody can lock a user out by
+# failing logins under their name from somewhere else; guessing one
+# password from many addresses is slowed by each address's own limit.  The
+# address limit counts failures for every username, which stops one client
+# from trying a common password against many accounts.  Many users can
+# share an address (office NAT), so its default is well above the
+# per-username one.
+#
+#   LOGIN_MAX_FAILURES        failed attempts per username and address within the window (default 5; 0 disables)
+#   LOGIN_MAX_FAILURES_PER_IP failed attempts per client address within the window (default 100; 0 disables)
+#   LOGIN_FAILURE_WINDOW_S    sliding window length in seconds (default 300)
+import math
+import os
+import threading
+import time
+from collections import deque
+
+MAX_TRACKED_KEYS = 100000
+
+
+class FailedLoginLimiter:
+    def __init__(self, max_failures=5, max_failures_per_ip=100, window_s=300.0):
+        self.max_failures = int(max_failures)
+        self.max_failures_per_ip = int(max_failures_per_ip)
+        self.window = float(window_s)
+        self._failures = {}  # ('user', name, address) / ('ip', address) -> deque of monotonic failure times
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def _limits(self, username, address):
+        # only the limits that are enabled
+        limits = ((('user', username, address), self.max_failures), (('ip', address), self.max_failures_per_ip))
+        return [(key, limit) for key, limit in limits if limit > 0]
+
+    @property
+    def enabled(self):
+        return self.max_failures > 0 or self.max_failures_per_ip > 0
+
+    def _recent(self, key, now):
+        # caller holds self._lock
+        times = self._failures.get(key)
+        if times is None:
+            return None
+        while times and now - times[0] >= self.window:
+            times.popleft()
+        if not times:
+            del self._failures[key]
+            return None
+        return times
+
+    def retry_after(self, username, address):
+        """Seconds until username/address may try again; 0 if allowed now."""
+        if not self.enabled:
+            return 0
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            for key, limit in self._limits(username, address):
+                times = self._recent(key, now)
+                if times is not None and len(times) >= limit:
+                    wait = max(wait, self.window - (now - times[len(times) - limit]))
+            if wait:
+                self.limited += 1
+        return math.ceil(wait)
+
+    def failed(self, username, address):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._failures) >= MAX_TRACKED_KEYS:
+                self._prune(now)
+            for key, limit in self._limits(username, address):
+                times = self._recent(key, now)
+                if times is None:
+                    times = self._failures[key] = deque()
+                times.append(now)
+                while len(times) > limit:
+                    times.popleft()
+
+    def succeeded(self, username, address):
+        # the address count stays: logging into one account must not reset a spray
+        with self._lock:
+            self._failures.pop(('user', username, address), None)
+
+    def _prune(self, now):
+        # caller holds self._lock; drops every key without failures in the window
+        for key in list(self._failures):
+            self._recent(key, now)
+
+    def stats(self):
+        with self._lock:
+            return {'tracked_keys': len(self._failures), 'limited': self.limited}
+
+
+def limiter_from_env():
+    return FailedLoginLimiter(
+        max_failures=int(os.environ.get('LOGIN_MAX_FAILURES', 5)),
+        max_failures_per_ip=int(os.environ.get('LOGIN_MAX_FAILURES_PER_IP', 100)),
+        window_s=float(os.environ.get('LOGIN_FAILURE_WINDOW_S', 300)),
+    )
@@ -0,0 +1,226 @@
+# metrics.py - in-process counters/histograms rendered in the Prometheus text format
+#
+# Instrumented code wraps each pipeline step in `with stage('name'):`, which
+# observes the step's duration in the stress_stage_seconds histogram and,
+# when the current request opted into profiling (start_profile()), also
+# records it in that request's breakdown (returned as a Server-Timing header
+# by app.py).  Everything is plain Python with one lock per metric, so an
+# observation costs a few microseconds.
+#
+#   GET /metrics renders every registered metric (render()); see app.py for
+#   METRICS_TOKEN and the X-Profile request header.
+import bisect
+import contextvars
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# seconds; covers sub-millisecond cache hits up to multi-second cold calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, '') for n in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_label_str(self.labelnames, key)} {_number(v)}' for key, v in items]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+        _register(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][idx] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f'{self.name}_bucket{_label_str(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_label_str(self.labelnames, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_label_str(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Gauge:
+    # Value read from a callback at scrape time (queue depths, cache sizes, ...)
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, fn):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        _register(self)
+
+    def samples(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        return [] if value is None else [f'{self.name} {_number(value)}']
+
+
+def render():
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for m in metrics:
+        lines.append(f'# HELP {m.name} {m.help}')
+        lines.append(f'# TYPE {m.name} {m.kind}')
+        lines.extend(m.samples())
+    return '\n'.join(lines) + '\n'
+
+
+# ---------- pipeline stages and per-request profiles ----------
+STAGE_SECONDS = Histogram('stress_stage_seconds', 'Time spent in each stress detection pipeline stage',
+                          ['stage'])
+
+_profile = contextvars.ContextVar('stress_profile', default=None)
+
+
+def start_profile():
+    _profile.set([])
+
+
+def end_profile():
+    timings = _profile.get()
+    _profile.set(None)
+    return timings
+
+
+@contextmanager
+def stage(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _profile.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing(timings):
+    # Server-Timing header value; repeated stages (one per face) are summed
+    totals = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ', '.join(f'{name};dur={elapsed * 1000:.3f}' for name, elapsed in totals.items())
+
+
+# ---------- model calls ----------
+MODEL_BATCH_SIZE = Histogram('stress_model_batch_size', 'ROIs per model call made by the micro-batcher',
+                             buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+MODEL_CALL_SECONDS = Histogram('stress_model_call_seconds', 'Model call latency per batch')
+
+
+def instrument_model_call(predict_fn):
+    # Wraps the batcher's predict_fn; handles both arrays and Futures (InferencePool.submit)
+    def call(batch):
+        MODEL_BATCH_SIZE.observe(len(batch))
+        t0 = time.perf_counter()
+        result = predict_fn(batch)
+        if isinstance(result, Future):
+            result.add_done_callback(lambda _: MODEL_CALL_SECONDS.observe(time.perf_counter() - t0))
+        else:
+            MODEL_CALL_SECONDS.observe(time.perf_counter() - t0)
+        return result
+    return call
+
+
+# ---------- MongoDB ----------
+MONGO_SECONDS = Histogram('mongo_command_seconds', 'MongoDB command latency as seen by the driver',
+                          ['command', 'outcome'])
+
+
+def mongo_command_listener():
+    # pymongo command monitoring: covers every collection call, including the
+    # write-behind and rollup threads, without wrapping each call site
+    from pymongo import monitoring
+
+    class _Listener(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            MONGO_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name, outcome='ok')
+
+        def failed(self, event):
+            MONGO_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name, outcome='error')
+
+    return _Listener()
@@ -0,0 +1,67 @@
+# model_loader.py - load the face detector and emotion model off the request path
+#
+# create_app() hands the (slow) loading function to a BackgroundLoader so the
+# web server starts answering auth/admin requests immediately; routes that
+# need the model check loader.ready and answer 503 until then.  The loading
+# function is expected to finish with a warmup predict so the first real
+# request does not pay for graph building/interpreter allocation.
+#
+#   MODEL_LOAD_IN_BACKGROUND   1 (default) / 0 to load before create_app() returns
+import os
+import threading
+import time
+import traceback
+
+LOADING, READY, FAILED = 'loading', 'ready', 'failed'
+
+
+class BackgroundLoader:
+    def __init__(self, load_fn, name='model-loader'):
+        self.load_fn = load_fn
+        self.name = name
+        self.state = LOADING
+        self.error = None
+        self.started_at = None
+        self.load_seconds = None
+        self._done = threading.Event()
+
+    @property
+    def ready(self):
+        return self.state == READY
+
+    def _run(self):
+        self.started_at = time.time()
+        t0 = time.perf_counter()
+        try:
+            self.load_fn()
+            self.state = READY
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = FAILED
+            print(f"Error loading models: {self.error}")
+            traceback.print_exc()
+        finally:
+            self.load_seconds = time.perf_counter() - t0
+            self._done.set()
+
+    def start(self, background=True):
+        if background:
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+        else:
+            self._run()
+        return self
+
+    def wait(self, timeout=None):
+        # True once loading finished, successfully or not
+        return self._done.wait(timeout)
+
+    def status(self):
+        return {
+            'state': self.state,
+            'error': self.error,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+        }
+
+
+def load_in_background_from_env():
+    return os.environ.get('MODEL_LOAD_IN_BACKGROUND', '1').lower() in ('1', 'true', 'yes')
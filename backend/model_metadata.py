@@ -0,0 +1,59 @@
+# model_metadata.py - label order, input shape and normalization stored next to a model
+#
+# scripts/train.py writes <model stem>.meta.json beside the model it saves
+# (emotion_model.h5 -> emotion_model.meta.json); the .tflite files converted
+# from it, including the _fp16 / _int8 variants of quantize_model.py, use the
+# same file.  The app and the benchmark scripts read the
+# output order of the model from it instead of assuming one:
+#
+#   {"labels": ["Angry", "Disgust", ...], "input_shape": [48, 48, 1],
+#    "normalization": {"scale": 0.00392156862745098, "offset": 0.0}, ...}
+#
+# Models without a metadata file were trained by the old fer.py /
+# train_model.py scripts, whose directory loaders number the classes in
+# sorted folder order; DEFAULT_METADATA describes those.
+import json
+import os
+
+DEFAULT_LABELS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Neutral', 'Sad', 'Surprise']
+DEFAULT_METADATA = {
+    'labels': DEFAULT_LABELS,
+    'input_shape': [48, 48, 1],
+    'normalization': {'scale': 1.0 / 255.0, 'offset': 0.0},
+}
+
+# quantize_model.py variants share the metadata of the model they came from
+_VARIANT_SUFFIXES = ('_fp16', '_int8')
+
+
+def metadata_path(model_path):
+    return os.path.splitext(model_path)[0] + '.meta.json'
+
+
+def write_metadata(model_path, labels, input_shape, normalization, **extra):
+    meta = {
+        'labels': list(labels),
+        'input_shape': list(input_shape),
+        'normalization': dict(normalization),
+        **extra,
+    }
+    with open(metadata_path(model_path), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def load_metadata(model_path):
+    """Metadata for model_path; DEFAULT_METADATA (with 'source': None) when there is none."""
+    candidates = [metadata_path(model_path)]
+    stem = os.path.splitext(model_path)[0]
+    for suffix in _VARIANT_SUFFIXES:
+        if stem.endswith(suffix):
+            candidates.append(stem[:-len(suffix)] + '.meta.json')
+    for path in candidates:
+        if os.path.exists(path):
+            with open(path) as f:
+                meta = json.load(f)
+            if not meta.get('labels'):
+                raise ValueError(f"{path} has no 'labels'")
+            return {**DEFAULT_METADATA, **meta, 'source': path}
+    return {**DEFAULT_METADATA, 'source': None}
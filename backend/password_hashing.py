@@ -0,0 +1,126 @@
+# password_hashing.py - configurable password hashing on a bounded pool of threads
+#
+# Password hashes are deliberately slow.  Hashing runs on a small pool of
+# threads instead of the request thread that needs it.  hashlib's scrypt and
+# pbkdf2 release the GIL, so the pool caps how many cores a burst of logins
+# can take from detection requests.  A request waits for its hash.  When more
+# than PASSWORD_HASH_QUEUE hashes are already waiting, HashingBusyError is
+# raised so the route can answer 503 instead of queueing without bound.
+#
+# Hashes record the method and parameters they were made with
+# ("scrypt:32768:8:1$salt$hash").  After a successful login with a hash of
+# an older policy, the password is rehashed in the background and handed to
+# a callback that stores it.
+#
+#   PASSWORD_HASH_METHOD     scrypt (default) | pbkdf2
+#   PASSWORD_HASH_COST       scrypt: log2 of N (default 15, Werkzeug's default N=32768);
+#                            pbkdf2: sha256 iterations (default 600000)
+#   PASSWORD_HASH_WORKERS    threads hashing at once (default half the cores, at least 1;
+#                            0 hashes on the request thread)
+#   PASSWORD_HASH_QUEUE      hashes allowed to wait for a thread before HashingBusyError (default 32)
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from metrics import stage
+
+METHODS = ('scrypt', 'pbkdf2')
+DEFAULT_COST = {'scrypt': 15, 'pbkdf2': 600000}
+
+
+class HashingBusyError(RuntimeError):
+    pass
+
+
+def method_string(method, cost):
+    # Werkzeug method string; generated hashes start with exactly this
+    if method == 'scrypt':
+        return f'scrypt:{2 ** int(cost)}:8:1'
+    if method == 'pbkdf2':
+        return f'pbkdf2:sha256:{int(cost)}'
+    raise ValueError(f"Unknown PASSWORD_HASH_METHOD '{method}', expected one of: {', '.join(METHODS)}")
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt', cost=None, workers=1, max_queue=32):
+        self.method = method_string(method, DEFAULT_COST.get(method) if cost is None else cost)
+        self.max_queue = int(max_queue)
+        self._executor = (ThreadPoolExecutor(max_workers=int(workers), thread_name_prefix='password-hash')
+                          if workers > 0 else None)
+        self.workers = int(workers)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            with stage('password_hash'):
+                return fn(*args)
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HashingBusyError("Too many password checks in progress, retry shortly")
+            self._in_flight += 1
+        try:
+            with stage('password_hash'):
+                return self._executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split('$', 1)[0] != self.method
+
+    def rehash_in_background(self, password, store_fn):
+        # store_fn(new_hash) runs on the hashing thread; skipped when the pool is busy
+        # (the next login tries again)
+        if self._executor is None:
+            store_fn(generate_password_hash(password, self.method))
+            return
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                return
+            self._in_flight += 1
+
+        def rehash():
+            try:
+                store_fn(generate_password_hash(password, self.method))
+                with self._lock:
+                    self.rehashed += 1
+            except Exception as e:
+                print(f"Password rehash error: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+        self._executor.submit(rehash)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'in_flight': self._in_flight,
+                'rejected': self.rejected,
+                'rehashed': self.rehashed,
+            }
+
+
+def hasher_from_env():
+    method = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt').lower()
+    cost = os.environ.get('PASSWORD_HASH_COST')
+    return PasswordHasher(
+        method,
+        cost=int(cost) if cost else None,
+        workers=int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2))),
+        max_queue=int(os.environ.get('PASSWORD_HASH_QUEUE', 32)),
+    )
@@ -0,0 +1,104 @@
+# prediction_cache.py - softmax cache keyed by a perceptual hash of the face ROI
+#
+# "Analyze Again" on a still user sends near-identical faces.  Before a ROI
+# goes to the model, its 64-bit DCT perceptual hash (pHash) is looked up in
+# an LRU cache with a TTL; small changes in noise, brightness or crop leave
+# the hash unchanged, so the cached softmax is returned instead of running
+# the model.  Entries expire after ttl_s so a changing expression is
+# re-evaluated, and the least recently used entry is evicted beyond
+# max_entries.
+#
+#   PREDICTION_CACHE_SIZE     max cached ROIs (default 1024; 0 disables the cache)
+#   PREDICTION_CACHE_TTL_S    seconds an entry stays valid (default 30)
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+HASH_BITS = 8  # 8x8 low-frequency DCT coefficients, minus DC -> 63-bit hash
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    m = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m.astype(np.float32)
+
+
+_DCT = {}
+
+
+def phash(roi):
+    # roi: (H, W) or (H, W, 1) grayscale, any scale; only structure matters
+    img = np.asarray(roi, dtype=np.float32).reshape(roi.shape[0], roi.shape[1])
+    h, w = img.shape
+    if h not in _DCT:
+        _DCT[h] = _dct_matrix(h)
+    if w not in _DCT:
+        _DCT[w] = _dct_matrix(w)
+    coeffs = (_DCT[h] @ img @ _DCT[w].T)[:HASH_BITS, :HASH_BITS].ravel()
+    # the DC term only encodes overall brightness; compare the rest to their median
+    bits = coeffs[1:] > np.median(coeffs[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class PredictionCache:
+    def __init__(self, max_entries=1024, ttl_s=30.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_s)
+        self._entries = OrderedDict()  # hash -> (stored_at, softmax)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, preds):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), np.array(preds, copy=True))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+def cache_from_env():
+    size = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+    if size <= 0:
+        return None
+    return PredictionCache(size, float(os.environ.get('PREDICTION_CACHE_TTL_S', 30)))
@@ -0,0 +1,192 @@
+# rollups.py - hourly/daily stress aggregates maintained as logs are written
+#
+# Every stored stress log is folded into four rollup documents in the
+# stress_rollups collection: its user's hour and day buckets and the global
+# (user_id GLOBAL_USER_ID) hour and day buckets.  A rollup holds count, sum,
+# min, max and an emotion histogram, so a range query reads a handful of
+# small documents instead of scanning stress_logs:
+#
+#   {granularity: 'hour' | 'day', user_id: str, start: datetime (UTC),
+#    count, sum, min, max, emotions: {'Sad': 3, ...}}
+#
+# The global buckets use a sentinel rather than null because $merge refuses
+# documents whose 'on' fields are null or missing.
+#
+# apply_rollups() turns a batch of logs into one upsert per touched bucket
+# ($inc/$min/$max are commutative, so concurrent writers never lose updates).
+# backfill_rollups() rebuilds buckets from stress_logs with an aggregation
+# pipeline ($dateTrunc needs MongoDB 5.0+).
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+GRANULARITIES = ('hour', 'day')
+UNKNOWN_EMOTION = 'Unknown'
+GLOBAL_USER_ID = '*'
+
+
+def bucket_start(ts, granularity):
+    if granularity == 'hour':
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity '{granularity}', expected one of: {', '.join(GRANULARITIES)}")
+
+
+def bucket_step(granularity):
+    return timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+
+
+def _emotion_key(emotion):
+    # histogram keys become field names: keep them free of '.' and '$'
+    return str(emotion or UNKNOWN_EMOTION).replace('.', '_').replace('$', '_')
+
+
+def _emotion_key_expr():
+    # _emotion_key() as an aggregation expression ($replaceAll needs MongoDB 4.4+)
+    key = {'$toString': '$$emotion'}
+    for char in ('.', '$'):
+        key = {'$replaceAll': {'input': key, 'find': {'$literal': char}, 'replacement': '_'}}
+    return {'$let': {
+        'vars': {'emotion': {'$ifNull': ['$detected_emotion', '']}},
+        'in': {'$cond': [{'$in': ['$$emotion', ['', False, 0]]}, UNKNOWN_EMOTION, key]},
+    }}
+
+
+def rollup_updates(logs):
+    buckets = {}
+    for log in logs:
+        level, ts = log.get('stress_level'), log.get('timestamp')
+        if level is None or ts is None:
+            continue
+        emotion = _emotion_key(log.get('detected_emotion'))
+        # logs without a user only count towards the global buckets
+        user_ids = (log['user_id'], GLOBAL_USER_ID) if log.get('user_id') is not None else (GLOBAL_USER_ID,)
+        for user_id in user_ids:
+            for granularity in GRANULARITIES:
+                key = (granularity, user_id, bucket_start(ts, granularity))
+                b = buckets.get(key)
+                if b is None:
+                    b = buckets[key] = {'count': 0, 'sum': 0, 'min': level, 'max': level, 'emotions': {}}
+                b['count'] += 1
+                b['sum'] += level
+                b['min'] = min(b['min'], level)
+                b['max'] = max(b['max'], level)
+                b['emotions'][emotion] = b['emotions'].get(emotion, 0) + 1
+
+    updates = []
+    for (granularity, user_id, start), b in buckets.items():
+        inc = {'count': b['count'], 'sum': b['sum']}
+        inc.update({f'emotions.{e}': n for e, n in b['emotions'].items()})
+        updates.append(UpdateOne(
+            {'granularity': granularity, 'user_id': user_id, 'start': start},
+            {'$inc': inc, '$min': {'min': b['min']}, '$max': {'max': b['max']}},
+            upsert=True,
+        ))
+    return updates
+
+
+def apply_rollups(collection, logs):
+    updates = rollup_updates(logs)
+    if updates:
+        collection.bulk_write(updates, ordered=False)
+    return len(updates)
+
+
+def _merge_histograms(rollups):
+    emotions = {}
+    for r in rollups:
+        for e, n in (r.get('emotions') or {}).items():
+            emotions[e] = emotions.get(e, 0) + n
+    return emotions
+
+
+def summarize(rollups):
+    count = sum(r['count'] for r in rollups)
+    total = sum(r['sum'] for r in rollups)
+    return {
+        'count': count,
+        'mean': round(total / count, 2) if count else None,
+        'min': min((r['min'] for r in rollups), default=None),
+        'max': max((r['max'] for r in rollups), default=None),
+        'emotions': _merge_histograms(rollups),
+    }
+
+
+def query_rollups(collection, user_id, granularity, start, end):
+    # Buckets whose start lies in [bucket_start(start), end); user_id GLOBAL_USER_ID for everyone's
+    cursor = collection.find(
+        {'granularity': granularity, 'user_id': user_id,
+         'start': {'$gte': bucket_start(start, granularity), '$lt': end}},
+        {'_id': 0, 'start': 1, 'count': 1, 'sum': 1, 'min': 1, 'max': 1, 'emotions': 1},
+    ).sort('start', 1)
+    rollups = list(cursor)
+    buckets = [{
+        'start': r['start'].isoformat(),
+        'count': r['count'],
+        'mean': round(r['sum'] / r['count'], 2) if r['count'] else None,
+        'min': r['min'],
+        'max': r['max'],
+        'emotions': r.get('emotions') or {},
+    } for r in rollups]
+    return buckets, summarize(rollups)
+
+
+def raw_stats_pipeline(match, granularity, per_user=False):
+    # The rollup numbers computed straight from stress_logs: the backfill
+    # merges its output into stress_rollups, the benchmark times it as the
+    # raw-scan baseline
+    match = {**match, 'stress_level': {'$ne': None}, 'timestamp': match.get('timestamp', {'$ne': None})}
+    if per_user:
+        match.setdefault('user_id', {'$ne': None})
+    return [
+        {'$match': match},
+        {'$group': {
+            '_id': {'user_id': '$user_id' if per_user else GLOBAL_USER_ID,
+                    'start': {'$dateTrunc': {'date': '$timestamp', 'unit': granularity}},
+                    'emotion': _emotion_key_expr()},
+            'count': {'$sum': 1},
+            'sum': {'$sum': '$stress_level'},
+            'min': {'$min': '$stress_level'},
+            'max': {'$max': '$stress_level'},
+        }},
+        {'$group': {
+            '_id': {'user_id': '$_id.user_id', 'start': '$_id.start'},
+            'count': {'$sum': '$count'},
+            'sum': {'$sum': '$sum'},
+            'min': {'$min': '$min'},
+            'max': {'$max': '$max'},
+            'emotions': {'$push': {'k': '$_id.emotion', 'v': '$count'}},
+        }},
+        {'$project': {'_id': 0, 'granularity': {'$literal': granularity},
+                      'user_id': '$_id.user_id', 'start': '$_id.start',
+                      'count': 1, 'sum': 1, 'min': 1, 'max': 1,
+                      'emotions': {'$arrayToObject': '$emotions'}}},
+    ]
+
+
+def backfill_rollups(logs_collection, rollups_collection, start=None, end=None):
+    # Whole buckets are recomputed and replaced, so `start`/`end` are widened
+    # to day boundaries; logs written while this runs may be counted once by
+    # the pipeline and again by apply_rollups() in the newest bucket.
+    match = {}
+    if start or end:
+        match['timestamp'] = {}
+        if start:
+            match['timestamp']['$gte'] = bucket_start(start, 'day')
+        if end:
+            match['timestamp']['$lt'] = bucket_start(end, 'day') + bucket_step('day')
+    for granularity in GRANULARITIES:
+        for per_user in (True, False):
+            pipeline = raw_stats_pipeline(match, granularity, per_user)
+            # needs the unique (granularity, user_id, start) index from db_indexes
+            pipeline.append({'$merge': {'into': rollups_collection.name, 'on': ['granularity', 'user_id', 'start'],
+                                        'whenMatched': 'replace', 'whenNotMatched': 'insert'}})
+            logs_collection.aggregate(pipeline, allowDiskUse=True)
+    return rollups_collection.estimated_document_count()
+
+
+def default_range(granularity, now=None):
+    now = now or datetime.utcnow()
+    span = timedelta(days=2) if granularity == 'hour' else timedelta(days=30)
+    return now - span, now
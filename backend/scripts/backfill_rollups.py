@@ -0,0 +1,45 @@
+# backfill_rollups.py - (re)build stress_rollups from the existing stress_logs
+#
+#   python backend/scripts/backfill_rollups.py                         # whole history, app database
+#   python backend/scripts/backfill_rollups.py --from 2025-01-01 --to 2025-02-01
+#
+# Uses MONGO_URI / DB_NAME like the app.  Runs one aggregation pipeline per
+# granularity and scope (per user, global) on the server and $merges the
+# buckets into stress_rollups, replacing buckets that already exist, so it is
+# safe to re-run.  New logs keep updating rollups incrementally afterwards.
+# Needs MongoDB 5.0+ ($dateTrunc).
+import argparse
+import os
+import time
+
+from pymongo import MongoClient
+
+import bench_common  # noqa: F401  (puts backend/ on sys.path)
+from db_indexes import ensure_indexes
+from log_queries import parse_time
+from rollups import backfill_rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build stress rollups from existing stress logs')
+    parser.add_argument('--db', default=os.environ.get('DB_NAME', 'stress_detection_db'))
+    parser.add_argument('--from', dest='start', help='first day to rebuild (ISO date)')
+    parser.add_argument('--to', dest='end', help='last day to rebuild (ISO date)')
+    parser.add_argument('--drop', action='store_true', help='delete all rollups first')
+    args = parser.parse_args()
+
+    client = MongoClient(os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[args.db]
+    if args.drop:
+        db['stress_rollups'].drop()
+    # $merge on (granularity, user_id, start) requires its unique index
+    ensure_indexes(db)
+
+    t0 = time.perf_counter()
+    total = backfill_rollups(db['stress_logs'], db['stress_rollups'],
+                             parse_time(args.start, 'from'), parse_time(args.end, 'to'))
+    print(f"✅ Rollups rebuilt in {time.perf_counter() - t0:.1f}s ({total} rollup documents in {args.db})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+# batch_score.py - score a directory tree of images or recordings offline with the app's pipeline
+#
+#   python backend/scripts/batch_score.py backend/scripts/fer_data/test --out-dir scores/
+#   python backend/scripts/batch_score.py /archive/recordings --video-fps 2 --all-faces
+#   python backend/scripts/batch_score.py fer_data/test --model new_model.h5 --min-accuracy 0.55
+#
+# Every image under the given directories (and --video-fps frames per
+# second of every video) goes through what /api/detect-stress does: the same
+# grayscale decode (frame_decoding.decode_image_gray), face detector
+# (FACE_* env vars), crop and preprocess_face(), and the model with the
+# labels of its metadata file.  Decoding, detection and preprocessing run on
+# a pool of --workers threads (OpenCV releases the GIL, so they occupy every
+# core) while the main thread runs the model on batches of --batch-size
+# faces; results are written in file order.
+#
+# Images no larger than --crop-max-side pixels (fer_data's 48x48 crops)
+# are already faces and are scored whole; set it to 0 to run the detector on
+# everything.  A file's label is its folder name when that matches one of
+# the model's labels (fer_data/<split>/<class>/), so labelled trees are
+# evaluated and unlabelled archives are just scored.
+#
+# --out-dir receives:
+#   predictions.csv       one row per scored face (or per image without a face): path,
+#                         frame, label, prediction, confidence, stress_level, box, softmax
+#   confusion_matrix.csv  rows = folder label, columns = prediction
+#   summary.json          counts, accuracy, per-class accuracy, confusion matrix and throughput
+# Exits with status 1 if --min-accuracy is given and not reached.
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import bench_common  # noqa: F401  (puts backend/ on sys.path)
+import app
+from face_detection import create_face_detector
+from frame_decoding import decode_image_gray
+from inference_backends import load_backend, set_thread_counts
+from model_metadata import load_metadata
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+
+def find_files(roots):
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.lower().endswith(IMAGE_EXTENSIONS + VIDEO_EXTENSIONS):
+                    yield os.path.join(dirpath, name)
+
+
+def folder_label(path, labels_by_folder):
+    return labels_by_folder.get(os.path.basename(os.path.dirname(path)).lower(), '')
+
+
+class FaceExtractor:
+    # Runs on the worker threads: file -> records with the preprocessed face of each scored face
+    def __init__(self, detector, labels_by_folder, crop_max_side, all_faces, video_fps):
+        self.detector = detector
+        self.labels_by_folder = labels_by_folder
+        self.crop_max_side = crop_max_side
+        self.all_faces = all_faces
+        self.video_fps = video_fps
+
+    def __call__(self, path):
+        started = time.perf_counter()
+        label = folder_label(path, self.labels_by_folder)
+        if path.lower().endswith(VIDEO_EXTENSIONS):
+            records = [record for frame_index, gray in self._video_frames(path)
+                       for record in self._faces(path, frame_index, label, gray)]
+            if not records:
+                records = self._faces(path, None, label, None)  # no frame could be decoded
+        else:
+            with open(path, 'rb') as f:
+                gray = decode_image_gray(f.read())
+            records = self._faces(path, None, label, gray)
+        return records, time.perf_counter() - started
+
+    def _video_frames(self, path):
+        import cv2
+
+        capture = cv2.VideoCapture(path)
+        step = max(1, int(round((capture.get(cv2.CAP_PROP_FPS) or 25.0) / self.video_fps)))
+        index = 0
+        try:
+            while capture.grab():
+                if index % step == 0:
+                    ok, frame = capture.retrieve()
+                    if ok:
+                        yield index, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                index += 1
+        finally:
+            capture.release()
+
+    def _faces(self, path, frame_index, label, gray):
+        record = {'path': path, 'frame': frame_index, 'label': label, 'faces': 0, 'box': None, 'roi': None}
+        if gray is None:
+            return [dict(record, error='unreadable')]
+        h, w = gray.shape[:2]
+        if self.crop_max_side and max(h, w) <= self.crop_max_side:
+            boxes = [(0, 0, w, h)]
+        else:
+            boxes = sorted(self.detector.detect(gray), key=lambda b: b[2] * b[3], reverse=True)
+        if len(boxes) == 0:
+            return [record]
+        if not self.all_faces:
+            boxes = boxes[:1]  # the largest face, as in single-face mode
+        return [dict(record, faces=len(boxes), box=tuple(int(v) for v in (x, y, bw, bh)),
+                     roi=app.preprocess_face(gray[y:y + bh, x:x + bw]))
+                for (x, y, bw, bh) in boxes]
+
+
+def ordered_results(pool, fn, items, window):
+    # pool.map without submitting everything up front: at most window files in flight
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def confusion_matrix(labels, predictions, classes):
+    # rows = true label, columns = prediction, over records that have both
+    index = {name: i for i, name in enumerate(classes)}
+    pairs = [(index[t], index[p]) for t, p in zip(labels, predictions) if t in index and p in index]
+    n = len(classes)
+    if not pairs:
+        return np.zeros((n, n), dtype=int)
+    true, pred = np.asarray(pairs).T
+    return np.bincount(true * n + pred, minlength=n * n).reshape(n, n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score images and recordings offline with the app pipeline')
+    parser.add_argument('paths', nargs='+', help='directories (searched recursively) or files')
+    parser.add_argument('--model', default=None, help='model path (default MODEL_PATH or scripts/emotion_model.h5)')
+    parser.add_argument('--backend', default=os.environ.get('INFERENCE_BACKEND', 'auto'))
+    parser.add_argument('--out-dir', default='batch_scores')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='decode/detect threads (default: all cores)')
+    parser.add_argument('--batch-size', type=int, default=64, help='faces per model call')
+    parser.add_argument('--crop-max-side', type=int, default=96,
+                        help='score images up to this size whole instead of detecting (0 = always detect)')
+    parser.add_argument('--all-faces', action='store_true', help='score every face, not only the largest')
+    parser.add_argument('--video-fps', type=float, default=1.0, help='frames per second sampled from videos')
+    parser.add_argument('--limit', type=int, default=None, help='stop after this many files')
+    parser.add_argument('--min-accuracy', type=float, default=None)
+    args = parser.parse_args()
+
+    import cv2
+    # parallelism comes from the worker threads; OpenCV's own pool would oversubscribe
+    cv2.setNumThreads(1)
+
+    model_path = args.model or os.environ.get('MODEL_PATH', bench_common.DEFAULT_MODEL_PATH)
+    meta = load_metadata(model_path)
+    classes = list(meta['labels'])
+    if meta['source'] is None:
+        print(f"⚠️  No metadata file next to {model_path}; assuming labels {', '.join(classes)}")
+    set_thread_counts(int(os.environ.get('INFERENCE_INTRA_OP_THREADS', 0)) or None,
+                      int(os.environ.get('INFERENCE_INTER_OP_THREADS', 0)) or None)
+    model = load_backend(args.backend, model_path)
+    stress_weights = app.stress_weights_for(classes)
+    extractor = FaceExtractor(create_face_detector(), {name.lower(): name for name in classes},
+                              args.crop_max_side, args.all_faces, args.video_fps)
+
+    files = find_files(args.paths)
+    if args.limit:
+        files = (path for i, path in zip(range(args.limit), files))
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    header = ['path', 'frame', 'label', 'prediction', 'confidence', 'stress_level', 'expected_stress',
+              'faces', 'x', 'y', 'w', 'h', 'error'] + [f'p_{name}' for name in classes]
+    true_labels, predicted = [], []
+    counts = {'files': 0, 'records': 0, 'scored': 0, 'no_face': 0, 'unreadable': 0}
+    worker_seconds = inference_seconds = 0.0
+
+    def flush(records, f_writer):
+        nonlocal inference_seconds
+        rois = [r['roi'] for r in records if r['roi'] is not None]
+        probs = iter(())
+        if rois:
+            t0 = time.perf_counter()
+            probs = iter(np.asarray(model.predict(np.stack(rois))))
+            inference_seconds += time.perf_counter() - t0
+        for r in records:
+            box = r['box'] or (None,) * 4
+            row = [r['path'], r['frame'], r['label'], '', '', '', '', r['faces'], *box, r.get('error', '')]
+            if r['roi'] is None:
+                counts['unreadable' if r.get('error') else 'no_face'] += 1
+                f_writer.writerow(row + [''] * len(classes))
+                true_labels.append(r['label'])
+                predicted.append('')
+                continue
+            p = next(probs)
+            emotion = classes[int(np.argmax(p))]
+            row[3:7] = [emotion, round(float(np.max(p)), 4), app.STRESS_MAP.get(emotion, 50),
+                        round(float(p @ stress_weights), 1)]
+            f_writer.writerow(row + [round(float(v), 4) for v in p])
+            counts['scored'] += 1
+            true_labels.append(r['label'])
+            predicted.append(emotion)
+
+    print(f"Scoring {', '.join(args.paths)} with {model_path} ({type(model).__name__}), "
+          f"{args.workers} workers, batches of {args.batch_size}")
+    start = time.perf_counter()
+    with open(os.path.join(args.out_dir, 'predictions.csv'), 'w', newline='') as f, \
+            ThreadPoolExecutor(max_workers=args.workers) as pool:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        buffered, buffered_faces = [], 0
+        for records, seconds in ordered_results(pool, extractor, files, window=args.workers * 4):
+            counts['files'] += 1
+            counts['records'] += len(records)
+            worker_seconds += seconds
+            buffered.extend(records)
+            buffered_faces += sum(r['roi'] is not None for r in records)
+            if buffered_faces >= args.batch_size:
+                flush(buffered, writer)
+                buffered, buffered_faces = [], 0
+            if counts['files'] % 1000 == 0:
+                print(f"  {counts['files']} files, {counts['files'] / (time.perf_counter() - start):.0f}/s")
+        flush(buffered, writer)
+    wall = time.perf_counter() - start
+
+    matrix = confusion_matrix(true_labels, predicted, classes)
+    with open(os.path.join(args.out_dir, 'confusion_matrix.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['label \\ prediction'] + classes)
+        for name, row in zip(classes, matrix.tolist()):
+            writer.writerow([name] + row)
+
+    labelled = np.asarray([t in classes for t in true_labels], dtype=bool)
+    scored_labelled = int(matrix.sum())
+    accuracy = float(np.trace(matrix) / scored_labelled) if scored_labelled else None
+    per_class = {name: (round(float(matrix[i, i] / matrix[i].sum()), 4) if matrix[i].sum() else None)
+                 for i, name in enumerate(classes)}
+    summary = {
+        'model': os.path.abspath(model_path),
+        'labels': classes,
+        **counts,
+        'labelled': int(labelled.sum()),
+        'accuracy': round(accuracy, 4) if accuracy is not None else None,
+        # share of labelled records that had a face to score
+        'coverage': round(scored_labelled / int(labelled.sum()), 4) if labelled.any() else None,
+        'per_class_accuracy': per_class,
+        'confusion_matrix': matrix.tolist(),
+        'throughput': {
+            'wall_seconds': round(wall, 2),
+            'files_per_second': round(counts['files'] / wall, 1) if wall else None,
+            'faces_per_second': round(counts['scored'] / wall, 1) if wall else None,
+            'decode_detect_cpu_seconds': round(worker_seconds, 2),
+            'inference_seconds': round(inference_seconds, 2),
+            'workers': args.workers,
+            'batch_size': args.batch_size,
+            'cpu_cores': os.cpu_count(),
+        },
+    }
+    with open(os.path.join(args.out_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n{counts['files']} files, {counts['scored']} faces scored, {counts['no_face']} without a face, "
+          f"{counts['unreadable']} unreadable in {wall:.2f}s")
+    print(f"throughput: {summary['throughput']['files_per_second']} files/s, "
+          f"{summary['throughput']['faces_per_second']} faces/s "
+          f"(decode+detect {worker_seconds:.2f} thread-s over {args.workers} workers, inference {inference_seconds:.2f}s)")
+    if accuracy is not None:
+        print(f"accuracy {accuracy:.3f} on {scored_labelled} labelled faces (coverage {summary['coverage']:.1%})")
+        for name, value in per_class.items():
+            print(f"   {name:<9} {value if value is not None else '-'}")
+    print(f"results in {os.path.abspath(args.out_dir)}")
+
+    if args.min_accuracy is not None and (accuracy is None or accuracy < args.min_accuracy):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
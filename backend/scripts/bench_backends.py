@@ -0,0 +1,61 @@
+# bench_backends.py - parity check and latency comparison of the inference backends
+#
+#   python backend/scripts/bench_backends.py [--model path/to/emotion_model.h5]
+#
+# Runs every image in fer_data/test through each backend and checks that the
+# argmax label matches plain Keras for every image (exit code 1 otherwise),
+# then reports single-sample and batched latency per backend.
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from bench_common import ensure_model_file, load_fer_images, percentile_ms
+from inference_backends import BACKENDS, load_backend
+
+
+def time_predict(backend, batch, repeats):
+    backend.predict(batch)  # warmup
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        backend.predict(batch)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare inference backends for parity and latency')
+    parser.add_argument('--model', default=None, help='path to emotion_model.h5')
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=32)
+    args = parser.parse_args()
+
+    model_path = ensure_model_file(args.model)
+    x, _ = load_fer_images('test')
+    print(f"{len(x)} test images from fer_data/test")
+
+    backends = {name: load_backend(name, model_path) for name in BACKENDS}
+    reference = np.argmax(backends['keras'].predict(x), axis=1)
+
+    ok = True
+    print(f"\n{'backend':<12} {'mismatches':>10} {'1-img p50 ms':>13} {'1-img p99 ms':>13} {f'{args.batch}-img p50 ms':>14}")
+    for name, backend in backends.items():
+        labels = np.argmax(backend.predict(x), axis=1)
+        mismatches = int(np.sum(labels != reference))
+        ok = ok and mismatches == 0
+
+        single = time_predict(backend, x[:1], args.repeats)
+        batched = time_predict(backend, x[:args.batch], max(10, args.repeats // 10))
+        print(f"{name:<12} {mismatches:>10} {percentile_ms(single, 50):>13.3f} "
+              f"{percentile_ms(single, 99):>13.3f} {percentile_ms(batched, 50):>14.3f}")
+
+    if not ok:
+        print("\n❌ Backends disagree with Keras on some images")
+        sys.exit(1)
+    print("\n✅ All backends agree with Keras on every test image")
+
+
+if __name__ == '__main__':
+    main()
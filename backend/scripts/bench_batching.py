@@ -0,0 +1,70 @@
+# bench_batching.py - throughput/latency of BatchingPredictor on CPU
+#
+#   python backend/scripts/bench_batching.py --clients 64 --requests 2000
+#
+# Every client thread plays the role of one /api/detect-stress request and
+# submits a single ROI, waiting for its own prediction before sending the next.
+import argparse
+import threading
+import time
+
+from bench_common import load_or_build_model, random_rois, percentile_ms
+from batching import BatchingPredictor
+
+
+def run(model, max_batch, max_wait_ms, clients, total_requests):
+    predictor = BatchingPredictor(lambda b: model.predict(b, verbose=0),
+                                  max_batch=max_batch, max_wait_ms=max_wait_ms)
+    rois = random_rois(64)
+    per_client = max(1, total_requests // clients)
+    latencies = []
+    lock = threading.Lock()
+
+    def client(idx):
+        local = []
+        for i in range(per_client):
+            roi = rois[(idx + i) % len(rois)]
+            t0 = time.perf_counter()
+            predictor.predict(roi)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    # warmup so graph building is not counted
+    predictor.predict(rois[0])
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    predictor.close()
+
+    return {
+        'max_batch': max_batch,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile_ms(latencies, 50),
+        'p99_ms': percentile_ms(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark micro-batched emotion model inference')
+    parser.add_argument('--model', default=None, help='path to emotion_model.h5')
+    parser.add_argument('--batch-sizes', default='1,8,32,64')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    model = load_or_build_model(args.model)
+    print(f"{'max_batch':>9} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for size in [int(s) for s in args.batch_sizes.split(',')]:
+        r = run(model, size, args.max_wait_ms, args.clients, args.requests)
+        print(f"{r['max_batch']:>9} {r['rps']:>10.1f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# bench_common.py - shared helpers for the benchmark scripts in this folder
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(SCRIPTS_DIR)
+DATA_DIR = os.path.join(SCRIPTS_DIR, "fer_data")
+DEFAULT_MODEL_PATH = os.path.join(SCRIPTS_DIR, "emotion_model.h5")
+
+# Let scripts import backend modules (batching, ...) without installing anything
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def load_or_build_model(model_path=None):
+    """Load the trained model, or build an untrained one with the same shape."""
+    from tensorflow.keras.models import Sequential, load_model
+    from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout, Input
+
+    model_path = model_path or os.environ.get('MODEL_PATH', DEFAULT_MODEL_PATH)
+    if os.path.exists(model_path):
+        print(f"Using model: {model_path}")
+        return load_model(model_path)
+
+    print(f"⚠️  {model_path} not found - benchmarking an untrained model of the same architecture")
+    return Sequential([
+        Input(shape=(48, 48, 1)),
+        Conv2D(64, (3, 3), activation='relu'),
+        MaxPooling2D(2, 2),
+        Conv2D(128, (3, 3), activation='relu'),
+        MaxPooling2D(2, 2),
+        Dropout(0.25),
+        Flatten(),
+        Dense(128, activation='relu'),
+        Dropout(0.5),
+        Dense(7, activation='softmax'),
+    ])
+
+
+def ensure_model_file(model_path=None):
+    """Return a path to an .h5 model, saving an untrained one to a temp dir if needed."""
+    model_path = model_path or os.environ.get('MODEL_PATH', DEFAULT_MODEL_PATH)
+    if os.path.exists(model_path):
+        return model_path
+    model = load_or_build_model(model_path)
+    tmp_path = os.path.join(tempfile.mkdtemp(prefix='stress-bench-'), 'emotion_model.h5')
+    model.save(tmp_path)
+    return tmp_path
+
+
+from model_metadata import DEFAULT_LABELS  # noqa: E402
+
+# fer_data class folders are the lowercased label names
+FER_CLASSES = [label.lower() for label in DEFAULT_LABELS]
+
+
+def load_fer_images(split='test', limit=None, class_labels=None):
+    """Load fer_data/<split> preprocessed exactly like the app: (N, 48, 48, 1) float32, labels.
+
+    Labels index class_labels, the model's output order (model_metadata.load_metadata()['labels']).
+    """
+    import cv2
+
+    images, labels = [], []
+    for label, name in enumerate(class_labels or DEFAULT_LABELS):
+        folder = os.path.join(DATA_DIR, split, name.lower())
+        if not os.path.isdir(folder):
+            continue
+        for fname in sorted(os.listdir(folder)):
+            gray = cv2.imread(os.path.join(folder, fname), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                continue
+            images.append(cv2.resize(gray, (48, 48)).astype('float32') / 255.0)
+            labels.append(label)
+    x = np.stack(images)[..., np.newaxis]
+    y = np.asarray(labels)
+    if limit:
+        x, y = x[:limit], y[:limit]
+    return x, y
+
+
+def fer_image_paths(split='test'):
+    paths = []
+    for cls in FER_CLASSES:
+        folder = os.path.join(DATA_DIR, split, cls)
+        if os.path.isdir(folder):
+            paths.extend(os.path.join(folder, f) for f in sorted(os.listdir(folder)))
+    return paths
+
+
+def synthetic_frame(width=640, height=480, face_size=200, seed=0, faces=1):
+    """A BGR webcam-sized frame: smooth noise background with upscaled fer_data faces pasted in."""
+    import cv2
+
+    rng = np.random.default_rng(seed)
+    small = rng.integers(40, 200, size=(height // 16 + 1, width // 16 + 1, 3), dtype=np.uint8)
+    frame = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    paths = fer_image_paths('test')
+    for i in range(faces):
+        face = cv2.imread(paths[int(rng.integers(len(paths)))], cv2.IMREAD_COLOR)
+        face = cv2.resize(face, (face_size, face_size))
+        x = int(rng.integers(0, max(1, width - face_size)))
+        y = int(rng.integers(0, max(1, height - face_size)))
+        if faces > 1:
+            # spread faces left to right so they do not overlap
+            x = min(width - face_size, i * (width // faces))
+        frame[y:y + face_size, x:x + face_size] = face
+    return frame
+
+
+def random_rois(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.random((n, 48, 48, 1), dtype=np.float32)
+
+
+def percentile_ms(samples, pct):
+    if not samples:
+        return 0.0
+    return float(np.percentile(np.asarray(samples) * 1000.0, pct))
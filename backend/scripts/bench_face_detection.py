@@ -0,0 +1,72 @@
+# bench_face_detection.py - detections/second for several face detector configurations
+#
+#   python backend/scripts/bench_face_detection.py
+#   python backend/scripts/bench_face_detection.py --dnn-model res10_300x300_ssd_iter_140000.caffemodel \
+#       --dnn-config deploy.prototxt
+#
+# Inputs are the fer_data/test images plus synthetic 720p and 1080p webcam
+# frames.  "full-res" is the previous behaviour (detectMultiScale(gray, 1.3, 5)
+# on the whole frame).
+import argparse
+import time
+
+import cv2
+
+from bench_common import fer_image_paths, synthetic_frame
+from face_detection import create_face_detector
+
+CONFIGS = [
+    ('haar full-res', {'max_side': 0}),
+    ('haar max_side=640', {'max_side': 640}),
+    ('haar max_side=480', {'max_side': 480}),
+    ('haar max_side=320', {'max_side': 320}),
+    ('haar 480 sf=1.2 mn=4', {'max_side': 480, 'scale_factor': 1.2, 'min_neighbors': 4}),
+    ('haar 480 min=80', {'max_side': 480, 'min_size': 80}),
+]
+
+
+def run(detector, frames, repeats):
+    detector.detect(frames[0])
+    found = 0
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        for gray in frames:
+            found += len(detector.detect(gray))
+    elapsed = time.perf_counter() - t0
+    calls = repeats * len(frames)
+    return calls / elapsed, found / float(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark face detector configurations')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--fer-limit', type=int, default=200)
+    parser.add_argument('--dnn-model', default='')
+    parser.add_argument('--dnn-config', default='')
+    args = parser.parse_args()
+
+    fer = [cv2.imread(p, cv2.IMREAD_GRAYSCALE) for p in fer_image_paths('test')[:args.fer_limit]]
+    datasets = {
+        f'fer_data 48x48 ({len(fer)})': fer,
+        'synthetic 1280x720 (10)': [cv2.cvtColor(synthetic_frame(1280, 720, 360, seed=i), cv2.COLOR_BGR2GRAY)
+                                    for i in range(10)],
+        'synthetic 1920x1080 (10)': [cv2.cvtColor(synthetic_frame(1920, 1080, 540, seed=i), cv2.COLOR_BGR2GRAY)
+                                     for i in range(10)],
+    }
+
+    configs = list(CONFIGS)
+    if args.dnn_model:
+        configs.append(('dnn max_side=300', {'detector': 'dnn', 'max_side': 300,
+                                             'dnn_model': args.dnn_model, 'dnn_config': args.dnn_config}))
+
+    print(f"{'config':<22} {'dataset':<26} {'frames/s':>10} {'faces/frame':>12}")
+    for label, config in configs:
+        # fer images are already tiny; let every detector see them whole
+        detector = create_face_detector(dict({'min_size': 0}, **config))
+        for name, frames in datasets.items():
+            fps, faces = run(detector, frames, args.repeats)
+            print(f"{label:<22} {name:<26} {fps:>10.1f} {faces:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
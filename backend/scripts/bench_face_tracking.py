@@ -0,0 +1,105 @@
+# bench_face_tracking.py - detection savings of FaceTracker on a recorded video
+#
+#   python backend/scripts/bench_face_tracking.py                  # generated fixture video
+#   python backend/scripts/bench_face_tracking.py --video clip.mp4 # your own recording
+#
+# Without --video a fixture clip is recorded first: a fer_data face drifting
+# and slowly changing size over a static background, written with
+# cv2.VideoWriter and read back with cv2.VideoCapture like a real recording.
+# Every frame is processed twice, with full-frame detection and with the
+# tracker, reporting detector calls, per-frame latency (decode + detect +
+# crop/resize) and how closely tracked boxes match full-frame ones (IoU).
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from bench_common import fer_image_paths, percentile_ms, synthetic_frame
+from face_detection import create_face_detector
+from face_tracking import FaceTracker
+
+
+def record_fixture(path, frames=300, width=1280, height=720, fps=30):
+    background = synthetic_frame(width, height, face_size=1, seed=7)
+    face = cv2.imread(fer_image_paths('test')[0], cv2.IMREAD_COLOR)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    for i in range(frames):
+        t = i / float(fps)
+        side = int(260 + 30 * math.sin(t * 0.7))
+        x = int(width / 2 - side / 2 + 200 * math.sin(t * 0.9))
+        y = int(height / 2 - side / 2 + 80 * math.sin(t * 1.3))
+        frame = background.copy()
+        frame[y:y + side, x:x + side] = cv2.resize(face, (side, side))
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / float(union) if union else 0.0
+
+
+def process(video_path, detect):
+    cap = cv2.VideoCapture(video_path)
+    latencies, boxes = [], []
+    while True:
+        t0 = time.perf_counter()
+        ok, frame = cap.read()
+        if not ok:
+            break
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = detect(gray)
+        for (x, y, w, h) in faces:
+            cv2.resize(gray[y:y + h, x:x + w], (48, 48))
+        latencies.append(time.perf_counter() - t0)
+        boxes.append(faces)
+    cap.release()
+    return latencies, boxes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure face tracking savings on a video file')
+    parser.add_argument('--video', default=None, help='recorded video; a fixture clip is generated if omitted')
+    parser.add_argument('--redetect-every', type=int, default=10)
+    parser.add_argument('--margin', type=float, default=0.5)
+    args = parser.parse_args()
+
+    video_path = args.video or record_fixture(os.path.join(tempfile.mkdtemp(prefix='stress-bench-'), 'fixture.avi'))
+    print(f"Video: {video_path}")
+
+    detector = create_face_detector()
+    full_lat, full_boxes = process(video_path, detector.detect)
+
+    tracker = FaceTracker(detector, redetect_every=args.redetect_every, search_margin=args.margin)
+    track_lat, track_boxes = process(video_path, tracker.detect)
+    stats = tracker.stats()
+
+    overlaps = [iou(f[0], t[0]) for f, t in zip(full_boxes, track_boxes) if len(f) and len(t)]
+    found_full = sum(1 for b in full_boxes if len(b))
+    found_track = sum(1 for b in track_boxes if len(b))
+
+    print(f"\n{'mode':<10} {'full scans':>10} {'window scans':>13} {'frames w/ face':>15} "
+          f"{'mean ms':>8} {'p50 ms':>7} {'p99 ms':>7}")
+    print(f"{'full':<10} {len(full_lat):>10} {0:>13} {found_full:>15} "
+          f"{np.mean(full_lat) * 1000:>8.2f} {percentile_ms(full_lat, 50):>7.2f} {percentile_ms(full_lat, 99):>7.2f}")
+    print(f"{'tracking':<10} {stats['full_detections']:>10} {stats['window_detections']:>13} {found_track:>15} "
+          f"{np.mean(track_lat) * 1000:>8.2f} {percentile_ms(track_lat, 50):>7.2f} {percentile_ms(track_lat, 99):>7.2f}")
+
+    saved = 1.0 - stats['full_detections'] / float(max(1, len(full_lat)))
+    speedup = np.mean(full_lat) / max(1e-9, np.mean(track_lat))
+    print(f"\nFull-frame scans avoided: {saved:.1%}   end-to-end speedup: {speedup:.2f}x   "
+          f"mean IoU vs full detection: {np.mean(overlaps) if overlaps else 0.0:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# bench_indexes.py - query latency of the app's MongoDB queries without and with indexes
+#
+#   python backend/scripts/seed_stress_logs.py --drop          # once, 1M logs
+#   python backend/scripts/bench_indexes.py --db stress_detection_bench
+#
+# Runs the queries issued by get_stress_logs() (user and admin variants, plus
+# a deep admin page fetched by cursor vs skip()) and the username lookups of register/login, first after dropping the app's
+# indexes and then after ensure_indexes(), reporting p50/p99 latency and the
+# winning plan stage (COLLSCAN vs IXSCAN) for each.
+import argparse
+import os
+import random
+import time
+
+from pymongo import MongoClient
+
+import bench_common  # noqa: F401  (puts backend/ on sys.path)
+from bench_common import percentile_ms
+from db_indexes import (LOG_LIST_PROJECTION, LOGIN_PROJECTION, USERNAME_ONLY_PROJECTION,
+                        drop_indexes, ensure_indexes)
+
+
+def plan_stage(explain):
+    plan = explain.get('queryPlanner', {}).get('winningPlan', {})
+    stages = []
+    while plan:
+        stages.append(plan.get('stage', '?'))
+        plan = plan.get('inputStage') or (plan.get('inputStages') or [None])[0]
+    return '>'.join(stages)
+
+
+NEWEST_FIRST = [('timestamp', -1), ('_id', -1)]
+
+
+def page_filter(last):
+    # what find_log_page() sends for ?before=<cursor of `last`>
+    return {'$or': [{'timestamp': {'$lt': last['timestamp']}},
+                    {'timestamp': last['timestamp'], '_id': {'$lt': last['_id']}}]}
+
+
+def queries(db, usernames, user_ids):
+    logs, users = db['stress_logs'], db['users']
+    deep_cursor = next(logs.find({}, {'timestamp': 1}).sort(NEWEST_FIRST).skip(4999).limit(1))
+    return {
+        'user logs (limit 20)': lambda: logs.find({'user_id': random.choice(user_ids)}, LOG_LIST_PROJECTION)
+        .sort(NEWEST_FIRST).limit(20),
+        'admin logs (limit 50)': lambda: logs.find({}, LOG_LIST_PROJECTION).sort(NEWEST_FIRST).limit(50),
+        'admin page 100 (keyset)': lambda: logs.find(page_filter(deep_cursor), LOG_LIST_PROJECTION)
+        .sort(NEWEST_FIRST).limit(50),
+        'admin page 100 (skip)': lambda: logs.find({}, LOG_LIST_PROJECTION).sort(NEWEST_FIRST).skip(5000).limit(50),
+        'login find_one': lambda: users.find({'username': random.choice(usernames)}, LOGIN_PROJECTION).limit(1),
+        'username exists': lambda: users.find({'username': random.choice(usernames)},
+                                              USERNAME_ONLY_PROJECTION).limit(1),
+    }
+
+
+def measure(make_cursor, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        list(make_cursor())
+        samples.append(time.perf_counter() - t0)
+    return samples, plan_stage(make_cursor().explain())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MongoDB queries with and without indexes')
+    parser.add_argument('--db', default='stress_detection_bench')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    client = MongoClient(os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[args.db]
+    print(f"{db['stress_logs'].estimated_document_count()} logs, {db['users'].estimated_document_count()} users")
+    usernames = [u['username'] for u in db['users'].find({}, {'username': 1}).limit(1000)]
+    user_ids = db['stress_logs'].distinct('user_id')[:1000]
+
+    results = {}
+    for phase in ('no indexes', 'indexed'):
+        if phase == 'no indexes':
+            drop_indexes(db)
+        else:
+            ensure_indexes(db)
+        for name, make_cursor in queries(db, usernames, user_ids).items():
+            results[(phase, name)] = measure(make_cursor, args.repeats)
+
+    print(f"\n{'query':<24} {'phase':<11} {'p50 ms':>9} {'p99 ms':>9}  plan")
+    for (phase, name), (samples, stage) in sorted(results.items(), key=lambda kv: kv[0][1]):
+        print(f"{name:<24} {phase:<11} {percentile_ms(samples, 50):>9.2f} {percentile_ms(samples, 99):>9.2f}  {stage}")
+
+
+if __name__ == '__main__':
+    main()
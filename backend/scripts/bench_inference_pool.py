@@ -0,0 +1,98 @@
+# bench_inference_pool.py - request throughput with the model in-process vs in worker processes
+#
+#   python backend/scripts/bench_inference_pool.py --workers 0,1,2,4 --clients 64 --requests 4000
+#
+# Client threads play /api/detect-stress requests exactly as in the app: each
+# submits one ROI to a BatchingPredictor and waits for its row.  Workers "0"
+# runs the backend in this process (the INFERENCE_WORKERS=0 default); N > 0
+# serves the same batches from an InferencePool of N processes, each using
+# --intra-op-threads threads.  Before timing, every pool's predictions are
+# compared with the in-process backend on the same ROIs; the script exits
+# with status 1 on a mismatch.  Scaling needs free cores: on a machine with
+# fewer cores than workers the extra processes only add overhead.
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from bench_common import ensure_model_file, percentile_ms, random_rois
+from batching import BatchingPredictor
+from inference_backends import load_backend, set_thread_counts
+from inference_pool import InferencePool
+
+
+def run(predict_fn, max_batch, max_wait_ms, clients, total_requests):
+    predictor = BatchingPredictor(predict_fn, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    rois = random_rois(64)
+    per_client = max(1, total_requests // clients)
+    latencies = []
+    lock = threading.Lock()
+
+    def client(idx):
+        local = []
+        for i in range(per_client):
+            t0 = time.perf_counter()
+            predictor.predict(rois[(idx + i) % len(rois)])
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    predictor.predict(rois[0])
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    predictor.close()
+    return len(latencies) / elapsed, percentile_ms(latencies, 50), percentile_ms(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the multi-process inference worker pool')
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--workers', default='0,1,2,4', help='comma-separated worker counts; 0 = in-process')
+    parser.add_argument('--intra-op-threads', type=int, default=1)
+    parser.add_argument('--inter-op-threads', type=int, default=1)
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=4000)
+    args = parser.parse_args()
+
+    model_path = ensure_model_file()
+    print(f"{os.cpu_count()} CPU cores, backend {args.backend}, {args.intra_op_threads} intra-op thread(s) per model")
+    check = random_rois(97)
+
+    set_thread_counts(args.intra_op_threads, args.inter_op_threads)
+    local = load_backend(args.backend, model_path)
+    expected = local.predict(check)
+
+    ok = True
+    print(f"\n{'workers':>7} {'backend':<18} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in [int(w) for w in args.workers.split(',')]:
+        if workers == 0:
+            name, predict_fn, pool = local.name, local.predict, None
+        else:
+            pool = InferencePool(model_path, args.backend, workers=workers, max_batch=args.max_batch,
+                                 num_classes=expected.shape[1], intra_op_threads=args.intra_op_threads,
+                                 inter_op_threads=args.inter_op_threads)
+            name, predict_fn = pool.name, pool.submit
+            if not np.allclose(pool.predict(check), expected, atol=1e-5):
+                print(f"  MISMATCH: {pool.name} predictions differ from the in-process backend")
+                ok = False
+        rps, p50, p99 = run(predict_fn, args.max_batch, args.max_wait_ms, args.clients, args.requests)
+        print(f"{workers:>7} {name:<18} {rps:>9.1f} {p50:>8.2f} {p99:>8.2f}")
+        if pool is not None:
+            pool.close()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+# bench_input_pipeline.py - training input throughput: directory generators vs prepared tf.data
+#
+#   python backend/scripts/bench_input_pipeline.py --epochs 3
+#
+# Compares the ways the training scripts have fed fer_data/train with the
+# prepared pipeline:
+#   ImageDataGenerator      flow_from_directory + Python augmentation (the former train_model.py)
+#   image_dataset_from_dir  per-epoch JPEG decode + map(x / 255) (the former fer.py)
+#   prepared tf.data        fer_dataset.py: uint8 .npy decoded once, batched
+#                           parallel affine augmentation, prefetch
+#   prepared, no augment    the same without augmentation, to compare with
+#                           image_dataset_from_dir, which does not augment
+# For each it reports images/second when only iterating the input (what the
+# input can feed at most) and the wall time of a training epoch of the
+# train.py 'small' CNN, both averaged over the epochs after the first.  The one-time
+# preparation cost is printed separately.  Exits with status 1 if the
+# prepared pipeline feeds fewer images/second than the generator it
+# replaces (ImageDataGenerator with augmentation, image_dataset_from_dir
+# without).
+import argparse
+import os
+import sys
+import time
+
+from bench_common import DATA_DIR
+import fer_dataset
+
+BATCH_SIZE = 32
+
+
+def image_data_generator(data_dir, batch_size):
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    datagen = ImageDataGenerator(rescale=1.0 / 255, rotation_range=20, width_shift_range=0.2,
+                                 height_shift_range=0.2, shear_range=0.2, zoom_range=0.2, horizontal_flip=True)
+    return datagen.flow_from_directory(os.path.join(data_dir, 'train'), target_size=(48, 48), color_mode='grayscale',
+                                       batch_size=batch_size, class_mode='sparse', seed=0)
+
+
+def directory_dataset(data_dir, batch_size):
+    from tensorflow.keras.preprocessing import image_dataset_from_directory
+
+    ds = image_dataset_from_directory(os.path.join(data_dir, 'train'), image_size=(48, 48), color_mode='grayscale',
+                                      batch_size=batch_size, shuffle=True, seed=0)
+    return ds.map(lambda x, y: (x / 255.0, y))
+
+
+def prepared_dataset(data_dir, batch_size, augment=True):
+    images, labels, _ = fer_dataset.load_split('train', data_dir)
+    return fer_dataset.train_dataset(images, labels, batch_size=batch_size, seed=0, augment=augment)
+
+
+PIPELINES = {
+    'ImageDataGenerator': image_data_generator,
+    'image_dataset_from_dir': directory_dataset,
+    'prepared tf.data': prepared_dataset,
+    'prepared, no augment': lambda data_dir, batch_size: prepared_dataset(data_dir, batch_size, augment=False),
+}
+
+
+def build_model():
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout, Input
+    from tensorflow.keras.optimizers import Adam
+
+    model = Sequential([
+        Input(shape=(48, 48, 1)),
+        Conv2D(64, (3, 3), activation='relu'),
+        MaxPooling2D(2, 2),
+        Conv2D(128, (3, 3), activation='relu'),
+        MaxPooling2D(2, 2),
+        Dropout(0.25),
+        Flatten(),
+        Dense(128, activation='relu'),
+        Dropout(0.5),
+        Dense(7, activation='softmax'),
+    ])
+    model.compile(optimizer=Adam(learning_rate=0.0001), loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def iterate_epochs(data, epochs):
+    # -> (images per epoch, seconds per epoch for every epoch)
+    times, count = [], 0
+    for _ in range(epochs):
+        count = 0
+        start = time.perf_counter()
+        if hasattr(data, 'take'):
+            for x, _ in data:
+                count += int(x.shape[0])
+        else:
+            for i in range(len(data)):
+                count += len(data[i][0])
+            data.on_epoch_end()
+        times.append(time.perf_counter() - start)
+    return count, times
+
+
+class EpochTimer:
+    def __init__(self):
+        import tensorflow as tf
+
+        timer = self
+
+        class _Callback(tf.keras.callbacks.Callback):
+            def on_epoch_begin(self, epoch, logs=None):
+                timer._start = time.perf_counter()
+
+            def on_epoch_end(self, epoch, logs=None):
+                timer.times.append(time.perf_counter() - timer._start)
+
+        self.times = []
+        self.callback = _Callback()
+
+
+def mean_after_first(times):
+    rest = times[1:] or times
+    return sum(rest) / len(rest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark training input pipelines on fer_data/train')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if not os.path.isdir(os.path.join(args.data_dir, 'train')):
+        sys.exit(f"{args.data_dir}/train not found")
+
+    start = time.perf_counter()
+    meta = fer_dataset.prepare(args.data_dir)
+    print(f"one-time preparation: {meta['splits']['train']['count'] + meta['splits'].get('test', {}).get('count', 0)} "
+          f"images decoded in {time.perf_counter() - start:.2f}s\n")
+
+    print(f"{'pipeline':<24} {'input img/s':>12} {'fit epoch s':>12} {'fit img/s':>10}")
+    feed_rates = {}
+    for name, make in PIPELINES.items():
+        count, times = iterate_epochs(make(args.data_dir, args.batch_size), args.epochs)
+        feed_rates[name] = count / mean_after_first(times)
+
+        timer = EpochTimer()
+        build_model().fit(make(args.data_dir, args.batch_size), epochs=args.epochs, verbose=0,
+                          callbacks=[timer.callback])
+        epoch_s = mean_after_first(timer.times)
+        print(f"{name:<24} {feed_rates[name]:>12.0f} {epoch_s:>12.2f} {count / epoch_s:>10.0f}")
+
+    if (feed_rates['prepared tf.data'] < feed_rates['ImageDataGenerator']
+            or feed_rates['prepared, no augment'] < feed_rates['image_dataset_from_dir']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# bench_log_writer.py - request-side latency of stress log writes, sync vs write-behind
+#
+#   python backend/scripts/bench_log_writer.py --clients 16 --requests 4000 --rtt-ms 2
+#
+# Uses an in-process stand-in for the MongoDB collection that sleeps one
+# round-trip per call (plus a small per-document cost), so no server is
+# needed.  Each client thread plays the part of detect_stress() writing one
+# log per request.  After the run it checks that every accepted document
+# reached the collection exactly once and that close() flushed the queue;
+# the script exits with status 1 otherwise.  It also exercises the
+# queue-full policies on a tiny queue.
+import argparse
+import sys
+import threading
+import time
+from datetime import datetime
+
+import bench_common  # noqa: F401  (puts backend/ on sys.path)
+from bench_common import percentile_ms
+from log_writer import BufferedLogWriter
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+
+class FakeCollection:
+    def __init__(self, rtt_ms=2.0, per_doc_us=5.0):
+        self.rtt = rtt_ms / 1000.0
+        self.per_doc = per_doc_us / 1e6
+        self.docs = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def insert_one(self, doc):
+        time.sleep(self.rtt + self.per_doc)
+        with self._lock:
+            self.calls += 1
+            self.docs.append(doc)
+
+    def insert_many(self, docs, ordered=True):
+        time.sleep(self.rtt + self.per_doc * len(docs))
+        with self._lock:
+            self.calls += 1
+            self.docs.extend(docs)
+        return InsertManyResult([d['seq'] for d in docs])
+
+
+def run(write, clients, total):
+    per_client = max(1, total // clients)
+    latencies = []
+    lock = threading.Lock()
+
+    def client(idx):
+        local = []
+        for i in range(per_client):
+            doc = {'seq': idx * per_client + i, 'user_id': f'user-{idx}', 'stress_level': 50,
+                   'detected_emotion': 'Neutral', 'timestamp': datetime.utcnow()}
+            t0 = time.perf_counter()
+            write(doc)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - start
+
+
+def check_policies():
+    ok = True
+    for policy in ('drop-newest', 'drop-oldest', 'block'):
+        coll = FakeCollection(rtt_ms=50)
+        writer = BufferedLogWriter(coll, max_queue=10, flush_size=5, flush_interval_ms=1000,
+                                   policy=policy, block_timeout_ms=1)
+        accepted = sum(writer.write({'seq': i}) for i in range(100))
+        writer.close()
+        stats = writer.stats()
+        seqs = [d['seq'] for d in coll.docs]
+        consistent = len(seqs) == len(set(seqs)) and stats['written'] == len(seqs) and stats['queued'] == 0
+        ok = ok and consistent and stats['dropped'] > 0
+        print(f"  {policy:<12} accepted={accepted:<3} written={stats['written']:<3} "
+              f"dropped={stats['dropped']:<3} {'ok' if consistent else 'INCONSISTENT'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark write-behind stress log inserts')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--rtt-ms', type=float, default=2.0, help='simulated MongoDB round trip')
+    parser.add_argument('--flush-size', type=int, default=200)
+    parser.add_argument('--flush-interval-ms', type=float, default=200)
+    args = parser.parse_args()
+
+    sync_coll = FakeCollection(args.rtt_ms)
+    sync_lat, sync_elapsed = run(sync_coll.insert_one, args.clients, args.requests)
+
+    buffered_coll = FakeCollection(args.rtt_ms)
+    writer = BufferedLogWriter(buffered_coll, flush_size=args.flush_size,
+                               flush_interval_ms=args.flush_interval_ms)
+    buf_lat, buf_elapsed = run(writer.write, args.clients, args.requests)
+    writer.close()
+    stats = writer.stats()
+
+    print(f"{'mode':<13} {'writes/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'db calls':>9}")
+    print(f"{'insert_one':<13} {len(sync_lat) / sync_elapsed:>10.0f} {percentile_ms(sync_lat, 50):>8.3f} "
+          f"{percentile_ms(sync_lat, 99):>8.3f} {sync_coll.calls:>9}")
+    print(f"{'write-behind':<13} {len(buf_lat) / buf_elapsed:>10.0f} {percentile_ms(buf_lat, 50):>8.3f} "
+          f"{percentile_ms(buf_lat, 99):>8.3f} {buffered_coll.calls:>9}")
+
+    seqs = [d['seq'] for d in buffered_coll.docs]
+    ok = (len(seqs) == len(buf_lat) and len(set(seqs)) == len(seqs)
+          and stats['written'] == len(seqs) and stats['dropped'] == 0 and stats['queued'] == 0)
+    print(f"\nwrite-behind stats: {stats}  -> {'all documents flushed' if ok else 'MISMATCH'}")
+
+    print("\nqueue-full policies (queue of 10, slow collection):")
+    ok = check_policies() and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
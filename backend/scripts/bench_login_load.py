@@ -0,0 +1,139 @@
+# bench_login_load.py - detection latency while logins hammer the same server
+#
+#   python backend/scripts/bench_login_load.py
+#   python backend/scripts/bench_login_load.py --seconds 20 --login-clients 32 --hash-workers 2
+#
+# Serves app.py the way bench_suite.py does (a subprocess on a seeded
+# mongomock database, prediction cache off) once per scenario.  In each,
+# --detect-clients keep-alive clients send POST /api/detect-stress while
+# --login-clients clients send POST /login at the same time, for --seconds:
+#
+#   detect-only       no login traffic: the detection baseline
+#   login-inline      correct passwords, hashed on the request threads
+#                     (PASSWORD_HASH_WORKERS=0, every login burns a core)
+#   login-pool        correct passwords, hashed on --hash-workers threads
+#   failed-limited    wrong passwords for one account, failed-login limiter on
+#   failed-unlimited  wrong passwords for one account, limiter off (LOGIN_MAX_FAILURES=0
+#                     and LOGIN_MAX_FAILURES_PER_IP=0, every attempt is hashed)
+#
+# Both failed-login scenarios hash on the request threads so the limiter is
+# measured on its own.  Refused attempts are cheap but not free: the
+# clients send the next one immediately, so they still cost request handling.
+#
+# Reports detection throughput and p50/p99, login throughput, p50 and the
+# response statuses (401 wrong password, 429 limited, 503 hashing queue
+# full).  Exits with status 1 if bounding the hashing pool or the limiter
+# leaves detection p99 more than --max-regression times worse than the
+# unbounded scenario it replaces.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+from types import SimpleNamespace
+
+from bench_common import ensure_model_file
+from bench_suite import (ADMIN_PASSWORD, ADMIN_USERNAME, BENCH_DB, LOGIN_USERNAME, LOGIN_PASSWORD, boot_server,
+                         endpoint_requests, http_load, test_frames)
+
+SCENARIOS = ('detect-only', 'login-inline', 'login-pool', 'failed-limited', 'failed-unlimited')
+# (bounded scenario, unbounded scenario it is gated against)
+GATES = (('login-pool', 'login-inline'), ('failed-limited', 'failed-unlimited'))
+
+
+def scenario_env(name, hash_workers):
+    env = {'PASSWORD_HASH_WORKERS': str(hash_workers), 'LOGIN_MAX_FAILURES': '5', 'LOGIN_MAX_FAILURES_PER_IP': '100'}
+    if name in ('login-inline', 'failed-limited', 'failed-unlimited'):
+        env['PASSWORD_HASH_WORKERS'] = '0'
+    if name == 'failed-unlimited':
+        env.update(LOGIN_MAX_FAILURES='0', LOGIN_MAX_FAILURES_PER_IP='0')
+    return env
+
+
+def login_request(password):
+    body = json.dumps({'username': LOGIN_USERNAME, 'password': password})
+    return ('POST', '/login', lambda i: body, {'Content-Type': 'application/json'})
+
+
+def run_scenario(name, args, frames, log_dir):
+    os.environ.update(scenario_env(name, args.hash_workers))
+    proc, port = boot_server(SimpleNamespace(users=args.users, logs=args.logs),
+                             os.path.join(log_dir, f'{name}.log'), args.boot_timeout)
+    try:
+        detect = endpoint_requests(port, frames)['detect-stress']
+        loads = {'detect': (detect, args.detect_clients)}
+        if name.startswith('login-'):
+            loads['login'] = (login_request(LOGIN_PASSWORD), args.login_clients)
+        elif name.startswith('failed-'):
+            loads['login'] = (login_request('not-' + LOGIN_PASSWORD), args.login_clients)
+
+        results = {}
+
+        def run(kind):
+            request, clients = loads[kind]
+            results[kind] = http_load(port, request, clients, args.seconds)
+
+        threads = [threading.Thread(target=run, args=(kind,)) for kind in loads]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure detection latency under login and failed-login bursts')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--seconds', type=float, default=10, help='duration of each scenario')
+    parser.add_argument('--detect-clients', type=int, default=2)
+    parser.add_argument('--login-clients', type=int, default=16)
+    parser.add_argument('--hash-workers', type=int, default=1, help='PASSWORD_HASH_WORKERS for the bounded scenarios')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--logs', type=int, default=1000)
+    parser.add_argument('--max-regression', type=float, default=1.0)
+    parser.add_argument('--boot-timeout', type=float, default=180)
+    parser.add_argument('--out', help='write the results as JSON')
+    args = parser.parse_args()
+
+    os.environ.update(MODEL_PATH=ensure_model_file(), ADMIN_USERNAME=ADMIN_USERNAME, ADMIN_PASSWORD=ADMIN_PASSWORD,
+                      DB_NAME=BENCH_DB, FLASK_DEBUG='0', TF_CPP_MIN_LOG_LEVEL='3', PREDICTION_CACHE_SIZE='0')
+    os.environ.pop('MONGO_URI', None)
+    scenarios = [s for s in args.scenarios.split(',') if s]
+    frames = test_frames()
+    log_dir = tempfile.mkdtemp(prefix='stress-login-bench-')
+
+    print(f"{args.detect_clients} detection + {args.login_clients} login clients, {args.seconds:g}s per scenario, "
+          f"{os.cpu_count()} CPU cores (server logs in {log_dir})")
+    print(f"{'scenario':<17} {'detect/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'login/s':>8} {'p50 ms':>8}  statuses")
+    results = {}
+    for name in scenarios:
+        results[name] = stats = run_scenario(name, args, frames, log_dir)
+        detect, login = stats['detect'], stats.get('login')
+        line = (f"{name:<17} {detect['requests_per_s']:>8.1f} {detect['p50_ms']:>8.1f} {detect['p99_ms']:>8.1f}")
+        if login:
+            statuses = ' '.join(f"{k}:{v}" for k, v in sorted(login['statuses'].items()))
+            line += f" {login['requests_per_s']:>8.1f} {login['p50_ms']:>8.1f}  {statuses}"
+        print(line)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({'settings': vars(args), 'cpu_cores': os.cpu_count(), 'scenarios': results}, f, indent=2)
+        print(f"\nResults written to {os.path.abspath(args.out)}")
+
+    failed = False
+    for bounded, unbounded in GATES:
+        if bounded in results and unbounded in results:
+            ratio = results[bounded]['detect']['p99_ms'] / results[unbounded]['detect']['p99_ms']
+            ok = ratio <= args.max_regression
+            failed |= not ok
+            print(f"{'✅' if ok else '❌'} detection p99 {bounded} / {unbounded}: {ratio:.2f}x")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
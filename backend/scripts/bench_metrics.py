@@ -0,0 +1,67 @@
+# bench_metrics.py - cost of the metrics instrumentation per observation and per scrape
+#
+#   python backend/scripts/bench_metrics.py --iterations 200000
+#
+# Times an empty `with stage(...)` block (histogram observation only, and with
+# a per-request profile being recorded), a bare Counter.inc and
+# Histogram.observe, and a full render() of a registry holding a realistic
+# number of series.  A detection request passes through about ten stages,
+# so the script exits with status 1 if one stage costs more than
+# --max-stage-us microseconds.
+import argparse
+import sys
+import time
+
+import bench_common  # noqa: F401  (puts backend/ on sys.path)
+import metrics
+
+
+def per_call_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark metrics instrumentation overhead')
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--max-stage-us', type=float, default=20.0)
+    args = parser.parse_args()
+
+    counter = metrics.Counter('bench_counter_total', 'bench', ['result'])
+    histogram = metrics.Histogram('bench_seconds', 'bench', ['endpoint'])
+
+    def empty_stage():
+        with metrics.stage('bench'):
+            pass
+
+    results = {
+        'Counter.inc': per_call_us(lambda: counter.inc(result='face'), args.iterations),
+        'Histogram.observe': per_call_us(lambda: histogram.observe(0.003, endpoint='detect'), args.iterations),
+        'stage()': per_call_us(empty_stage, args.iterations),
+    }
+    metrics.start_profile()
+    results['stage() + profile'] = per_call_us(empty_stage, min(args.iterations, 20000))
+    metrics.end_profile()
+
+    print(f"{'operation':<20} {'us/call':>8}")
+    for name, us in results.items():
+        print(f"{name:<20} {us:>8.2f}")
+
+    # ~ a busy deployment: 40 endpoint/method/status series, 12 stages
+    for i in range(40):
+        histogram.observe(0.01, endpoint=f'endpoint_{i}')
+    for i in range(12):
+        metrics.STAGE_SECONDS.observe(0.001, stage=f'stage_{i}')
+    start = time.perf_counter()
+    text = metrics.render()
+    render_ms = (time.perf_counter() - start) * 1000
+    print(f"\nrender(): {render_ms:.2f} ms for {text.count(chr(10))} lines ({len(text) / 1024:.0f} KiB)")
+
+    if results['stage()'] > args.max_stage_us:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
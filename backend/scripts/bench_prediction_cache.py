@@ -0,0 +1,106 @@
+# bench_prediction_cache.py - hit rate and latency of the perceptual-hash prediction cache
+#
+#   python backend/scripts/bench_prediction_cache.py --images 300 --repeats 5
+#
+# Replays "Analyze Again": every fer_data/test face is requested --repeats
+# times, each repeat slightly perturbed (sensor noise, a brightness change or
+# a one-pixel shift of the crop).  For each perturbation it reports the hit
+# rate, how often a hit returns the same label the model would have given
+# for that exact ROI, and per-request latency with and without the cache
+# (model called one ROI at a time, as for a single user).  Distinct faces
+# that hash alike would be served someone else's prediction, so the script
+# also counts hash collisions between different images and exits with
+# status 1 if they exceed --max-collision-rate.
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from bench_common import ensure_model_file, load_fer_images, percentile_ms
+from inference_backends import load_backend
+from prediction_cache import PredictionCache, phash
+
+PERTURBATIONS = {
+    'identical': lambda roi, rng: roi,
+    'noise 1%': lambda roi, rng: np.clip(roi + rng.normal(0, 0.01, roi.shape), 0, 1).astype(np.float32),
+    'noise 3%': lambda roi, rng: np.clip(roi + rng.normal(0, 0.03, roi.shape), 0, 1).astype(np.float32),
+    'brightness +5%': lambda roi, rng: np.clip(roi + 0.05, 0, 1).astype(np.float32),
+    'shift 1px': lambda roi, rng: np.roll(roi, rng.choice([-1, 1]), axis=rng.integers(0, 2)),
+}
+
+
+def replay(model, images, perturb, repeats, seed=0):
+    rng = np.random.default_rng(seed)
+    cache = PredictionCache(max_entries=4096, ttl_s=3600)
+    cached_ms, uncached_ms = [], []
+    agree = hits_checked = 0
+    for roi in images:
+        for r in range(repeats):
+            sample = roi if r == 0 else perturb(roi, rng)
+            batch = sample[np.newaxis]
+
+            t0 = time.perf_counter()
+            fresh = model.predict(batch)[0]
+            uncached_ms.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            key = phash(sample)
+            preds = cache.get(key)
+            if preds is None:
+                preds = model.predict(batch)[0]
+                cache.put(key, preds)
+            else:
+                hits_checked += 1
+                agree += int(np.argmax(preds) == np.argmax(fresh))
+            cached_ms.append(time.perf_counter() - t0)
+    stats = cache.stats()
+    # first request of every face is a compulsory miss
+    repeat_lookups = stats['hits'] + stats['misses'] - len(images)
+    return {
+        'hit_rate': stats['hits'] / repeat_lookups if repeat_lookups else 0.0,
+        'agreement': agree / hits_checked if hits_checked else None,
+        'cached': cached_ms,
+        'uncached': uncached_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the perceptual-hash prediction cache')
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--images', type=int, default=300)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--max-collision-rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    images, _ = load_fer_images('test')
+    if len(images) == 0:
+        sys.exit('fer_data/test is empty')
+    rng = np.random.default_rng(0)
+    images = images[rng.permutation(len(images))[:args.images]]
+    model = load_backend(args.backend, ensure_model_file())
+    model.predict(images[:1])
+
+    print(f"{len(images)} faces x {args.repeats} requests, backend {model.name}\n")
+    print(f"{'perturbation':<15} {'hit rate':>9} {'same label':>11} {'p50 ms':>8} {'p50 cached':>11} {'mean speedup':>13}")
+    for name, perturb in PERTURBATIONS.items():
+        r = replay(model, images, perturb, args.repeats)
+        agreement = f"{r['agreement']:.1%}" if r['agreement'] is not None else '-'
+        speedup = np.mean(r['uncached']) / np.mean(r['cached'])
+        print(f"{name:<15} {r['hit_rate']:>9.1%} {agreement:>11} {percentile_ms(r['uncached'], 50):>8.3f} "
+              f"{percentile_ms(r['cached'], 50):>11.3f} {speedup:>12.2f}x")
+
+    hashes = [phash(roi) for roi in images]
+    t0 = time.perf_counter()
+    for roi in images:
+        phash(roi)
+    hash_us = (time.perf_counter() - t0) / len(images) * 1e6
+    collisions = len(hashes) - len(set(hashes))
+    rate = collisions / len(hashes)
+    print(f"\nphash: {hash_us:.0f} us per ROI; {collisions} collisions between {len(hashes)} distinct faces ({rate:.2%})")
+    if rate > args.max_collision_rate:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# bench_rollups.py - /api/stress-stats answered from rollups vs a raw scan of stress_logs
+#
+#   python backend/scripts/seed_stress_logs.py --drop          # once, 1M logs
+#   python backend/scripts/backfill_rollups.py --db stress_detection_bench
+#   python backend/scripts/bench_rollups.py --db stress_detection_bench
+#
+# For per-user and global ranges at both granularities, times query_rollups()
+# (what the endpoint runs) against the equivalent aggregation over the raw
+# logs, and checks that both give the same counts, sums, min/max and emotion
+# histograms; exits with status 1 on any mismatch.
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+from pymongo import MongoClient
+
+import bench_common  # noqa: F401  (puts backend/ on sys.path)
+from bench_common import percentile_ms
+from rollups import GLOBAL_USER_ID, bucket_start, bucket_step, query_rollups, raw_stats_pipeline, summarize
+
+
+def raw_query(logs, user_id, granularity, start, end):
+    match = {'timestamp': {'$gte': bucket_start(start, granularity), '$lt': end}}
+    if user_id != GLOBAL_USER_ID:
+        match['user_id'] = user_id
+    rows = list(logs.aggregate(raw_stats_pipeline(match, granularity) + [{'$sort': {'start': 1}}]))
+    return rows, summarize(rows)
+
+
+def timed(fn, repeats):
+    samples, result = [], None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return samples, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark stress stats from rollups vs raw logs')
+    parser.add_argument('--db', default='stress_detection_bench')
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    db = MongoClient(os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))[args.db]
+    logs, rollups = db['stress_logs'], db['stress_rollups']
+    print(f"{logs.estimated_document_count()} logs, {rollups.estimated_document_count()} rollups")
+    user_id = random.choice(logs.distinct('user_id')[:1000])
+    newest = next(logs.find({}, {'timestamp': 1}).sort('timestamp', -1).limit(1))['timestamp']
+    # whole buckets only, so the raw scan and the rollups cover the same logs
+    end = bucket_start(newest, 'day') + bucket_step('day')
+
+    cases = [
+        ('user, 48h hourly', user_id, 'hour', end - timedelta(hours=48)),
+        ('user, 90d daily', user_id, 'day', end - timedelta(days=90)),
+        ('global, 48h hourly', GLOBAL_USER_ID, 'hour', end - timedelta(hours=48)),
+        ('global, 30d daily', GLOBAL_USER_ID, 'day', end - timedelta(days=30)),
+    ]
+    ok = True
+    print(f"\n{'range':<20} {'source':<8} {'p50 ms':>9} {'p99 ms':>9} {'buckets':>8} {'logs':>8}")
+    for name, uid, granularity, start in cases:
+        raw_samples, (raw_rows, raw_summary) = timed(lambda: raw_query(logs, uid, granularity, start, end),
+                                                     args.repeats)
+        rollup_samples, (buckets, summary) = timed(lambda: query_rollups(rollups, uid, granularity, start, end),
+                                                   args.repeats)
+        for source, samples, n, s in (('raw', raw_samples, len(raw_rows), raw_summary),
+                                      ('rollups', rollup_samples, len(buckets), summary)):
+            print(f"{name:<20} {source:<8} {percentile_ms(samples, 50):>9.2f} {percentile_ms(samples, 99):>9.2f} "
+                  f"{n:>8} {s['count']:>8}")
+        same = (raw_summary == summary and len(raw_rows) == len(buckets))
+        if not same:
+            ok = False
+            print(f"  MISMATCH: raw {raw_summary} vs rollups {summary}")
+
+    print(f"\n{'rollups match the raw logs' if ok else 'rollups differ from the raw logs (re-run the backfill?)'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
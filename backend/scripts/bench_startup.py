@@ -0,0 +1,109 @@
+# bench_startup.py - time to first response and first prediction after a worker (re)start
+#
+#   python backend/scripts/bench_startup.py --runs 3
+#
+# Boots backend/app.py in a subprocess and measures, from process start:
+#   first response     first 200 from /healthz (the server accepts requests)
+#   login              first successful POST /login (auth routes usable)
+#   ready              first 200 from /readyz (model loaded and warmed up)
+#   first prediction   first 200 from /api/detect-stress/roi
+# once with the model loaded in the background (default) and once with
+# MODEL_LOAD_IN_BACKGROUND=0, which loads it before the server starts.
+# Logs in as the environment super-admin so no MongoDB is required (log
+# writes fail in the background without affecting the timings).
+import argparse
+import http.cookiejar
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from bench_common import BACKEND_DIR, ensure_model_file
+
+MODES = {'background': '1', 'blocking': '0'}
+STAGES = ('first response', 'login', 'ready', 'first prediction')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(opener, url, data=None, content_type='application/json'):
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': content_type})
+    try:
+        with opener.open(req, timeout=5) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None, b''
+
+
+def boot(model_path, background, timeout):
+    port = free_port()
+    env = dict(os.environ, MODEL_PATH=model_path, FLASK_PORT=str(port), FLASK_DEBUG='0',
+               MODEL_LOAD_IN_BACKGROUND=background, ADMIN_USERNAME='bench', ADMIN_PASSWORD='bench',
+               MONGO_URI=os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/?serverSelectionTimeoutMS=500'),
+               TF_CPP_MIN_LOG_LEVEL='3')
+    base = f'http://127.0.0.1:{port}'
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    login_body = json.dumps({'username': 'bench', 'password': 'bench'}).encode()
+
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, 'app.py'], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    times = {}
+    try:
+        while len(times) < len(STAGES) and time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f'app.py exited with status {proc.returncode}')
+            if 'first response' not in times:
+                if request(opener, base + '/healthz')[0] == 200:
+                    times['first response'] = time.perf_counter() - t0
+            elif 'login' not in times:
+                if request(opener, base + '/login', login_body)[0] == 200:
+                    times['login'] = time.perf_counter() - t0
+            elif 'ready' not in times:
+                if request(opener, base + '/readyz')[0] == 200:
+                    times['ready'] = time.perf_counter() - t0
+            elif request(opener, base + '/api/detect-stress/roi', bytes(48 * 48),
+                         'application/octet-stream')[0] == 200:
+                times['first prediction'] = time.perf_counter() - t0
+            time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(10)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark app startup: first response vs first prediction')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    model_path = ensure_model_file()
+    # one uncounted boot so the TFLite conversion cache and OS file cache are warm
+    boot(model_path, '1', args.timeout)
+
+    results = {mode: [boot(model_path, flag, args.timeout) for _ in range(args.runs)] for mode, flag in MODES.items()}
+
+    print(f"\nmedian seconds from process start over {args.runs} runs")
+    print(f"{'stage':<18}" + ''.join(f"{mode:>12}" for mode in MODES))
+    for stage in STAGES:
+        row = f"{stage:<18}"
+        for mode in MODES:
+            samples = [r[stage] for r in results[mode] if stage in r]
+            row += f"{statistics.median(samples):>12.2f}" if samples else f"{'timeout':>12}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
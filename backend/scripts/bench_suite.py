@@ -0,0 +1,455 @@
+# bench_suite.py - end-to-end backend benchmarks written as JSON for comparison between commits
+#
+#   python backend/scripts/bench_suite.py --out bench-$(git rev-parse --short HEAD).json
+#   python backend/scripts/bench_suite.py --concurrency 1,8,32 --seconds 10 --baseline bench-main.json
+#
+# Runs against a small test model (MODEL_PATH, or an untrained model of the
+# same architecture) and a local MongoDB stand-in: an in-memory mongomock
+# database unless --mongo-uri points at a real server (the separate
+# "stress_detection_bench" database, which is dropped and reseeded).  Either
+# way the database is seeded with --users users and --logs stress logs.
+#
+#   micro    each stage of /api/detect-stress called in-process on synthetic
+#            webcam frames: json_parse, decode_base64_frame, detect_faces,
+#            analyze_stress_with_model, stress_result (log write) and the whole
+#            view through Flask's test client, with the metrics.stage() timings
+#            recorded inside each call
+#   http     app.py served by a subprocess; for every endpoint and every
+#            --concurrency level, that many keep-alive clients send requests
+#            for --seconds: throughput, latency percentiles and errors for
+#            POST /api/detect-stress, GET /api/stress-logs, POST /login and
+#            GET /api/users
+#   memory   resident and peak memory of the server process and of every
+#            child process (INFERENCE_WORKERS model workers), after startup
+#            and after the load
+#
+# The prediction cache is off (PREDICTION_CACHE_SIZE=0) unless --cache is
+# given, since the few synthetic frames would otherwise all be cache hits.
+# With --baseline the p50 latencies are compared against an earlier result
+# file; the script exits with status 1 if any is more than
+# --max-regression times slower.
+import argparse
+import base64
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bench_common import BACKEND_DIR, ensure_model_file, percentile_ms, synthetic_frame
+
+ADMIN_USERNAME = ADMIN_PASSWORD = 'bench'
+LOGIN_USERNAME, LOGIN_PASSWORD = 'bench_login', 'bench-password'
+BENCH_DB = 'stress_detection_bench'
+ENDPOINTS = ('detect-stress', 'stress-logs', 'login', 'users')
+
+
+def use_mongo_stand_in():
+    # app.py does "from pymongo import MongoClient", so this must run before it is imported
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("❌ mongomock is not installed: pip install mongomock, or pass --mongo-uri")
+    import pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+
+
+def boot_app(n_users, n_logs):
+    """Import app.py with the configured database, seed it and load the model."""
+    if not os.environ.get('MONGO_URI'):
+        use_mongo_stand_in()
+    import app as stress_app
+    from seed_stress_logs import seed
+    from werkzeug.security import generate_password_hash
+
+    flask_app = stress_app.create_app()
+    db = stress_app.db
+    for name in ('users', 'stress_logs', 'stress_rollups'):
+        db[name].drop()
+    seed(db, n_logs, n_users, days=30)
+    db['users'].insert_one({'username': LOGIN_USERNAME, 'password': generate_password_hash(LOGIN_PASSWORD),
+                            'role': 'user', 'created_at': datetime.utcnow()})
+    stress_app.model_loader.wait()
+    return stress_app, flask_app
+
+
+def test_frames(count=8):
+    # synthetic webcam frames in which the configured detector finds a face, as data URLs
+    import cv2
+    from face_detection import create_face_detector
+
+    detector = create_face_detector()
+    frames = []
+    for seed in range(count * 10):
+        frame = synthetic_frame(640, 480, face_size=200, seed=seed)
+        if len(detector.detect(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))) == 0:
+            continue
+        jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes()
+        frames.append('data:image/jpeg;base64,' + base64.b64encode(jpeg).decode())
+        if len(frames) == count:
+            break
+    if not frames:
+        sys.exit("❌ the face detector found no face in the synthetic frames")
+    return frames
+
+
+def summarize(seconds):
+    return {
+        'calls': len(seconds),
+        'mean_ms': round(float(np.mean(seconds)) * 1000, 3) if seconds else None,
+        'p50_ms': round(percentile_ms(seconds, 50), 3),
+        'p90_ms': round(percentile_ms(seconds, 90), 3),
+        'p99_ms': round(percentile_ms(seconds, 99), 3),
+    }
+
+
+# ---------- (a) stage microbenchmarks ----------
+def time_calls(fn, args_list, iterations, warmup=3, returns_timings=False):
+    # -> (seconds per call, {stage: seconds per call} from the metrics.stage() profile);
+    # with returns_timings fn returns the (stage, seconds) list itself (Server-Timing of a request)
+    import metrics
+
+    for i in range(warmup):
+        fn(*args_list[i % len(args_list)])
+    calls, stages = [], {}
+    for i in range(iterations):
+        metrics.start_profile()
+        t0 = time.perf_counter()
+        returned = fn(*args_list[i % len(args_list)])
+        calls.append(time.perf_counter() - t0)
+        timings = metrics.end_profile()
+        totals = {}
+        for name, elapsed in (returned if returns_timings else timings):
+            totals[name] = totals.get(name, 0.0) + elapsed
+        for name, elapsed in totals.items():
+            stages.setdefault(name, []).append(elapsed)
+    return calls, stages
+
+
+def run_micro(stress_app, flask_app, frames, iterations):
+    from frame_decoding import decode_base64_frame
+
+    payloads = [json.dumps({'image': frame}) for frame in frames]
+    grays = [decode_base64_frame(frame) for frame in frames]
+    with_faces = [(gray, stress_app.detect_faces(gray)) for gray in grays]
+    probs = stress_app.predict_emotions([stress_app.preprocess_face(np.zeros((48, 48), np.uint8))])[0]
+
+    client = flask_app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(user_id='bench-micro', username='bench_micro', role='user')
+
+    def detect_stress_view(payload):
+        # the request hooks profile the view themselves when asked with X-Profile
+        resp = client.post('/api/detect-stress', data=payload, content_type='application/json',
+                           headers={'X-Profile': '1'})
+        if resp.status_code != 200:
+            raise RuntimeError(f'/api/detect-stress answered {resp.status_code}')
+        return [(name, float(dur[len('dur='):]) / 1000.0) for name, dur in
+                (part.strip().split(';') for part in resp.headers.get('Server-Timing', '').split(',') if part)]
+
+    cases = {  # name -> (function, argument tuples cycled through)
+        'json_parse': (json.loads, [(p,) for p in payloads]),
+        'decode_base64_frame': (decode_base64_frame, [(f,) for f in frames]),
+        'detect_faces': (stress_app.detect_faces, [(g,) for g in grays]),
+        'analyze_stress_with_model': (stress_app.analyze_stress_with_model, with_faces),
+        'stress_result': (stress_app.stress_result, [('bench-micro', 'bench_micro', 50, 'Neutral', probs)]),
+        'detect_stress (view)': (detect_stress_view, [(p,) for p in payloads]),
+    }
+    results = {}
+    for name, (fn, args_list) in cases.items():
+        calls, stages = time_calls(fn, args_list, iterations, returns_timings=fn is detect_stress_view)
+        results[name] = dict(summarize(calls),
+                             stages={stage: round(percentile_ms(s, 50), 3) for stage, s in stages.items()})
+        print(f"  {name:<27} p50 {results[name]['p50_ms']:>8.3f} ms  p99 {results[name]['p99_ms']:>8.3f} ms  "
+              + ' '.join(f"{k}={v}" for k, v in results[name]['stages'].items()))
+    return results
+
+
+# ---------- (b) HTTP load ----------
+def free_port():
+    import socket
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def boot_server(args, log_path, timeout):
+    port = free_port()
+    cmd = [sys.executable, os.path.abspath(__file__), '--serve', str(port),
+           '--users', str(args.users), '--logs', str(args.logs)]
+    log = open(log_path, 'w')
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with status {proc.returncode}, see {log_path}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/readyz')
+            if conn.getresponse().status == 200:
+                return proc, port
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise TimeoutError(f'server not ready within {timeout}s, see {log_path}')
+
+
+def login_cookie(port, username, password):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request('POST', '/login', json.dumps({'username': username, 'password': password}),
+                 {'Content-Type': 'application/json'})
+    resp = conn.getresponse()
+    if not json.loads(resp.read()).get('success'):
+        raise RuntimeError(f'login as {username} failed')
+    return resp.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def endpoint_requests(port, frames):
+    # endpoint -> (method, path, body for request i, headers)
+    admin = {'Cookie': login_cookie(port, ADMIN_USERNAME, ADMIN_PASSWORD)}
+    as_json = {'Content-Type': 'application/json'}
+    detect_bodies = [json.dumps({'image': f}) for f in frames]
+    login_body = json.dumps({'username': LOGIN_USERNAME, 'password': LOGIN_PASSWORD})
+    return {
+        'detect-stress': ('POST', '/api/detect-stress', lambda i: detect_bodies[i % len(detect_bodies)],
+                          dict(admin, **as_json)),
+        'stress-logs': ('GET', '/api/stress-logs', lambda i: None, admin),
+        'login': ('POST', '/login', lambda i: login_body, as_json),
+        'users': ('GET', '/api/users', lambda i: None, admin),
+    }
+
+
+def http_load(port, request, concurrency, seconds):
+    method, path, body, headers = request
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    statuses = [{} for _ in range(concurrency)]  # HTTP status (or 'error') -> responses
+    start_at = time.perf_counter() + 0.2
+    end_at = start_at + seconds
+
+    def client(k):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        i = k
+        while time.perf_counter() < start_at:
+            time.sleep(0.001)
+        while time.perf_counter() < end_at:
+            t0 = time.perf_counter()
+            try:
+                conn.request(method, path, body(i), headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                status = str(resp.status)
+                ok = resp.status == 200 and json.loads(data).get('success', True)
+            except (OSError, http.client.HTTPException, ValueError):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status, ok = 'error', False
+            latencies[k].append(time.perf_counter() - t0)
+            statuses[k][status] = statuses[k].get(status, 0) + 1
+            errors[k] += not ok
+            i += concurrency
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start_at
+    samples = [x for per_client in latencies for x in per_client]
+    status_counts = {}
+    for per_client in statuses:
+        for status, n in per_client.items():
+            status_counts[status] = status_counts.get(status, 0) + n
+    return dict(summarize(samples), concurrency=concurrency, requests_per_s=round(len(samples) / elapsed, 1),
+                errors=sum(errors), statuses=status_counts, max_ms=round(max(samples) * 1000, 3) if samples else None)
+
+
+# ---------- (c) memory ----------
+def _proc_status(pid):
+    values = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('VmRSS', 'VmHWM'):
+                values[key] = int(rest.split()[0]) / 1024.0  # kB -> MiB
+    return values
+
+
+def _children(pid):
+    kids = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        try:
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                kids.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return kids
+
+
+def process_memory(pid):
+    # RSS and peak RSS (MiB) of the server and every descendant; Linux /proc only
+    if not os.path.isdir('/proc'):
+        return None
+    result, pending = {}, [(pid, 'server')]
+    while pending:
+        p, role = pending.pop()
+        try:
+            status = _proc_status(p)
+            with open(f'/proc/{p}/cmdline', 'rb') as f:
+                cmd = f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+        except OSError:
+            continue
+        if 'resource_tracker' in cmd:
+            role = 'helper'
+        result[str(p)] = {'role': role, 'rss_mb': round(status.get('VmRSS', 0.0), 1),
+                          'peak_rss_mb': round(status.get('VmHWM', 0.0), 1), 'cmd': cmd[:120]}
+        # multiprocessing's resource tracker is a child too, but holds no model
+        pending.extend((child, 'worker') for child in _children(p))
+    return result
+
+
+# ---------- baseline comparison ----------
+def compare(baseline, current, max_regression):
+    rows = []
+    for name, stats in current.get('micro', {}).items():
+        old = baseline.get('micro', {}).get(name)
+        if old and old.get('p50_ms'):
+            rows.append((f'micro {name}', old['p50_ms'], stats['p50_ms']))
+    for endpoint, levels in current.get('http', {}).items():
+        for level, stats in levels.items():
+            old = baseline.get('http', {}).get(endpoint, {}).get(level)
+            if old and old.get('p50_ms'):
+                rows.append((f'http {endpoint} c={level}', old['p50_ms'], stats['p50_ms']))
+    regressed = False
+    print(f"\n{'p50 vs baseline':<40} {'before ms':>10} {'now ms':>10} {'ratio':>7}")
+    for name, before, now in rows:
+        ratio = now / before
+        flag = ' <-- slower' if ratio > max_regression else ''
+        regressed |= ratio > max_regression
+        print(f"{name:<40} {before:>10.3f} {now:>10.3f} {ratio:>6.2f}x{flag}")
+    return regressed
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def serve(args):
+    stress_app, flask_app = boot_app(args.users, args.logs)
+    print(f"serving on 127.0.0.1:{args.serve}", flush=True)
+    flask_app.run(host='127.0.0.1', port=args.serve, threaded=True, debug=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark backend stages, HTTP endpoints and memory as JSON')
+    parser.add_argument('--out', default='bench-results.json')
+    parser.add_argument('--mongo-uri', default=None, help='real MongoDB instead of the in-memory stand-in')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--logs', type=int, default=20000)
+    parser.add_argument('--iterations', type=int, default=200, help='calls per microbenchmark')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrent clients')
+    parser.add_argument('--seconds', type=float, default=5, help='duration of each HTTP run')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    parser.add_argument('--inference-workers', type=int, default=None, help='sets INFERENCE_WORKERS')
+    parser.add_argument('--cache', action='store_true', help='keep the prediction cache on')
+    parser.add_argument('--skip', default='', help='comma-separated phases to skip: micro,http,memory')
+    parser.add_argument('--baseline', help='earlier result file to compare p50 latencies with')
+    parser.add_argument('--max-regression', type=float, default=1.5)
+    parser.add_argument('--boot-timeout', type=float, default=180)
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)  # internal: run the server on this port
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    # app.py reads its configuration at import time, in this process and in the server
+    os.environ.update(MODEL_PATH=ensure_model_file(), ADMIN_USERNAME=ADMIN_USERNAME, ADMIN_PASSWORD=ADMIN_PASSWORD,
+                      DB_NAME=BENCH_DB, FLASK_DEBUG='0', TF_CPP_MIN_LOG_LEVEL='3')
+    if args.mongo_uri:
+        os.environ['MONGO_URI'] = args.mongo_uri
+    else:
+        os.environ.pop('MONGO_URI', None)
+    if not args.cache:
+        os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    if args.inference_workers is not None:
+        os.environ['INFERENCE_WORKERS'] = str(args.inference_workers)
+    skip = set(filter(None, args.skip.split(',')))
+    levels = [int(c) for c in args.concurrency.split(',')]
+    endpoints = [e for e in args.endpoints.split(',') if e]
+    frames = test_frames()
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'time': datetime.utcnow().isoformat() + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_cores': os.cpu_count(),
+            'model': os.environ['MODEL_PATH'],
+            'database': 'mongodb' if args.mongo_uri else 'mongomock',
+            'settings': {k: v for k, v in vars(args).items() if k not in ('serve', 'out', 'baseline')},
+        },
+    }
+
+    if 'micro' not in skip:
+        print(f"Stage microbenchmarks ({args.iterations} calls each)")
+        stress_app, flask_app = boot_app(args.users, args.logs)
+        results['micro'] = run_micro(stress_app, flask_app, frames, args.iterations)
+
+    if not {'http', 'memory'} <= skip:
+        log_path = os.path.join(tempfile.mkdtemp(prefix='stress-bench-'), 'server.log')
+        proc, port = boot_server(args, log_path, args.boot_timeout)
+        try:
+            if 'memory' not in skip:
+                results['memory'] = {'after_startup': process_memory(proc.pid)}
+            if 'http' not in skip:
+                print(f"\nHTTP load ({args.seconds:g}s per run, {os.cpu_count()} CPU cores, server log {log_path})")
+                print(f"{'endpoint':<15} {'clients':>7} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} "
+                      f"{'p99 ms':>9} {'errors':>7}")
+                requests = endpoint_requests(port, frames)
+                results['http'] = {}
+                for endpoint in endpoints:
+                    for concurrency in levels:
+                        stats = http_load(port, requests[endpoint], concurrency, args.seconds)
+                        results['http'].setdefault(endpoint, {})[str(concurrency)] = stats
+                        print(f"{endpoint:<15} {concurrency:>7} {stats['requests_per_s']:>8.1f} "
+                              f"{stats['p50_ms']:>9.2f} {stats['p90_ms']:>9.2f} {stats['p99_ms']:>9.2f} "
+                              f"{stats['errors']:>7}")
+            if 'memory' not in skip:
+                results['memory']['after_load'] = process_memory(proc.pid)
+                print("\nMemory (MiB)")
+                for pid, info in (results['memory']['after_load'] or {}).items():
+                    startup = (results['memory']['after_startup'] or {}).get(pid, {})
+                    print(f"  {info['role']:<7} pid {pid:<8} rss {info['rss_mb']:>7.1f}  peak {info['peak_rss_mb']:>7.1f}"
+                          f"  (after startup {startup.get('rss_mb', '-')})")
+        finally:
+            proc.terminate()
+            proc.wait(10)
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {os.path.abspath(args.out)}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(json.load(f), results, args.max_regression):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# bench_upload.py - bytes on the wire and server CPU per request for each upload protocol
+#
+#   python backend/scripts/bench_upload.py --iterations 200
+#
+# Frames are JPEG-encoded at quality 0.8 like canvas.toDataURL/toBlob in
+# stress-detection.js.  The first table covers request parsing and decoding
+# the frame to grayscale (JSON/base64 vs binary).  The second adds the Haar
+# face detection a full frame needs and compares it with a client-cropped
+# 48x48 ROI upload, which the server only reshapes.
+import argparse
+import base64
+import json
+import time
+
+import cv2
+import numpy as np
+
+from bench_common import synthetic_frame
+from frame_decoding import decode_base64_frame, decode_image_gray
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+FACE_CASCADE = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+
+def cpu_ms_per_call(fn, payload, iterations):
+    fn(payload)
+    t0 = time.process_time()
+    for _ in range(iterations):
+        fn(payload)
+    return (time.process_time() - t0) * 1000.0 / iterations
+
+
+def json_path(body):
+    return decode_base64_frame(json.loads(body)['image'])
+
+
+def binary_with_detection(payload):
+    gray = decode_image_gray(payload)
+    return FACE_CASCADE.detectMultiScale(gray, 1.3, 5)
+
+
+def roi_path(payload):
+    return np.frombuffer(payload, dtype=np.uint8).reshape(48, 48)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON/base64, binary frame and ROI uploads')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--quality', type=int, default=80)
+    args = parser.parse_args()
+
+    frames = {}
+    print(f"{'frame':>10} {'json bytes':>11} {'binary bytes':>13} {'saved':>7} "
+          f"{'json cpu ms':>12} {'binary cpu ms':>14}")
+    for width, height in RESOLUTIONS:
+        frame = synthetic_frame(width, height, face_size=height // 2)
+        _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+        jpeg = jpeg.tobytes()
+        frames[(width, height)] = jpeg
+        body = json.dumps({'image': 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode()}).encode()
+
+        json_cpu = cpu_ms_per_call(json_path, body, args.iterations)
+        binary_cpu = cpu_ms_per_call(decode_image_gray, jpeg, args.iterations)
+        saved = 1.0 - len(jpeg) / len(body)
+        print(f"{width}x{height:<5} {len(body):>11} {len(jpeg):>13} {saved:>7.1%} "
+              f"{json_cpu:>12.3f} {binary_cpu:>14.3f}")
+
+    roi = np.zeros((48, 48), dtype=np.uint8).tobytes()
+    roi_cpu = cpu_ms_per_call(roi_path, roi, args.iterations)
+    print(f"\n{'frame':>10} {'frame bytes':>12} {'roi bytes':>10} {'frame+detect cpu ms':>20} {'roi cpu ms':>11}")
+    for (width, height), jpeg in frames.items():
+        frame_cpu = cpu_ms_per_call(binary_with_detection, jpeg, max(1, args.iterations // 10))
+        print(f"{width}x{height:<5} {len(jpeg):>12} {len(roi):>10} {frame_cpu:>20.3f} {roi_cpu:>11.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+# check_export_memory.py - the stress log export streams in bounded memory
+#
+#   python backend/scripts/check_export_memory.py --rows 300000
+#
+# Streams the export endpoint's Response (NDJSON and CSV) over a synthetic
+# collection whose cursor generates documents lazily in batches, the way a
+# MongoDB cursor does, and measures peak Python heap allocations with
+# tracemalloc.  The export is run at --rows and at a tenth of that: if peak
+# memory grows with the row count (or exceeds --max-peak-mb), or any row is
+# missing from the output, the script exits with status 1.
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import Flask
+
+import bench_common  # noqa: F401  (puts backend/ on sys.path)
+from log_export import export_response, parse_export_args
+
+EMOTIONS = ['Angry', 'Disgust', 'Fear', 'Happy', 'Sad', 'Surprise', 'Neutral']
+
+
+class LazyCursor:
+    # Yields documents batch_size at a time and forgets them, like a
+    # server-side cursor; nothing for all rows is ever held at once
+    def __init__(self, n_rows, batch_size):
+        self.n_rows = n_rows
+        self.batch_size = batch_size
+        self.closed = False
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        start = datetime(2025, 1, 1)
+        for first in range(0, self.n_rows, self.batch_size):
+            batch = [{
+                '_id': ObjectId(),
+                'user_id': f'user-{i % 2000}',
+                'username': f'user_{i % 2000}',
+                'stress_level': i % 101,
+                'smoothed_stress_level': (i * 7) % 101,
+                'detected_emotion': EMOTIONS[i % len(EMOTIONS)],
+                'timestamp': start + timedelta(seconds=i),
+            } for i in range(first, min(first + self.batch_size, self.n_rows))]
+            yield from batch
+
+
+class LazyCollection:
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self.cursors = []
+
+    def find(self, query, projection, batch_size=1000):
+        cursor = LazyCursor(self.n_rows, batch_size)
+        self.cursors.append(cursor)
+        return cursor
+
+
+def stream_export(n_rows, fmt, batch_size):
+    app = Flask(__name__)
+    collection = LazyCollection(n_rows)
+    with app.test_request_context(f'/api/stress-logs/export?format={fmt}'):
+        from flask import request
+        fmt, columns, query = parse_export_args(request.args)
+        response = export_response(collection, fmt, columns, query, batch_size=batch_size)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    rows, size = 0, 0
+    header = None
+    for chunk in response.response:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        size += len(text)
+        if fmt == 'csv':
+            for row in csv.reader(io.StringIO(text)):
+                if header is None:
+                    header = row
+                else:
+                    rows += 1
+        else:
+            for line in text.splitlines():
+                json.loads(line)
+                rows += 1
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, size, peak, elapsed, all(c.closed for c in collection.cursors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the stress log export streams in bounded memory')
+    parser.add_argument('--rows', type=int, default=300_000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--max-peak-mb', type=float, default=8.0)
+    args = parser.parse_args()
+
+    ok = True
+    print(f"{'format':<7} {'rows':>8} {'MB out':>8} {'peak MB':>8} {'rows/s':>9}")
+    for fmt in ('ndjson', 'csv'):
+        peaks = []
+        for n in (args.rows // 10, args.rows):
+            rows, size, peak, elapsed, closed = stream_export(n, fmt, args.batch_size)
+            peaks.append(peak)
+            print(f"{fmt:<7} {rows:>8} {size / 1e6:>8.1f} {peak / 1e6:>8.2f} {rows / elapsed:>9.0f}")
+            if rows != n or not closed:
+                print(f"  FAIL: exported {rows}/{n} rows, cursor closed: {closed}")
+                ok = False
+        small, large = peaks
+        if large > args.max_peak_mb * 1e6 or large > 2 * small + 1e6:
+            print(f"  FAIL: peak memory grows with export size ({small / 1e6:.2f} -> {large / 1e6:.2f} MB)")
+            ok = False
+
+    print('\nexport memory is bounded' if ok else '\nexport memory check FAILED')
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
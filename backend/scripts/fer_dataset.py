@@ -0,0 +1,240 @@
+# fer_dataset.py - decode fer_data once into uint8 arrays and feed training with tf.data
+#
+#   python backend/scripts/fer_dataset.py                     # prepare train + test
+#   python backend/scripts/fer_dataset.py --data-dir /data/fer --force
+#
+# Preparation decodes every image of <data-dir>/<split>/<class>/ in parallel
+# to 48x48 grayscale and writes <data-dir>/prepared/<split>_images.npy
+# (uint8, N x 48 x 48 x 1, ~2.3 KB per face) and <split>_labels.npy (uint8),
+# plus meta.json with the class order and, per split, the image count and
+# newest file time.  load_split() memory-maps the arrays and re-runs the
+# preparation when the source folders changed.
+#
+# Classes are indexed in sorted folder order (angry, disgust, fear, happy,
+# neutral, sad, surprise), the order image_dataset_from_directory and
+# flow_from_directory use; meta.json records it.
+#
+# train_dataset() builds the training input: uint8 faces held in memory,
+# reshuffled every epoch, batched, then augmented a whole batch at a time
+# with one random affine transform per image (rotation, shift, shear, zoom,
+# horizontal flip, the same ranges as the old ImageDataGenerator) on
+# parallel map calls, normalized to [0, 1] and prefetched.  eval_dataset()
+# caches the normalized batches after the first pass.  Augmentation
+# uses stateless random ops seeded from a seeded random stream, so a given
+# seed reproduces the same epochs.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bench_common import DATA_DIR
+
+IMG_SIZE = 48
+SPLITS = ('train', 'test')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+PREPARED_DIRNAME = 'prepared'
+
+# ImageDataGenerator ranges previously used by train_model.py
+AUGMENT = {
+    'rotation_deg': 20.0,
+    'shift': 0.2,      # fraction of width / height
+    'shear_deg': 0.2,  # ImageDataGenerator's shear_range is in degrees
+    'zoom': 0.2,
+    'horizontal_flip': True,
+}
+
+
+def class_names(data_dir, split='train'):
+    split_dir = os.path.join(data_dir, split)
+    return sorted(d for d in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, d)))
+
+
+def _list_images(data_dir, split, classes):
+    paths, labels = [], []
+    for label, cls in enumerate(classes):
+        folder = os.path.join(data_dir, split, cls)
+        if not os.path.isdir(folder):
+            continue
+        for fname in sorted(os.listdir(folder)):
+            if fname.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(folder, fname))
+                labels.append(label)
+    return paths, labels
+
+
+def _source_signature(paths):
+    return {'count': len(paths), 'newest_mtime': max((os.path.getmtime(p) for p in paths), default=0.0)}
+
+
+def _decode(path):
+    import cv2
+
+    gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+    if gray.shape != (IMG_SIZE, IMG_SIZE):
+        gray = cv2.resize(gray, (IMG_SIZE, IMG_SIZE), interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def prepare(data_dir=DATA_DIR, splits=SPLITS, workers=None):
+    """Decode every split into <data_dir>/prepared; returns the written meta dict."""
+    out_dir = os.path.join(data_dir, PREPARED_DIRNAME)
+    os.makedirs(out_dir, exist_ok=True)
+    classes = class_names(data_dir)
+    meta = {'classes': classes, 'image_size': IMG_SIZE, 'splits': {}}
+
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for split in splits:
+            if not os.path.isdir(os.path.join(data_dir, split)):
+                continue
+            paths, labels = _list_images(data_dir, split, classes)
+            decoded = list(pool.map(_decode, paths))
+            keep = [i for i, img in enumerate(decoded) if img is not None]
+            if len(keep) < len(paths):
+                print(f"⚠️  {split}: skipped {len(paths) - len(keep)} unreadable images")
+            images = np.stack([decoded[i] for i in keep])[..., np.newaxis] if keep else \
+                np.zeros((0, IMG_SIZE, IMG_SIZE, 1), np.uint8)
+            np.save(os.path.join(out_dir, f'{split}_images.npy'), images)
+            np.save(os.path.join(out_dir, f'{split}_labels.npy'), np.asarray([labels[i] for i in keep], np.uint8))
+            meta['splits'][split] = _source_signature(paths)
+
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def _is_stale(data_dir, meta, split):
+    if split not in meta.get('splits', {}) or meta.get('classes') != class_names(data_dir):
+        return True
+    paths, _ = _list_images(data_dir, split, meta['classes'])
+    return _source_signature(paths) != meta['splits'][split]
+
+
+def load_split(split, data_dir=DATA_DIR, refresh=True):
+    """-> (images uint8 memmap (N, 48, 48, 1), labels uint8 (N,), class names)."""
+    out_dir = os.path.join(data_dir, PREPARED_DIRNAME)
+    meta_path = os.path.join(out_dir, 'meta.json')
+    meta = {}
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+    if refresh and _is_stale(data_dir, meta, split):
+        print(f"Preparing {data_dir} (decoding images once)...")
+        meta = prepare(data_dir)
+    images = np.load(os.path.join(out_dir, f'{split}_images.npy'), mmap_mode='r')
+    labels = np.load(os.path.join(out_dir, f'{split}_labels.npy'))
+    return images, labels, meta['classes']
+
+
+# ---------- tf.data ----------
+def random_affine(images, seed, rotation_deg=20.0, shift=0.2, shear_deg=0.2, zoom=0.2, horizontal_flip=True):
+    """One random affine transform per image of a float (B, H, W, C) batch; seed: int64 [2]."""
+    import tensorflow as tf
+
+    batch = tf.shape(images)[0]
+    h = tf.cast(tf.shape(images)[1], tf.float32)
+    w = tf.cast(tf.shape(images)[2], tf.float32)
+    seeds = tf.random.experimental.stateless_split(seed, 7)
+
+    def uniform(i, limit):
+        return tf.random.stateless_uniform([batch], seeds[i], -limit, limit)
+
+    theta = uniform(0, rotation_deg * np.pi / 180.0)
+    shear = uniform(1, shear_deg * np.pi / 180.0)
+    zx = 1.0 + uniform(2, zoom)
+    zy = 1.0 + uniform(3, zoom)
+    tx = uniform(4, shift) * w
+    ty = uniform(5, shift) * h
+    # flip = mirror the output x coordinate around the center
+    flip = (tf.where(tf.random.stateless_uniform([batch], seeds[6]) < 0.5, -1.0, 1.0)
+            if horizontal_flip else tf.ones([batch]))
+
+    # output -> input mapping around the image center: A = R(theta) . Shear . Zoom . Flip
+    cos, sin = tf.cos(theta), tf.sin(theta)
+    a00 = (cos * zx) * flip
+    a01 = (-sin * tf.cos(shear) - cos * tf.sin(shear)) * zy
+    a10 = (sin * zx) * flip
+    a11 = (cos * tf.cos(shear) - sin * tf.sin(shear)) * zy
+    cx, cy = (w - 1) / 2, (h - 1) / 2
+    a02 = cx - a00 * cx - a01 * cy + tx
+    a12 = cy - a10 * cx - a11 * cy + ty
+    zeros = tf.zeros([batch])
+    transforms = tf.stack([a00, a01, a02, a10, a11, a12, zeros, zeros], axis=1)
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=tf.shape(images)[1:3],
+        fill_value=0.0, interpolation='BILINEAR', fill_mode='NEAREST')
+
+
+def _normalize(images):
+    import tensorflow as tf
+
+    return tf.cast(images, tf.float32) / 255.0
+
+
+def train_dataset(images, labels, batch_size=32, seed=0, augment=True, shuffle_buffer=None, num_classes=None):
+    """Shuffled, augmented, normalized (B, 48, 48, 1) float32 batches; one-hot labels if num_classes."""
+    import tensorflow as tf
+
+    AUTOTUNE = tf.data.AUTOTUNE
+    ds = tf.data.Dataset.from_tensor_slices((np.asarray(images), np.asarray(labels)))
+    ds = ds.shuffle(shuffle_buffer or len(labels), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    if augment:
+        # one seed per batch from a stream that changes every epoch (rerandomize) but is fixed by seed
+        seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True).batch(2)
+        ds = tf.data.Dataset.zip((ds, seeds)).map(
+            lambda batch, s: (random_affine(_normalize(batch[0]), s, **AUGMENT), batch[1]),
+            num_parallel_calls=AUTOTUNE, deterministic=True)
+    else:
+        ds = ds.map(lambda x, y: (_normalize(x), y), num_parallel_calls=AUTOTUNE)
+    if num_classes:
+        ds = ds.map(lambda x, y: (x, tf.one_hot(tf.cast(y, tf.int32), num_classes)), num_parallel_calls=AUTOTUNE)
+    return ds.prefetch(AUTOTUNE)
+
+
+def eval_dataset(images, labels, batch_size=32, num_classes=None):
+    """Normalized batches in file order, cached after the first pass."""
+    import tensorflow as tf
+
+    AUTOTUNE = tf.data.AUTOTUNE
+    ds = tf.data.Dataset.from_tensor_slices((np.asarray(images), np.asarray(labels))).batch(batch_size)
+    ds = ds.map(lambda x, y: (_normalize(x), y), num_parallel_calls=AUTOTUNE)
+    if num_classes:
+        ds = ds.map(lambda x, y: (x, tf.one_hot(tf.cast(y, tf.int32), num_classes)), num_parallel_calls=AUTOTUNE)
+    return ds.cache().prefetch(AUTOTUNE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode fer_data once into uint8 .npy arrays for training')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='rebuild even if the prepared arrays are current')
+    args = parser.parse_args()
+
+    meta_path = os.path.join(args.data_dir, PREPARED_DIRNAME, 'meta.json')
+    if not args.force and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if not any(_is_stale(args.data_dir, meta, s) for s in SPLITS if os.path.isdir(os.path.join(args.data_dir, s))):
+            print(f"{meta_path} is up to date (use --force to rebuild)")
+            return
+
+    if not os.path.isdir(os.path.join(args.data_dir, 'train')):
+        sys.exit(f"❌ {args.data_dir}/train not found (expected <data-dir>/<split>/<class>/*.jpg)")
+    start = time.perf_counter()
+    meta = prepare(args.data_dir, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    total = sum(s['count'] for s in meta['splits'].values())
+    print(f"✅ Decoded {total} images in {elapsed:.2f}s into {os.path.join(args.data_dir, PREPARED_DIRNAME)}")
+    for split, info in meta['splits'].items():
+        print(f"   {split}: {info['count']} images")
+    print(f"   classes: {', '.join(meta['classes'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+# load_test_stream.py - many concurrent continuous-analysis clients against a local server
+#
+#   python backend/scripts/load_test_stream.py --clients 1,8,32 --seconds 20
+#   python backend/scripts/load_test_stream.py --url http://127.0.0.1:5000 --username u --password p
+#
+# Each simulated client logs in, opens a stream (POST /api/stream), reads its
+# SSE channel on one connection and pushes JPEG frames (synthetic webcam
+# frames with fer_data faces) on another, either paced by the server's
+# suggested_interval_ms (--fps 0, what the browser does) or at a fixed rate to
+# outrun inference on purpose.  Reported per client count: frames sent and
+# results received per second, the share of frames the server dropped in
+# favour of newer ones, how long the analyzed frame waited on the server
+# (queue_ms) and frame-to-result latency.  Without --url, backend/app.py is
+# started on a free port with an environment super-admin; no MongoDB is
+# required (log writes fail in the background).  With many streams the wait
+# is one turn of the shared workers, but it must stay flat over a run: the
+# script exits with status 1 if a client receives no results or the median
+# wait in the last third of a run is more than --max-queue-growth times
+# that of the first third (frames piling up instead of being dropped).
+import argparse
+import http.client
+import http.cookiejar
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import cv2
+
+from bench_common import BACKEND_DIR, ensure_model_file, percentile_ms, synthetic_frame
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def boot_server(timeout):
+    port = free_port()
+    env = dict(os.environ, MODEL_PATH=ensure_model_file(), FLASK_PORT=str(port), FLASK_DEBUG='0',
+               ADMIN_USERNAME='loadtest', ADMIN_PASSWORD='loadtest',
+               MONGO_URI=os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/?serverSelectionTimeoutMS=500'),
+               TF_CPP_MIN_LOG_LEVEL='3')
+    proc = subprocess.Popen([sys.executable, 'app.py'], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'app.py exited with status {proc.returncode}')
+        try:
+            with urllib.request.urlopen(base + '/readyz', timeout=2) as resp:
+                if resp.status == 200:
+                    return proc, base
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise TimeoutError(f'server not ready within {timeout}s')
+
+
+def login(base, username, password):
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    req = urllib.request.Request(base + '/login', json.dumps({'username': username, 'password': password}).encode(),
+                                 headers={'Content-Type': 'application/json'})
+    with opener.open(req, timeout=10) as resp:
+        if not json.loads(resp.read()).get('success'):
+            raise RuntimeError('login failed')
+    return '; '.join(f'{c.name}={c.value}' for c in jar)
+
+
+class StreamClient:
+    def __init__(self, base, cookie, frames, fps, seconds):
+        url = urllib.parse.urlsplit(base)
+        self.host, self.port = url.hostname, url.port
+        self.headers = {'Cookie': cookie}
+        self.frames = frames
+        self.fps = fps
+        self.seconds = seconds
+        self.sent_at = {}
+        self.sent = 0
+        self.results = 0
+        self.latencies = []
+        self.queue_ms = []  # (received at, seconds the analyzed frame waited on the server)
+        self.interval_ms = 100.0
+        self.server_stats = {}
+        self.error = None
+
+    def _conn(self):
+        return http.client.HTTPConnection(self.host, self.port, timeout=30)
+
+    def run(self):
+        try:
+            conn = self._conn()
+            conn.request('POST', '/api/stream', headers=self.headers)
+            opened = json.loads(conn.getresponse().read())
+            if not opened.get('success'):
+                raise RuntimeError(opened.get('message'))
+            self.interval_ms = opened['suggested_interval_ms']
+            reader = threading.Thread(target=self._read_events, args=(opened['events_url'],), daemon=True)
+            reader.start()
+            self._send_frames(conn, opened['frame_url'])
+            conn.request('DELETE', f"/api/stream/{opened['stream_id']}", headers=self.headers)
+            self.server_stats = json.loads(conn.getresponse().read())
+            reader.join(5)
+            conn.close()
+        except Exception as e:
+            self.error = f'{type(e).__name__}: {e}'
+
+    def _send_frames(self, conn, frame_url):
+        headers = dict(self.headers, **{'Content-Type': 'image/jpeg'})
+        end = time.perf_counter() + self.seconds
+        while time.perf_counter() < end:
+            started = time.perf_counter()
+            body = self.frames[self.sent % len(self.frames)]
+            # the server numbers a stream's frames 1, 2, ...; the result may arrive before the 202
+            self.sent_at[self.sent + 1] = started
+            conn.request('POST', frame_url, body=body, headers=headers)
+            conn.getresponse().read()
+            self.sent += 1
+            interval = 1000.0 / self.fps if self.fps > 0 else self.interval_ms
+            time.sleep(max(0.0, interval / 1000.0 - (time.perf_counter() - started)))
+
+    def _read_events(self, events_url):
+        conn = self._conn()
+        conn.request('GET', events_url, headers=self.headers)
+        resp = conn.getresponse()
+        event = None
+        while True:
+            line = resp.readline()
+            if not line:
+                break
+            line = line.decode().rstrip('\n')
+            if line.startswith('event: '):
+                event = line[7:]
+            elif line.startswith('data: ') and event == 'result':
+                data = json.loads(line[6:])
+                self.results += 1
+                self.interval_ms = data['suggested_interval_ms']
+                self.queue_ms.append((time.perf_counter(), data['queue_ms'] / 1000.0))
+                if data['seq'] in self.sent_at:
+                    self.latencies.append(time.perf_counter() - self.sent_at[data['seq']])
+            elif line.startswith('data: ') and event == 'end':
+                break
+        conn.close()
+
+
+def run_load(base, cookie, frames, clients, fps, seconds):
+    workers = [StreamClient(base, cookie, frames, fps, seconds) for _ in range(clients)]
+    threads = [threading.Thread(target=w.run) for w in workers]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(seconds + 60)
+    return workers, start
+
+
+def queue_growth(workers, start, seconds):
+    # median server-side wait in the last third of the run / in the first third
+    waits = [(at - start, wait) for w in workers for at, wait in w.queue_ms]
+    early = sorted(wait for at, wait in waits if at < seconds / 3)
+    late = sorted(wait for at, wait in waits if at > 2 * seconds / 3)
+    if not early or not late:
+        return float('nan')
+    return late[len(late) // 2] / max(early[len(early) // 2], 0.001)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test continuous analysis streams with concurrent clients')
+    parser.add_argument('--url', help='running server; default boots backend/app.py locally')
+    parser.add_argument('--username', default=os.environ.get('ADMIN_USERNAME', 'loadtest'))
+    parser.add_argument('--password', default=os.environ.get('ADMIN_PASSWORD', 'loadtest'))
+    parser.add_argument('--clients', default='1,8,32', help='comma-separated concurrent client counts')
+    parser.add_argument('--fps', type=float, default=0, help='fixed send rate per client; 0 follows the server')
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--max-queue-growth', type=float, default=2.0)
+    parser.add_argument('--boot-timeout', type=float, default=180)
+    args = parser.parse_args()
+
+    proc = None
+    if args.url:
+        base, username, password = args.url.rstrip('/'), args.username, args.password
+    else:
+        proc, base = boot_server(args.boot_timeout)
+        username = password = 'loadtest'
+
+    frames = [cv2.imencode('.jpg', synthetic_frame(640, 480, face_size=200, seed=i),
+                           [cv2.IMWRITE_JPEG_QUALITY, 70])[1].tobytes() for i in range(8)]
+    ok = True
+    try:
+        cookie = login(base, username, password)
+        rate = f'{args.fps:g} fps' if args.fps > 0 else 'adaptive'
+        print(f"{os.cpu_count()} CPU cores, {args.seconds:g}s per run, send rate {rate}\n")
+        print(f"{'clients':>7} {'sent/s':>8} {'results/s':>10} {'dropped':>8} "
+              f"{'queue p99':>10} {'growth':>7} {'lat p50':>8} {'lat p99':>8} {'interval':>9}")
+        for clients in [int(c) for c in args.clients.split(',')]:
+            workers, start = run_load(base, cookie, frames, clients, args.fps, args.seconds)
+            errors = [w.error for w in workers if w.error]
+            sent = sum(w.sent for w in workers)
+            results = sum(w.results for w in workers)
+            dropped = sum(w.server_stats.get('dropped', 0) for w in workers)
+            latencies = [x for w in workers for x in w.latencies]
+            queue_waits = [wait for w in workers for _, wait in w.queue_ms]
+            queue_p99 = percentile_ms(queue_waits, 99) if queue_waits else float('nan')
+            growth = queue_growth(workers, start, args.seconds)
+            print(f"{clients:>7} {sent / args.seconds:>8.1f} {results / args.seconds:>10.1f} "
+                  f"{dropped / sent if sent else 0:>8.1%} {queue_p99:>10.1f} {growth:>6.2f}x "
+                  f"{percentile_ms(latencies, 50) if latencies else float('nan'):>8.1f} "
+                  f"{percentile_ms(latencies, 99) if latencies else float('nan'):>8.1f} "
+                  f"{sum(w.interval_ms for w in workers) / clients:>8.0f}ms")
+            for error in sorted(set(errors)):
+                print(f"  client error: {error}")
+            if errors or any(w.results == 0 for w in workers) or growth > args.max_queue_growth:
+                ok = False
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
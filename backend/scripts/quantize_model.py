@@ -0,0 +1,95 @@
+# quantize_model.py - post-training float16 / int8 variants of emotion_model.h5
+#
+#   python backend/scripts/quantize_model.py --model backend/scripts/emotion_model.h5 --max-accuracy-drop 0.02
+#
+# Writes emotion_model_fp16.tflite and emotion_model_int8.tflite next to the
+# model.  The int8 variant is calibrated on a sample of fer_data/train.  Each
+# variant is scored on fer_data/test and is only kept if its accuracy is no
+# more than --max-accuracy-drop below the float32 model; otherwise it is
+# discarded and the script exits with status 1.
+#
+# Point the backend at a variant with MODEL_PATH=.../emotion_model_int8.tflite
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from bench_common import ensure_model_file, load_fer_images, percentile_ms
+from inference_backends import TFLiteBackend, convert_to_tflite
+from model_metadata import load_metadata
+
+VARIANTS = ('float16', 'int8')
+SUFFIX = {'float16': 'fp16', 'int8': 'int8'}
+
+
+def evaluate(predict, x, y):
+    # per-image latency is what one /api/detect-stress request pays
+    predict(x[:1])
+    latencies = []
+    for i in range(min(len(x), 200)):
+        t0 = time.perf_counter()
+        predict(x[i:i + 1])
+        latencies.append(time.perf_counter() - t0)
+    accuracy = float(np.mean(np.argmax(predict(x), axis=1) == y))
+    return accuracy, percentile_ms(latencies, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantize the emotion model and gate on test accuracy')
+    parser.add_argument('--model', default=None, help='path to emotion_model.h5')
+    parser.add_argument('--variants', nargs='+', choices=sorted(SUFFIX), default=list(VARIANTS))
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.02,
+                        help='largest allowed accuracy loss vs float32, as a fraction (0.02 = 2 points)')
+    parser.add_argument('--calibration-samples', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    model_path = ensure_model_file(args.model)
+    model = load_model(model_path)
+    x_test, y_test = load_fer_images('test', class_labels=load_metadata(model_path)['labels'])
+    x_train, _ = load_fer_images('train')
+
+    rng = np.random.default_rng(args.seed)
+    calib = x_train[rng.permutation(len(x_train))[:args.calibration_samples]]
+
+    def representative_dataset():
+        for i in range(len(calib)):
+            yield [calib[i:i + 1]]
+
+    base_accuracy, base_latency = evaluate(lambda b: model(b, training=False).numpy(), x_test, y_test)
+    rows = [('float32 (.h5)', os.path.getsize(model_path), base_latency, base_accuracy, 'baseline')]
+
+    rejected = []
+    stem = os.path.splitext(model_path)[0]
+    for variant in args.variants:
+        out_path = f"{stem}_{SUFFIX[variant]}.tflite"
+        tmp_path = out_path + '.candidate'
+        convert_to_tflite(model, tmp_path, quantization=variant, representative_dataset=representative_dataset)
+
+        accuracy, latency = evaluate(TFLiteBackend(tmp_path).predict, x_test, y_test)
+        size = os.path.getsize(tmp_path)
+        if base_accuracy - accuracy > args.max_accuracy_drop:
+            os.remove(tmp_path)
+            rejected.append(variant)
+            status = 'REJECTED'
+        else:
+            os.replace(tmp_path, out_path)
+            status = out_path
+        rows.append((variant, size, latency, accuracy, status))
+
+    print(f"\n{'variant':<14} {'size KB':>9} {'p50 ms/img':>11} {'accuracy':>9}  result")
+    for name, size, latency, accuracy, status in rows:
+        print(f"{name:<14} {size / 1024:>9.1f} {latency:>11.3f} {accuracy:>9.4f}  {status}")
+
+    if rejected:
+        print(f"\n❌ Accuracy dropped more than {args.max_accuracy_drop:.4f} for: {', '.join(rejected)}")
+        sys.exit(1)
+    print("\n✅ All variants within the accuracy threshold")
+
+
+if __name__ == '__main__':
+    main()
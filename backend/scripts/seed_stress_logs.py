@@ -0,0 +1,70 @@
+# seed_stress_logs.py - fill a MongoDB database with synthetic users and stress logs
+#
+#   python backend/scripts/seed_stress_logs.py --logs 1000000 --users 2000 --db stress_detection_bench
+#
+# Uses MONGO_URI like the app.  The default database is a separate
+# "stress_detection_bench" so the real data is never touched; pass --drop to
+# start from empty collections.
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+EMOTIONS = {'Angry': 85, 'Disgust': 75, 'Fear': 80, 'Sad': 65, 'Surprise': 50, 'Neutral': 40, 'Happy': 25}
+
+
+def seed(db, n_logs, n_users, days, batch_size=10000, seed_value=0):
+    rng = random.Random(seed_value)
+    users = [{'_id': f'bench-user-{i}', 'username': f'bench_user_{i}', 'password': '!', 'role': 'user',
+              'created_at': datetime.utcnow()} for i in range(n_users)]
+    db['users'].insert_many(users, ordered=False)
+
+    now = datetime.utcnow()
+    span_s = days * 86400
+    emotions = list(EMOTIONS)
+    inserted = 0
+    t0 = time.perf_counter()
+    while inserted < n_logs:
+        batch = []
+        for _ in range(min(batch_size, n_logs - inserted)):
+            user = users[rng.randrange(n_users)]
+            emotion = rng.choice(emotions)
+            level = max(0, min(100, EMOTIONS[emotion] + rng.randint(-5, 5)))
+            batch.append({
+                'user_id': user['_id'],
+                'username': user['username'],
+                'stress_level': level,
+                'smoothed_stress_level': level,
+                'detected_emotion': emotion,
+                'timestamp': now - timedelta(seconds=rng.uniform(0, span_s)),
+            })
+        db['stress_logs'].insert_many(batch, ordered=False)
+        inserted += len(batch)
+        print(f"\r{inserted}/{n_logs} logs ({inserted / (time.perf_counter() - t0):.0f}/s)", end='', flush=True)
+    print()
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed synthetic users and stress logs')
+    parser.add_argument('--logs', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--db', default='stress_detection_bench')
+    parser.add_argument('--drop', action='store_true', help='drop users/stress_logs first')
+    args = parser.parse_args()
+
+    client = MongoClient(os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client[args.db]
+    if args.drop:
+        db['users'].drop()
+        db['stress_logs'].drop()
+    seed(db, args.logs, args.users, args.days)
+    print(f"✅ Seeded {args.logs} logs for {args.users} users into {args.db}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+# train.py - train the emotion model on fer_data and write it with its metadata
+#
+#   python backend/scripts/train.py                                  # defaults below
+#   python backend/scripts/train.py --arch deep --epochs 40 --mixed-precision
+#   python backend/scripts/train.py --config train.json --resume     # continue an interrupted run
+#
+# Input comes from fer_dataset.py (fer_data decoded once into uint8 arrays,
+# augmented on the fly with tf.data); the model is validated on
+# <data-dir>/test.  Outputs:
+#   --output             the best model by val_accuracy (default scripts/emotion_model.h5)
+#                        plus <stem>.meta.json: label order, input shape and
+#                        normalization, read by app.py (see model_metadata.py)
+#   --run-dir            history.csv (per epoch, appended on --resume),
+#                        metrics.json (final and per-class test accuracy,
+#                        settings), curves.png if matplotlib is installed, and
+#                        backup/ with the state --resume continues from
+#
+# --config takes a JSON object with any of the options below (dashes or
+# underscores); options given on the command line win.  --seed fixes weight
+# initialization, shuffling and augmentation; with --deterministic TensorFlow
+# also uses deterministic kernels (slower), so a rerun reproduces the same
+# model on the same machine.  --mixed-precision computes in float16 on a GPU
+# and bfloat16 on the CPU (float16 is emulated there); the saved model is
+# float32 either way.
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from bench_common import DATA_DIR, DEFAULT_MODEL_PATH, SCRIPTS_DIR
+from inference_backends import _import_tf, set_thread_counts
+from model_metadata import write_metadata
+import fer_dataset
+
+ARCHITECTURES = ('small', 'deep')
+
+DEFAULTS = {
+    'data_dir': DATA_DIR,
+    'arch': 'small',
+    'epochs': 25,
+    'batch_size': 32,
+    'lr': 1e-4,
+    'augment': True,
+    'mixed_precision': False,
+    'intra_op_threads': None,
+    'inter_op_threads': None,
+    'seed': 0,
+    'deterministic': False,
+    'patience': 5,
+    'output': DEFAULT_MODEL_PATH,
+    'run_dir': os.path.join(SCRIPTS_DIR, 'runs', 'latest'),
+}
+
+
+def build_model(arch, num_classes, input_shape=(fer_dataset.IMG_SIZE, fer_dataset.IMG_SIZE, 1)):
+    # small: the CNN of the former fer.py; deep: train_model.py's, with a third conv block
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Activation, Conv2D, MaxPooling2D, Flatten, Dense, Dropout, Input
+
+    if arch == 'small':
+        features = [
+            Conv2D(64, (3, 3), activation='relu'),
+            MaxPooling2D(2, 2),
+            Conv2D(128, (3, 3), activation='relu'),
+            MaxPooling2D(2, 2),
+            Dropout(0.25),
+        ]
+    elif arch == 'deep':
+        features = [
+            Conv2D(64, (3, 3), activation='relu'),
+            MaxPooling2D(2, 2),
+            Conv2D(128, (3, 3), activation='relu'),
+            MaxPooling2D(2, 2),
+            Conv2D(256, (3, 3), activation='relu'),
+            MaxPooling2D(2, 2),
+        ]
+    else:
+        raise ValueError(f"Unknown architecture {arch!r}; expected one of {', '.join(ARCHITECTURES)}")
+
+    return Sequential([
+        Input(shape=input_shape),
+        *features,
+        Flatten(),
+        Dense(128, activation='relu'),
+        Dropout(0.5),
+        Dense(num_classes),
+        # softmax in float32 so mixed precision keeps stable probabilities
+        Activation('softmax', dtype='float32'),
+    ])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Train the emotion model on fer_data')
+    parser.add_argument('--config', help='JSON file with any of the options below')
+    parser.add_argument('--data-dir')
+    parser.add_argument('--arch', choices=ARCHITECTURES)
+    parser.add_argument('--epochs', type=int)
+    parser.add_argument('--batch-size', type=int)
+    parser.add_argument('--lr', type=float, help='Adam learning rate')
+    parser.add_argument('--augment', action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument('--mixed-precision', action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument('--intra-op-threads', type=int)
+    parser.add_argument('--inter-op-threads', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--deterministic', action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument('--patience', type=int, help='early stopping patience in epochs (0 disables)')
+    parser.add_argument('--output', help='model path (.h5)')
+    parser.add_argument('--run-dir', help='history, metrics, curves and the resume backup')
+    parser.add_argument('--resume', action='store_true', help='continue from the backup in --run-dir')
+    args = parser.parse_args(argv)
+
+    config = dict(DEFAULTS)
+    if args.config:
+        with open(args.config) as f:
+            loaded = {key.replace('-', '_'): value for key, value in json.load(f).items()}
+        unknown = set(loaded) - set(DEFAULTS)
+        if unknown:
+            parser.error(f"unknown option(s) in {args.config}: {', '.join(sorted(unknown))}")
+        config.update(loaded)
+    config.update({key: value for key, value in vars(args).items()
+                   if key in DEFAULTS and value is not None})
+    if config['arch'] not in ARCHITECTURES:
+        parser.error(f"--arch must be one of {', '.join(ARCHITECTURES)}")
+    config['resume'] = args.resume
+    return config
+
+
+def configure_tensorflow(config):
+    # thread pools and determinism must be set before TF runs its first op
+    set_thread_counts(config['intra_op_threads'], config['inter_op_threads'])
+    tf = _import_tf()
+    tf.keras.utils.set_random_seed(config['seed'])
+    if config['deterministic']:
+        tf.config.experimental.enable_op_determinism()
+    if config['mixed_precision']:
+        # float16 is emulated (and very slow) on CPUs; bfloat16 runs natively on recent ones
+        policy = 'mixed_float16' if tf.config.list_physical_devices('GPU') else 'mixed_bfloat16'
+        tf.keras.mixed_precision.set_global_policy(policy)
+        print(f"Mixed precision policy: {policy}")
+    return tf
+
+
+def per_class_accuracy(model, images, labels, classes, batch_size):
+    predicted = np.argmax(model.predict(fer_dataset.eval_dataset(images, labels, batch_size), verbose=0), axis=1)
+    result = {}
+    for index, name in enumerate(classes):
+        mask = labels == index
+        result[name] = round(float(np.mean(predicted[mask] == index)), 4) if mask.any() else None
+    return float(np.mean(predicted == labels)), result
+
+
+def save_curves(history_rows, path):
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed - skipping curves.png (history.csv has the same data)")
+        return False
+
+    epochs = [int(row['epoch']) + 1 for row in history_rows]
+    fig, (ax_acc, ax_loss) = plt.subplots(1, 2, figsize=(10, 4))
+    for ax, metric in ((ax_acc, 'accuracy'), (ax_loss, 'loss')):
+        ax.plot(epochs, [float(row[metric]) for row in history_rows], label=f'train_{metric}')
+        ax.plot(epochs, [float(row[f'val_{metric}']) for row in history_rows], label=f'val_{metric}')
+        ax.set_xlabel('epoch')
+        ax.set_title(metric)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return True
+
+
+def main(argv=None):
+    config = parse_args(argv)
+    if not os.path.isdir(os.path.join(config['data_dir'], 'train')):
+        sys.exit(f"❌ {config['data_dir']}/train not found (expected <data-dir>/<split>/<class>/*.jpg)")
+
+    tf = configure_tensorflow(config)
+    from tensorflow.keras.callbacks import BackupAndRestore, CSVLogger, EarlyStopping, ModelCheckpoint
+    from tensorflow.keras.optimizers import Adam
+
+    x_train, y_train, classes = fer_dataset.load_split('train', config['data_dir'])
+    x_test, y_test, _ = fer_dataset.load_split('test', config['data_dir'])
+    train_data = fer_dataset.train_dataset(x_train, y_train, batch_size=config['batch_size'],
+                                           seed=config['seed'], augment=config['augment'])
+    test_data = fer_dataset.eval_dataset(x_test, y_test, batch_size=config['batch_size'])
+    print(f"✅ {len(y_train)} train / {len(y_test)} test images, classes: {', '.join(classes)}")
+
+    run_dir = config['run_dir']
+    backup_dir = os.path.join(run_dir, 'backup')
+    history_path = os.path.join(run_dir, 'history.csv')
+    checkpoint_path = os.path.join(run_dir, 'best.weights.h5')
+    if config['resume'] and not os.path.isdir(backup_dir):
+        # Keras deletes the backup when a run completes
+        print(f"Nothing to resume in {run_dir} (the last run finished or never started); starting over")
+        config['resume'] = False
+    if not config['resume']:
+        # a fresh run must not pick up an older run's state or history
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        for path in (history_path, checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+    os.makedirs(run_dir, exist_ok=True)
+    output = os.path.abspath(config['output'])
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    model = build_model(config['arch'], len(classes))
+    model.compile(optimizer=Adam(learning_rate=config['lr']), loss='sparse_categorical_crossentropy',
+                  metrics=['accuracy'])
+    model.summary()
+
+    callbacks = [
+        BackupAndRestore(backup_dir),
+        ModelCheckpoint(checkpoint_path, monitor='val_accuracy', save_best_only=True, save_weights_only=True,
+                        verbose=1),
+        CSVLogger(history_path, append=True),
+    ]
+    if config['patience'] > 0:
+        callbacks.append(EarlyStopping(monitor='val_loss', patience=config['patience'], restore_best_weights=True))
+
+    print(f"🚀 Training {config['arch']} for up to {config['epochs']} epochs "
+          f"(batch {config['batch_size']}, lr {config['lr']:g}, augment {config['augment']}, "
+          f"mixed precision {config['mixed_precision']})")
+    start = time.perf_counter()
+    model.fit(train_data, validation_data=test_data, epochs=config['epochs'], callbacks=callbacks, verbose=2)
+    train_seconds = time.perf_counter() - start
+
+    # The saved model is float32 regardless of the training policy
+    tf.keras.mixed_precision.set_global_policy('float32')
+    final = build_model(config['arch'], len(classes))
+    final.compile(optimizer=Adam(learning_rate=config['lr']), loss='sparse_categorical_crossentropy',
+                  metrics=['accuracy'])
+    final.set_weights(model.get_weights())
+    if os.path.exists(checkpoint_path):
+        # the epoch with the best val_accuracy, like the old scripts' checkpoint
+        model.load_weights(checkpoint_path)
+        final.set_weights(model.get_weights())
+    final.save(output)
+
+    labels = [name.capitalize() for name in classes]
+    accuracy, class_accuracy = per_class_accuracy(final, np.asarray(x_test), y_test, labels, config['batch_size'])
+    meta = write_metadata(output, labels, [fer_dataset.IMG_SIZE, fer_dataset.IMG_SIZE, 1],
+                          {'scale': 1.0 / 255.0, 'offset': 0.0}, arch=config['arch'],
+                          test_accuracy=round(accuracy, 4))
+
+    with open(history_path) as f:
+        history_rows = list(csv.DictReader(f))
+    metrics = {
+        'test_accuracy': round(accuracy, 4),
+        'per_class_accuracy': class_accuracy,
+        'epochs_run': len(history_rows),
+        'train_seconds': round(train_seconds, 1),
+        'model': output,
+        'labels': meta['labels'],
+        'config': {key: value for key, value in config.items() if key != 'resume'},
+    }
+    with open(os.path.join(run_dir, 'metrics.json'), 'w') as f:
+        json.dump(metrics, f, indent=2)
+    save_curves(history_rows, os.path.join(run_dir, 'curves.png'))
+
+    print(f"✅ Saved {output} (test accuracy {accuracy:.3f}) and its metadata")
+    for name, value in class_accuracy.items():
+        print(f"   {name:<9} {value if value is not None else '-'}")
+    print(f"   history, metrics and curves in {run_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,183 +0,0 @@
-# -------------------- train_fer_model.py --------------------
-import os
-import numpy as np
-import matplotlib.pyplot as plt
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
-
-# ---------------- CONFIG ----------------
-DATA_DIR = "backend/scripts/fer_data"
-IMG_SIZE = 48
-BATCH_SIZE = 32
-EPOCHS = 25
-MODEL_PATH = "backend/scripts/emotion_model.h5"
-# ----------------------------------------
-
-# 1️⃣ Data Loading and Augmentation
-train_datagen = ImageDataGenerator(
-    rescale=1.0/255,
-    rotation_range=20,
-    width_shift_range=0.2,
-    height_shift_range=0.2,
-    shear_range=0.2,
-    zoom_range=0.2,
-    horizontal_flip=True,
-    validation_split=0.2
-)
-
-train_generator = train_datagen.flow_from_directory(
-    DATA_DIR,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    color_mode='grayscale',
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='training'
-)
-
-val_generator = train_datagen.flow_from_directory(
-    DATA_DIR,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    color_mode='grayscale',
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
-)
-
-# 2️⃣ Model Architecture
-model = Sequential([
-    Conv2D(64, (3,3), activation='relu', input_shape=(IMG_SIZE, IMG_SIZE, 1)),
-    MaxPooling2D(pool_size=(2,2)),
-    Conv2D(128, (3,3), activation='relu'),
-    MaxPooling2D(pool_size=(2,2)),
-    Conv2D(256, (3,3), activation='relu'),
-    MaxPooling2D(pool_size=(2,2)),
-    Flatten(),
-    Dense(128, activation='relu'),
-    Dropout(0.5),
-    Dense(train_generator.num_classes, activation='softmax')
-])
-
-model.compile(optimizer=Adam(learning_rate=0.0001),
-              loss='categorical_crossentropy',
-              metrics=['accuracy'])
-
-# 3️⃣ Training with Callbacks
-checkpoint = ModelCheckpoint(MODEL_PATH, monitor='val_accuracy', save_best_only=True, verbose=1)
-earlystop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
-
-history = model.fit(
-    train_generator,
-    epochs=EPOCHS,
-    validation_data=val_generator,
-    callbacks=[checkpoint, earlystop]
-)
-
-# 4️⃣ Save final model
-model.save(MODEL_PATH)
-print(f"✅ Model training complete! Saved at {MODEL_PATH}")
-
-# 5️⃣ (Optional) Plot training curves
-plt.figure(figsize=(8,4))
-plt.plot(history.history['accuracy'], label='train_acc')
-plt.plot(history.history['val_accuracy'], label='val_acc')
-plt.legend()
-plt.title('Training Accuracy')
-plt.show()
-# -------------------- train_fer_model.py --------------------
-import os
-import numpy as np
-import matplotlib.pyplot as plt
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping
-
-# ---------------- CONFIG ----------------
-DATA_DIR = "fer_data"  # 👈 changed
-IMG_SIZE = 48
-BATCH_SIZE = 32
-EPOCHS = 25
-MODEL_PATH = "emotion_model.h5"  # 👈 changed
-# ----------------------------------------
-
-print("🚀 Starting FER model training...")
-print("Dataset path:", os.path.abspath(DATA_DIR))
-
-# 1️⃣ Data Loading and Augmentation
-train_datagen = ImageDataGenerator(
-    rescale=1.0/255,
-    rotation_range=20,
-    width_shift_range=0.2,
-    height_shift_range=0.2,
-    shear_range=0.2,
-    zoom_range=0.2,
-    horizontal_flip=True,
-    validation_split=0.2
-)
-
-train_generator = train_datagen.flow_from_directory(
-    DATA_DIR,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    color_mode='grayscale',
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='training'
-)
-
-val_generator = train_datagen.flow_from_directory(
-    DATA_DIR,
-    target_size=(IMG_SIZE, IMG_SIZE),
-    color_mode='grayscale',
-    batch_size=BATCH_SIZE,
-    class_mode='categorical',
-    subset='validation'
-)
-
-# 2️⃣ Model Architecture
-model = Sequential([
-    Conv2D(64, (3,3), activation='relu', input_shape=(IMG_SIZE, IMG_SIZE, 1)),
-    MaxPooling2D(pool_size=(2,2)),
-    Conv2D(128, (3,3), activation='relu'),
-    MaxPooling2D(pool_size=(2,2)),
-    Conv2D(256, (3,3), activation='relu'),
-    MaxPooling2D(pool_size=(2,2)),
-    Flatten(),
-    Dense(128, activation='relu'),
-    Dropout(0.5),
-    Dense(train_generator.num_classes, activation='softmax')
-])
-
-model.compile(optimizer=Adam(learning_rate=0.0001),
-              loss='categorical_crossentropy',
-              metrics=['accuracy'])
-
-# 3️⃣ Training with Callbacks
-checkpoint = ModelCheckpoint(MODEL_PATH, monitor='val_accuracy', save_best_only=True, verbose=1)
-earlystop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
-
-history = model.fit(
-    train_generator,
-    epochs=EPOCHS,
-    validation_data=val_generator,
-    callbacks=[checkpoint, earlystop]
-)
-
-# 4️⃣ Save final model
-model.save(MODEL_PATH)
-print(f"✅ Model training complete! Saved at {MODEL_PATH}")
-
-# 5️⃣ (Optional) Plot training curves
-plt.figure(figsize=(8,4))
-plt.plot(history.history['accuracy'], label='train_acc')
-plt.plot(history.history['val_accuracy'], label='val_acc')
-plt.legend()
-plt.title('Training Accuracy')
-plt.show()
-if __name__ == "__main__":
-    # call your training code here
-    # for example, if your code is directly written, just leave it as-is
-    pass
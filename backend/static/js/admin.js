@@ -4,7 +4,6 @@ let editing = false;
 document.addEventListener('DOMContentLoaded', function () {
   loadUsers();
   loadSystemStats();
-  loadAllLogs();
 
   // animations
   const cards = document.querySelectorAll('.card');
@@ -22,24 +21,23 @@ function showSection(sectionId) {
 }
 
 // -------------------- stats --------------------
+// One /api/dashboard request feeds both the stat cards and the logs section
 async function loadSystemStats() {
   try {
-    const [usersResponse, logsResponse] = await Promise.all([
-      fetch('/api/users', { credentials: 'include' }),
-      fetch('/api/stress-logs', { credentials: 'include' })
-    ]);
-
-    const usersData = await usersResponse.json();
-    const logsData = await logsResponse.json();
+    const res = await fetch('/api/dashboard', { credentials: 'include' });
+    if (!res.ok) throw new Error(`API ${res.status}`);
+    const data = await res.json();
 
     document.getElementById('totalUsers').textContent =
-      usersData.success ? usersData.users.length : '0';
+      data.success ? data.summary.total_users : '0';
     document.getElementById('totalSessions').textContent =
-      logsData.success ? logsData.logs.length : '0';
+      data.success ? data.summary.total_logs : '0';
+    renderAllLogs(data);
   } catch (e) {
     console.error(e);
     document.getElementById('totalUsers').textContent = 'Error';
     document.getElementById('totalSessions').textContent = 'Error';
+    document.getElementById('allLogs').innerHTML = `<div class="no-results">❌ Error loading system logs</div>`;
   }
 }
 
@@ -87,19 +85,10 @@ async function loadUsers() {
 }
 
 // -------------------- logs --------------------
-async function loadAllLogs() {
-  const allLogsContainer = document.getElementById('allLogs');
-  try {
-    const res = await fetch('/api/stress-logs', { credentials: 'include' });
-    if (!res.ok) throw new Error(`API ${res.status}`);
-    const data = await res.json();
+let nextLogsCursor = null;
 
-    if (data.success && data.logs && data.logs.length > 0) {
-      allLogsContainer.innerHTML = `
-        <div class="logs-grid">
-          ${data.logs
-            .map(
-              log => `
+function logEntryHtml(log) {
+  return `
             <div class="admin-log-entry">
               <div class="log-header">
                 <strong>${log.username || 'Unknown'}</strong>
@@ -111,16 +100,45 @@ async function loadAllLogs() {
                 <div class="log-message">${getStressMessage(log.stress_level)}</div>
                 <div class="log-timestamp">${formatDate(log.timestamp)}</div>
               </div>
-            </div>`
-            )
-            .join('')}
+            </div>`;
+}
+
+function renderAllLogs(data) {
+  const allLogsContainer = document.getElementById('allLogs');
+  if (data.success && data.logs && data.logs.length > 0) {
+    allLogsContainer.innerHTML = `
+        <div class="logs-grid" id="logsGrid">
+          ${data.logs.map(logEntryHtml).join('')}
+        </div>
+        <div class="text-center" style="margin-top: 1rem;">
+          <button class="btn btn-sm" id="loadMoreLogs" onclick="loadMoreLogs()">Load older logs</button>
         </div>`;
-    } else {
-      allLogsContainer.innerHTML = `<div class="no-results">📊 No stress detection logs available yet</div>`;
-    }
+    setNextLogsCursor(data.next_cursor);
+  } else {
+    allLogsContainer.innerHTML = `<div class="no-results">📊 No stress detection logs available yet</div>`;
+  }
+}
+
+function setNextLogsCursor(cursor) {
+  nextLogsCursor = cursor;
+  const button = document.getElementById('loadMoreLogs');
+  if (button) button.style.display = cursor ? '' : 'none';
+}
+
+async function loadMoreLogs() {
+  if (!nextLogsCursor) return;
+  try {
+    const res = await fetch(`/api/stress-logs?before=${encodeURIComponent(nextLogsCursor)}&limit=50`,
+      { credentials: 'include' });
+    if (!res.ok) throw new Error(`API ${res.status}`);
+    const data = await res.json();
+    if (!data.success) throw new Error(data.message);
+
+    document.getElementById('logsGrid').insertAdjacentHTML('beforeend', data.logs.map(logEntryHtml).join(''));
+    setNextLogsCursor(data.next_cursor);
   } catch (e) {
     console.error(e);
-    allLogsContainer.innerHTML = `<div class="no-results">❌ Error loading system logs</div>`;
+    showNotification('Error loading older logs', 'error');
   }
 }
 
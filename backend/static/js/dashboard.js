@@ -1,8 +1,7 @@
 // Dashboard JavaScript
 
 document.addEventListener('DOMContentLoaded', function() {
-    loadRecentLogs();
-    loadStressHistory();
+    loadDashboard();
     
     // Add animations
     const cards = document.querySelectorAll('.card');
@@ -12,13 +11,28 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-async function loadRecentLogs() {
+// /api/dashboard feeds the recent-activity card, the session list and,
+// from the daily rollups, the stress pattern chart
+async function loadDashboard() {
+    const data = await fetchJson('/api/dashboard');
+    loadRecentLogs(data);
+    loadStressHistory(data);
+}
+
+async function fetchJson(url) {
+    try {
+        const response = await fetch(url);
+        return await response.json();
+    } catch (error) {
+        return { error };
+    }
+}
+
+function loadRecentLogs(data) {
     const recentLogsContainer = document.getElementById('recentLogs');
     
     try {
-        const response = await fetch('/api/stress-logs');
-        const data = await response.json();
-        
+        if (data.error) throw data.error;
         if (data.success && data.logs && data.logs.length > 0) {
             const recentLogs = data.logs.slice(0, 3); // Show only 3 most recent
             
@@ -53,45 +67,14 @@ async function loadRecentLogs() {
     }
 }
 
-async function loadStressHistory() {
+function loadStressHistory(data) {
     const stressHistoryContainer = document.getElementById('stressHistory');
     
     try {
-        const response = await fetch('/api/stress-logs');
-        const data = await response.json();
-        
+        if (data.error) throw data.error;
         if (data.success && data.logs && data.logs.length > 0) {
-            // Create a simple chart-like visualization
-            const chartData = processStressData(data.logs);
-            
             stressHistoryContainer.innerHTML = `
-                <div class="stress-chart">
-                    <div class="chart-header">
-                        <h4>Your Stress Pattern (Last 10 Sessions)</h4>
-                    </div>
-                    <div class="chart-bars">
-                        ${chartData.map((item, index) => `
-                            <div class="chart-bar">
-                                <div class="bar ${getStressBadgeClass(item.level)}" 
-                                     style="height: ${item.level}%"
-                                     title="${item.level}% - ${formatDate(item.date)}">
-                                </div>
-                                <div class="bar-label">${index + 1}</div>
-                            </div>
-                        `).join('')}
-                    </div>
-                    <div class="chart-stats">
-                        <div class="stat">
-                            <strong>Average:</strong> ${calculateAverage(data.logs)}%
-                        </div>
-                        <div class="stat">
-                            <strong>Trend:</strong> ${getTrend(chartData)}
-                        </div>
-                        <div class="stat">
-                            <strong>Total Sessions:</strong> ${data.logs.length}
-                        </div>
-                    </div>
-                </div>
+                ${renderStressChart(data.stats)}
                 
                 <div class="all-logs">
                     <h4>All Sessions</h4>
@@ -130,18 +113,52 @@ async function loadStressHistory() {
     }
 }
 
-function processStressData(logs) {
-    // Get last 10 sessions for chart
-    return logs.slice(0, 10).reverse().map(log => ({
-        level: log.stress_level,
-        date: log.timestamp
+// One bar per day with sessions (last 14), the day's mean stress as its height
+function renderStressChart(stats) {
+    if (!stats) {
+        console.error('Error loading stress stats: rollups unavailable');
+        return `
+            <div class="no-results">
+                ❌ Error loading stress pattern
+            </div>
+        `;
+    }
+    const chartData = stats.buckets.slice(-14).map(bucket => ({
+        level: Math.round(bucket.mean),
+        count: bucket.count,
+        date: bucket.start
     }));
-}
-
-function calculateAverage(logs) {
-    if (logs.length === 0) return 0;
-    const sum = logs.reduce((acc, log) => acc + log.stress_level, 0);
-    return Math.round(sum / logs.length);
+    const summary = stats.summary;
+    
+    return `
+        <div class="stress-chart">
+            <div class="chart-header">
+                <h4>Your Stress Pattern (Daily Average)</h4>
+            </div>
+            <div class="chart-bars">
+                ${chartData.map(item => `
+                    <div class="chart-bar">
+                        <div class="bar ${getStressBadgeClass(item.level)}" 
+                             style="height: ${item.level}%"
+                             title="${item.level}% average over ${item.count} sessions - ${formatDay(item.date)}">
+                        </div>
+                        <div class="bar-label">${formatDay(item.date)}</div>
+                    </div>
+                `).join('')}
+            </div>
+            <div class="chart-stats">
+                <div class="stat">
+                    <strong>Average:</strong> ${summary.mean !== null ? Math.round(summary.mean) : 0}%
+                </div>
+                <div class="stat">
+                    <strong>Trend:</strong> ${getTrend(chartData)}
+                </div>
+                <div class="stat">
+                    <strong>Sessions (30 days):</strong> ${summary.count}
+                </div>
+            </div>
+        </div>
+    `;
 }
 
 function getTrend(chartData) {
@@ -176,6 +193,12 @@ function getStressLabel(level) {
     else return 'High';
 }
 
+// Rollup buckets start at UTC midnight
+function formatDay(dateString) {
+    const date = new Date(dateString.endsWith('Z') ? dateString : dateString + 'Z');
+    return date.toLocaleDateString('en-US', { month: 'short', day: 'numeric', timeZone: 'UTC' });
+}
+
 function formatDate(dateString) {
     const date = new Date(dateString);
     return date.toLocaleString('en-US', {
@@ -6,6 +6,17 @@ let ctx;
 let stream;
 let isDetecting = false;
 
+// ROI upload: when the browser can find the face itself (Shape Detection API),
+// only a 48x48 grayscale crop is sent and the server skips face detection.
+const ROI_SIZE = 48;
+let faceDetector = ('FaceDetector' in window) ? new FaceDetector({ fastMode: true, maxDetectedFaces: 1 }) : null;
+let roiCanvas = null;
+
+// Continuous mode: frames are pushed to a server stream and results arrive over
+// Server-Sent Events. One upload in flight at a time, paced by the server's
+// suggested_interval_ms (and never faster than uploads complete).
+let liveStream = null;
+
 document.addEventListener('DOMContentLoaded', function() {
     video = document.getElementById('video');
     canvas = document.getElementById('canvas');
@@ -14,9 +25,11 @@ document.addEventListener('DOMContentLoaded', function() {
     const startBtn = document.getElementById('startBtn');
     const captureBtn = document.getElementById('captureBtn');
     const stopBtn = document.getElementById('stopBtn');
+    const continuousBtn = document.getElementById('continuousBtn');
     
     startBtn.addEventListener('click', startCamera);
     captureBtn.addEventListener('click', captureAndAnalyze);
+    continuousBtn.addEventListener('click', toggleContinuous);
     stopBtn.addEventListener('click', stopCamera);
     
     // Add animations
@@ -39,6 +52,7 @@ async function startCamera() {
         // Update button states
         document.getElementById('startBtn').style.display = 'none';
         document.getElementById('captureBtn').style.display = 'inline-block';
+        document.getElementById('continuousBtn').style.display = 'inline-block';
         document.getElementById('stopBtn').style.display = 'inline-block';
         
         // Update results
@@ -51,6 +65,7 @@ async function startCamera() {
 }
 
 function stopCamera() {
+    stopContinuous();
     if (stream) {
         stream.getTracks().forEach(track => track.stop());
         video.srcObject = null;
@@ -60,6 +75,7 @@ function stopCamera() {
     // Update button states
     document.getElementById('startBtn').style.display = 'inline-block';
     document.getElementById('captureBtn').style.display = 'none';
+    document.getElementById('continuousBtn').style.display = 'none';
     document.getElementById('stopBtn').style.display = 'none';
     
     // Reset results
@@ -87,22 +103,13 @@ async function captureAndAnalyze() {
         // Draw video frame to canvas
         ctx.drawImage(video, 0, 0);
         
-        // Convert canvas to base64
-        const imageData = canvas.toDataURL('image/jpeg', 0.8);
-        
-        // Send to backend for analysis
-        const response = await fetch('/api/detect-stress', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({ image: imageData })
-        });
+        // Send a face crop when possible, otherwise the JPEG frame
+        const response = await analyzeCurrentFrame(canvas);
         
         const data = await response.json();
         
         if (data.success) {
-            displayStressResult(data.stress_level, data.message);
+            displayStressResult(data.stress_level, data.message, data.smoothed_stress_level);
         } else {
             updateResults(`❌ ${data.message || 'Analysis failed. Please try again.'}`, 'error');
         }
@@ -117,7 +124,182 @@ async function captureAndAnalyze() {
     }
 }
 
-function displayStressResult(stressLevel, message) {
+function toggleContinuous() {
+    if (liveStream) {
+        stopContinuous();
+        updateResults('⏸️ Continuous analysis stopped');
+    } else {
+        startContinuous();
+    }
+}
+
+async function startContinuous() {
+    const continuousBtn = document.getElementById('continuousBtn');
+    continuousBtn.disabled = true;
+    
+    try {
+        const response = await fetch('/api/stream', { method: 'POST' });
+        const data = await response.json();
+        if (!data.success) {
+            updateResults(`❌ ${data.message || 'Could not start continuous analysis.'}`, 'error');
+            return;
+        }
+        
+        liveStream = {
+            id: data.stream_id,
+            frameUrl: data.frame_url,
+            intervalMs: data.suggested_interval_ms,
+            events: new EventSource(data.events_url),
+            timer: null
+        };
+        liveStream.events.addEventListener('result', event => {
+            const result = JSON.parse(event.data);
+            if (!liveStream) return;
+            liveStream.intervalMs = result.suggested_interval_ms;
+            if (result.success) {
+                displayStressResult(result.stress_level, result.message, result.smoothed_stress_level);
+            } else {
+                updateResults(`🔍 ${result.message}`);
+            }
+        });
+        liveStream.events.addEventListener('end', () => stopContinuous());
+        
+        continuousBtn.textContent = 'Stop Continuous';
+        document.getElementById('captureBtn').style.display = 'none';
+        updateResults('📡 Continuous analysis running...');
+        sendStreamFrame();
+    } catch (error) {
+        console.error('Stream error:', error);
+        updateResults('❌ Connection error while starting continuous analysis.', 'error');
+    } finally {
+        continuousBtn.disabled = false;
+    }
+}
+
+async function sendStreamFrame() {
+    const current = liveStream;
+    if (!current || !stream) return;
+    
+    const started = performance.now();
+    try {
+        canvas.width = video.videoWidth;
+        canvas.height = video.videoHeight;
+        ctx.drawImage(video, 0, 0);
+        const blob = await canvasToJpegBlob(canvas, 0.7);
+        const response = await fetch(current.frameUrl, {
+            method: 'POST',
+            headers: { 'Content-Type': 'image/jpeg' },
+            body: blob
+        });
+        if (response.status === 404) {
+            stopContinuous();
+            return;
+        }
+    } catch (error) {
+        console.warn('Frame upload failed:', error);
+    }
+    
+    if (liveStream !== current) return;
+    const wait = Math.max(0, current.intervalMs - (performance.now() - started));
+    current.timer = setTimeout(sendStreamFrame, wait);
+}
+
+function stopContinuous() {
+    if (!liveStream) return;
+    
+    const current = liveStream;
+    liveStream = null;
+    clearTimeout(current.timer);
+    current.events.close();
+    fetch(`/api/stream/${current.id}`, { method: 'DELETE' }).catch(() => {});
+    
+    const continuousBtn = document.getElementById('continuousBtn');
+    continuousBtn.textContent = 'Start Continuous';
+    if (stream) {
+        document.getElementById('captureBtn').style.display = 'inline-block';
+    }
+}
+
+async function detectFaceBox(sourceCanvas) {
+    if (!faceDetector) return null;
+    
+    try {
+        const faces = await faceDetector.detect(sourceCanvas);
+        if (faces.length === 0) return null;
+        
+        const area = face => face.boundingBox.width * face.boundingBox.height;
+        return faces.reduce((a, b) => (area(a) >= area(b) ? a : b)).boundingBox;
+    } catch (error) {
+        console.warn('FaceDetector failed, falling back to full-frame upload:', error);
+        faceDetector = null;
+        return null;
+    }
+}
+
+function cropGrayRoi(sourceCanvas, box) {
+    if (!roiCanvas) {
+        roiCanvas = document.createElement('canvas');
+        roiCanvas.width = ROI_SIZE;
+        roiCanvas.height = ROI_SIZE;
+    }
+    
+    const roiCtx = roiCanvas.getContext('2d');
+    roiCtx.drawImage(sourceCanvas, box.x, box.y, box.width, box.height, 0, 0, ROI_SIZE, ROI_SIZE);
+    const rgba = roiCtx.getImageData(0, 0, ROI_SIZE, ROI_SIZE).data;
+    
+    // Same luma weights as cv2.COLOR_BGR2GRAY
+    const gray = new Uint8Array(ROI_SIZE * ROI_SIZE);
+    for (let i = 0, j = 0; i < gray.length; i++, j += 4) {
+        gray[i] = Math.round(0.299 * rgba[j] + 0.587 * rgba[j + 1] + 0.114 * rgba[j + 2]);
+    }
+    return gray;
+}
+
+async function analyzeCurrentFrame(sourceCanvas) {
+    const box = await detectFaceBox(sourceCanvas);
+    
+    if (box) {
+        return fetch(`/api/detect-stress/roi?width=${ROI_SIZE}&height=${ROI_SIZE}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/octet-stream'
+            },
+            body: cropGrayRoi(sourceCanvas, box)
+        });
+    }
+    
+    return uploadFrame(sourceCanvas);
+}
+
+function canvasToJpegBlob(sourceCanvas, quality) {
+    return new Promise(resolve => sourceCanvas.toBlob(resolve, 'image/jpeg', quality));
+}
+
+// Send the JPEG bytes as-is; fall back to the base64 JSON route
+// on browsers without canvas.toBlob
+async function uploadFrame(sourceCanvas) {
+    const blob = sourceCanvas.toBlob ? await canvasToJpegBlob(sourceCanvas, 0.8) : null;
+    
+    if (blob) {
+        return fetch('/api/detect-stress/frame', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'image/jpeg'
+            },
+            body: blob
+        });
+    }
+    
+    return fetch('/api/detect-stress', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ image: sourceCanvas.toDataURL('image/jpeg', 0.8) })
+    });
+}
+
+function displayStressResult(stressLevel, message, smoothedLevel) {
     const stressCategory = getStressCategory(stressLevel);
     const color = getStressColor(stressLevel);
     
@@ -129,6 +311,7 @@ function displayStressResult(stressLevel, message) {
             <div class="stress-message">
                 <h4>Stress Level: ${getStressLabel(stressLevel)}</h4>
                 <p>${message}</p>
+                ${smoothedLevel !== undefined ? `<p class="stress-trend">Recent trend: ${smoothedLevel}%</p>` : ''}
             </div>
             <div class="result-actions">
                 <button class="btn btn-primary" onclick="captureAndAnalyze()" ${isDetecting ? 'disabled' : ''}>
@@ -282,6 +465,11 @@ const detectionStyles = `
             margin: 0;
         }
         
+        .stress-message .stress-trend {
+            font-size: 0.95rem;
+            margin-top: 0.5rem;
+        }
+        
         .result-actions {
             display: flex;
             gap: 1rem;
@@ -0,0 +1,289 @@
+# stream_sessions.py - continuous analysis: binary frames in, Server-Sent Events out
+#
+# A client opens a stream (StreamManager.create), then pushes JPEG frames as
+# they are captured and reads results from one long-lived SSE response
+# (events()).  Each stream keeps at most one frame waiting: a frame that
+# arrives before the previous one was picked up replaces it and counts as
+# dropped, so a client that outruns inference only ever gets its newest
+# frame analyzed and never builds a backlog.  A fixed pool of worker threads
+# serves every stream, which lets the micro-batcher group faces from
+# different streams into one model call.  Every result carries
+# suggested_interval_ms (measured analysis time scaled by streams per
+# worker) so clients can adapt their send rate.  Streams without frames or
+# an SSE reader for idle_timeout_s are closed by a reaper thread.
+#
+#   STREAM_WORKERS              analysis threads shared by all streams (default 4)
+#   STREAM_MAX_SESSIONS         open streams allowed at once (default 200)
+#   STREAM_IDLE_TIMEOUT_S       close a stream after this long without frames or readers (default 60)
+#   STREAM_MIN_INTERVAL_MS      lowest suggested_interval_ms (default 100, i.e. 10 fps)
+#   STREAM_MAX_FRAME_BYTES      largest accepted frame (default 2 MiB)
+import json
+import os
+import queue
+import secrets
+import struct
+import threading
+import time
+from collections import deque
+
+
+class StreamLimitError(RuntimeError):
+    pass
+
+
+class StreamSession:
+    def __init__(self, stream_id, user_id, username):
+        self.id = stream_id
+        self.user_id = user_id
+        self.username = username
+        self.created = self.last_activity = time.monotonic()
+        self.last_logged = 0.0  # monotonic time of the last stored stress log (see app.py)
+        self.closed = False
+
+        self._cond = threading.Condition()
+        self._pending = None  # (seq, frame bytes, received_at)
+        self._scheduled = False
+        self._events = deque(maxlen=32)  # (event id, event name, payload) for SSE replay
+        self._next_event_id = 1
+        self._readers = 0
+        self._seq = 0
+        self.received = 0
+        self.dropped = 0
+        self.analyzed = 0
+
+    def stats(self):
+        with self._cond:
+            return {
+                'received': self.received,
+                'dropped': self.dropped,
+                'analyzed': self.analyzed,
+                'readers': self._readers,
+                'age_s': round(time.monotonic() - self.created, 1),
+            }
+
+
+class StreamManager:
+    def __init__(self, analyze_fn, workers=4, max_sessions=200, idle_timeout_s=60.0,
+                 min_interval_ms=100.0, max_frame_bytes=2 * 1024 * 1024, keepalive_s=15.0,
+                 on_frame_dropped=None):
+        # analyze_fn(stream, frame_bytes) -> JSON-serializable dict, run on a worker thread;
+        # on_frame_dropped() is called for every frame replaced before analysis
+        self.analyze_fn = analyze_fn
+        self.on_frame_dropped = on_frame_dropped
+        self.workers = max(1, int(workers))
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_timeout = float(idle_timeout_s)
+        self.min_interval_ms = float(min_interval_ms)
+        self.max_frame_bytes = int(max_frame_bytes)
+        self.keepalive = float(keepalive_s)
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._ready = queue.Queue()  # streams with a frame waiting
+        self._threads = []
+        self._analysis_ms = None  # EWMA over all streams
+        self.frames_analyzed = 0
+        self.frames_dropped = 0
+
+    # ---------- lifecycle ----------
+    def create(self, user_id, username):
+        with self._lock:
+            self._reap_idle()
+            if len(self._sessions) >= self.max_sessions:
+                raise StreamLimitError("Too many open streams, retry later")
+            stream = StreamSession(secrets.token_urlsafe(16), user_id, username)
+            self._sessions[stream.id] = stream
+            if not self._threads:
+                self._threads = [threading.Thread(target=self._run, name=f'stream-worker-{i}', daemon=True)
+                                 for i in range(self.workers)]
+                self._threads.append(threading.Thread(target=self._reap_loop, name='stream-reaper', daemon=True))
+                for t in self._threads:
+                    t.start()
+        return stream
+
+    def get(self, stream_id, user_id=None):
+        # None for unknown streams and for streams owned by someone else
+        with self._lock:
+            stream = self._sessions.get(stream_id)
+        if stream is None or (user_id is not None and stream.user_id != user_id):
+            return None
+        return stream
+
+    def close(self, stream):
+        with self._lock:
+            self._sessions.pop(stream.id, None)
+        with stream._cond:
+            stream.closed = True
+            stream._pending = None
+            self._publish(stream, 'end', {'reason': 'closed'})
+
+    def _reap_loop(self):
+        # Abandoned streams are closed within about half the idle timeout,
+        # whether or not anyone opens a new stream
+        interval = min(max(self.idle_timeout / 2, 1.0), 15.0)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                self._reap_idle()
+
+    def _reap_idle(self):
+        # caller holds self._lock
+        now = time.monotonic()
+        for stream in list(self._sessions.values()):
+            if stream._readers == 0 and now - stream.last_activity > self.idle_timeout:
+                del self._sessions[stream.id]
+                with stream._cond:
+                    stream.closed = True
+                    stream._pending = None
+                    stream._cond.notify_all()
+
+    # ---------- frames in ----------
+    def submit(self, stream, frame):
+        # Queue frame as the stream's next one -> (seq, replaced an unanalyzed frame)
+        if len(frame) > self.max_frame_bytes:
+            raise ValueError(f"Frame larger than {self.max_frame_bytes} bytes")
+        with stream._cond:
+            if stream.closed:
+                raise KeyError(stream.id)
+            stream._seq += 1
+            stream.received += 1
+            stream.last_activity = time.monotonic()
+            replaced = stream._pending is not None
+            if replaced:
+                stream.dropped += 1
+            stream._pending = (stream._seq, frame, time.monotonic())
+            schedule = not stream._scheduled
+            stream._scheduled = True
+            seq = stream._seq
+        if replaced:
+            with self._lock:
+                self.frames_dropped += 1
+            if self.on_frame_dropped is not None:
+                self.on_frame_dropped()
+        if schedule:
+            self._ready.put(stream)
+        return seq, replaced
+
+    def suggested_interval_ms(self):
+        if self._analysis_ms is None:
+            return self.min_interval_ms
+        with self._lock:
+            active = len(self._sessions)
+        return round(max(self.min_interval_ms, self._analysis_ms * max(1.0, active / self.workers)), 1)
+
+    def _run(self):
+        while True:
+            stream = self._ready.get()
+            with stream._cond:
+                pending, stream._pending = stream._pending, None
+                stream._scheduled = False
+            if pending is None or stream.closed:
+                continue
+            seq, frame, received_at = pending
+            started = time.monotonic()
+            try:
+                result = self.analyze_fn(stream, frame)
+            except Exception as e:
+                print(f"Stream analysis error: {e}")
+                result = {'success': False, 'message': f'Detection error: {str(e)}'}
+            elapsed_ms = (time.monotonic() - started) * 1000
+            with self._lock:
+                self.frames_analyzed += 1
+                self._analysis_ms = elapsed_ms if self._analysis_ms is None else 0.8 * self._analysis_ms + 0.2 * elapsed_ms
+            interval = self.suggested_interval_ms()
+            with stream._cond:
+                stream.analyzed += 1
+                self._publish(stream, 'result', dict(
+                    result,
+                    seq=seq,
+                    queue_ms=round((started - received_at) * 1000, 1),
+                    analysis_ms=round(elapsed_ms, 1),
+                    dropped=stream.dropped,
+                    suggested_interval_ms=interval,
+                ))
+
+    # ---------- results out ----------
+    def _publish(self, stream, event, payload):
+        # caller holds stream._cond
+        stream._events.append((stream._next_event_id, event, payload))
+        stream._next_event_id += 1
+        stream._cond.notify_all()
+
+    def events(self, stream, last_event_id=0):
+        # SSE body; replays buffered events newer than Last-Event-ID on reconnect
+        with stream._cond:
+            stream._readers += 1
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                with stream._cond:
+                    batch = [e for e in stream._events if e[0] > last_event_id]
+                    if not batch and not stream.closed:
+                        stream._cond.wait(self.keepalive)
+                        batch = [e for e in stream._events if e[0] > last_event_id]
+                    closed = stream.closed
+                    stream.last_activity = time.monotonic()
+                if not batch:
+                    if closed:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                for event_id, event, payload in batch:
+                    last_event_id = event_id
+                    yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(payload)}\n\n"
+                    if event == 'end':
+                        return
+        finally:
+            with stream._cond:
+                stream._readers -= 1
+                stream.last_activity = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'streams': len(self._sessions),
+                'max_streams': self.max_sessions,
+                'workers': self.workers,
+                'frames_analyzed': self.frames_analyzed,
+                'frames_dropped': self.frames_dropped,
+                'analysis_ms': round(self._analysis_ms, 1) if self._analysis_ms is not None else None,
+            }
+
+
+def read_frames(stream, max_frame_bytes):
+    # Chunked upload body: repeated [4-byte big-endian length][frame bytes];
+    # yields each frame as soon as it has fully arrived
+    while True:
+        header = _read_exact(stream, 4)
+        if not header:
+            return
+        (length,) = struct.unpack('>I', header)
+        if length == 0 or length > max_frame_bytes:
+            raise ValueError(f"Frame length {length} outside 1..{max_frame_bytes} bytes")
+        frame = _read_exact(stream, length)
+        if len(frame) != length:
+            raise ValueError("Upload ended in the middle of a frame")
+        yield frame
+
+
+def _read_exact(stream, n):
+    chunks, remaining = [], n
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def manager_from_env(analyze_fn, on_frame_dropped=None):
+    return StreamManager(
+        analyze_fn,
+        on_frame_dropped=on_frame_dropped,
+        workers=int(os.environ.get('STREAM_WORKERS', 4)),
+        max_sessions=int(os.environ.get('STREAM_MAX_SESSIONS', 200)),
+        idle_timeout_s=float(os.environ.get('STREAM_IDLE_TIMEOUT_S', 60)),
+        min_interval_ms=float(os.environ.get('STREAM_MIN_INTERVAL_MS', 100)),
+        max_frame_bytes=int(os.environ.get('STREAM_MAX_FRAME_BYTES', 2 * 1024 * 1024)),
+    )
@@ -0,0 +1,66 @@
+# stress_smoothing.py - per-session streaming stress score
+#
+# Each analysis contributes its probability-weighted stress,
+# sum(p_i * stress_of_class_i), to an exponentially weighted moving average.
+# The weight of older samples halves every `half_life_s` seconds of wall time,
+# so the score stays comparable whether a client samples every second or every
+# ten seconds.  State per session is three numbers: O(1) memory.
+#
+#   STRESS_SMOOTHING_HALF_LIFE_S   half-life of the moving average (default 10)
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class StressSmoother:
+    def __init__(self, half_life_s=10.0):
+        self.half_life_s = max(1e-3, float(half_life_s))
+        self.score = None
+        self.samples = 0
+        self.updated_at = None
+        self._lock = threading.Lock()
+
+    def update(self, probs, stress_weights, now=None):
+        probs = np.asarray(probs, dtype=float)
+        total = probs.sum()
+        if total <= 0:
+            return self.score
+        instant = float(np.dot(probs / total, stress_weights))
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.score is None:
+                self.score = instant
+            else:
+                dt = max(0.0, now - self.updated_at)
+                alpha = 1.0 - math.pow(0.5, dt / self.half_life_s)
+                self.score += alpha * (instant - self.score)
+            self.samples += 1
+            self.updated_at = now
+            return self.score
+
+
+class SmootherRegistry:
+    # One StressSmoother per session key, least recently used evicted first
+    def __init__(self, half_life_s=10.0, max_sessions=10000):
+        self.half_life_s = half_life_s
+        self.max_sessions = max_sessions
+        self._smoothers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            smoother = self._smoothers.pop(key, None)
+            if smoother is None:
+                smoother = StressSmoother(self.half_life_s)
+            self._smoothers[key] = smoother
+            while len(self._smoothers) > self.max_sessions:
+                self._smoothers.popitem(last=False)
+            return smoother
+
+
+def smoothing_half_life_from_env():
+    return float(os.environ.get('STRESS_SMOOTHING_HALF_LIFE_S', 10))
@@ -0,0 +1,14 @@
+# conftest.py - lets the tests import backend modules and the check scripts
+#
+#   pip install pytest mongomock
+#   python -m pytest backend/tests
+#
+# The tests call the same functions as the scripts in backend/scripts, on
+# in-memory stand-ins for MongoDB, so no server is needed.
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, 'scripts')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('tensorflow')
+
+from bench_common import ensure_model_file, load_fer_images  # noqa: E402
+from inference_backends import BACKENDS, load_backend  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def model_path():
+    # the trained model when there is one, else an untrained one of the same shape
+    return ensure_model_file()
+
+
+@pytest.fixture(scope='module')
+def fer_test_images():
+    x, _ = load_fer_images('test')
+    if not len(x):
+        pytest.skip('no images in scripts/fer_data/test')
+    return x
+
+
+@pytest.fixture(scope='module')
+def keras_labels(model_path, fer_test_images):
+    return np.argmax(load_backend('keras', model_path).predict(fer_test_images), axis=1)
+
+
+@pytest.mark.parametrize('name', [b for b in BACKENDS if b != 'keras'])
+def test_backend_matches_keras_labels(name, model_path, fer_test_images, keras_labels):
+    backend = load_backend(name, model_path)
+    labels = np.argmax(backend.predict(fer_test_images), axis=1)
+    assert (labels != keras_labels).sum() == 0
+
+
+@pytest.mark.parametrize('name', BACKENDS)
+def test_single_image_matches_batch(name, model_path, fer_test_images):
+    backend = load_backend(name, model_path)
+    batch = backend.predict(fer_test_images[:8])
+    single = np.concatenate([backend.predict(fer_test_images[i:i + 1]) for i in range(8)])
+    np.testing.assert_allclose(single, batch, atol=1e-5)
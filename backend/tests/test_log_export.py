@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+
+from bson import ObjectId
+
+from check_export_memory import stream_export
+from log_export import _csv_chunks, _ndjson_chunks
+
+COLUMNS = ['_id', 'username', 'stress_level', 'detected_emotion']
+
+
+def test_export_memory_does_not_grow_with_row_count():
+    for fmt in ('ndjson', 'csv'):
+        peaks = []
+        for n in (20_000, 200_000):
+            rows, _, peak, _, closed = stream_export(n, fmt, batch_size=1000)
+            assert rows == n
+            assert closed
+            peaks.append(peak)
+        small, large = peaks
+        assert large < 8e6
+        assert large < 2 * small + 1e6, f"{fmt} peak grew from {small / 1e6:.2f} to {large / 1e6:.2f} MB"
+
+
+def test_csv_cells_cannot_start_a_formula():
+    docs = [{'_id': ObjectId(), 'username': name, 'stress_level': -5, 'detected_emotion': 'Sad'}
+            for name in ('=HYPERLINK("http://x","y")', '+1', '-1', '@SUM(A1)', '\tx', '\rx', 'alice')]
+    rows = list(csv.reader(io.StringIO(''.join(_csv_chunks(iter(docs), COLUMNS, 3)), newline='')))
+
+    assert rows[0] == COLUMNS
+    assert [r[1] for r in rows[1:]] == ["'" + d['username'] for d in docs[:-1]] + ['alice']
+    # numbers keep their sign
+    assert {r[2] for r in rows[1:]} == {'-5'}
+
+
+def test_ndjson_values_are_unchanged():
+    docs = [{'_id': ObjectId(), 'username': '=1+2', 'stress_level': -5, 'detected_emotion': None}]
+    [line] = ''.join(_ndjson_chunks(iter(docs), COLUMNS, 10)).splitlines()
+    assert json.loads(line) == {'_id': str(docs[0]['_id']), 'username': '=1+2', 'stress_level': -5,
+                                'detected_emotion': None}
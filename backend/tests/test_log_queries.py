@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+from log_queries import QueryError, decode_cursor, encode_cursor, find_log_page
+
+
+@pytest.fixture
+def collection():
+    coll = mongomock.MongoClient().db.stress_logs
+    start = datetime(2025, 1, 1)
+    # 25 logs over 10 distinct timestamps, so pages split ties
+    coll.insert_many([{'_id': ObjectId(), 'user_id': f'user-{i % 2}', 'stress_level': i,
+                       'timestamp': start + timedelta(minutes=i // 3)} for i in range(25)])
+    # legacy logs without a usable timestamp
+    coll.insert_many([{'user_id': 'user-0', 'stress_level': 1}, {'user_id': 'user-0', 'timestamp': None}])
+    return coll
+
+
+def ordered_ids(coll):
+    logs = coll.find({'timestamp': {'$type': 'date'}}).sort([('timestamp', -1), ('_id', -1)])
+    return [log['_id'] for log in logs]
+
+
+def test_paging_older_visits_every_log_once(collection):
+    ids, args = [], {'limit': '4'}
+    while True:
+        page = find_log_page(collection, {}, args, 20)
+        ids.extend(log['_id'] for log in page['logs'])
+        if not page['next_cursor']:
+            break
+        args = {'before': page['next_cursor'], 'limit': '4'}
+    assert ids == ordered_ids(collection)
+
+
+def test_paging_newer_from_the_end_visits_every_log_once(collection):
+    oldest = ordered_ids(collection)[-1]
+    cursor = encode_cursor(collection.find_one({'_id': oldest}))
+    pages = []
+    args = {'after': cursor, 'limit': '4'}
+    while True:
+        page = find_log_page(collection, {}, args, 20)
+        pages.insert(0, [log['_id'] for log in page['logs']])
+        if not page['prev_cursor']:
+            break
+        args = {'after': page['prev_cursor'], 'limit': '4'}
+    assert [i for p in pages for i in p] == ordered_ids(collection)[:-1]
+
+
+def test_first_page_has_no_newer_cursor(collection):
+    page = find_log_page(collection, {}, {'limit': '5'}, 20)
+    assert page['prev_cursor'] is None
+    assert page['next_cursor'] == encode_cursor(page['logs'][-1])
+
+
+def test_logs_without_a_timestamp_are_left_out(collection):
+    page = find_log_page(collection, {'user_id': 'user-0'}, {'limit': '500'}, 20)
+    assert len(page['logs']) == 13
+    assert all(isinstance(log['timestamp'], datetime) for log in page['logs'])
+
+
+def test_time_range_and_base_filter(collection):
+    args = {'from': '2025-01-01T00:02:00Z', 'to': '2025-01-01T00:04:00+00:00', 'limit': '500'}
+    page = find_log_page(collection, {'user_id': 'user-1'}, args, 20)
+    levels = sorted(log['stress_level'] for log in page['logs'])
+    assert levels == [i for i in range(6, 12) if i % 2 == 1]
+
+
+def test_cursor_round_trip():
+    log = {'timestamp': datetime(2025, 1, 1, 12, 30, 15, 123000), '_id': ObjectId()}
+    assert decode_cursor(encode_cursor(log)) == (log['timestamp'], log['_id'])
+
+
+@pytest.mark.parametrize('args', [{'before': 'x', 'after': 'y'}, {'before': 'not-a-cursor'},
+                                  {'limit': '0'}, {'limit': 'ten'}, {'fields': 'password'},
+                                  {'from': 'yesterday'}])
+def test_invalid_arguments(collection, args):
+    with pytest.raises(QueryError):
+        find_log_page(collection, {}, args, 20)
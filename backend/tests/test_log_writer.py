@@ -0,0 +1,104 @@
+import time
+from datetime import datetime
+
+import mongomock
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from bench_log_writer import FakeCollection, check_policies
+from log_writer import BufferedLogWriter
+
+
+def stress_log(i):
+    return {'user_id': f'user-{i % 3}', 'stress_level': i % 101, 'detected_emotion': 'Neutral',
+            'timestamp': datetime(2025, 1, 1)}
+
+
+class FlakyCollection:
+    # Fails the first `failures` insert_many calls, storing nothing, then
+    # passes them through to a mongomock collection
+    def __init__(self, failures, error=AutoReconnect('connection reset')):
+        self.collection = mongomock.MongoClient().db.stress_logs
+        self.failures = failures
+        self.error = error
+
+    def insert_many(self, docs, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        return self.collection.insert_many(docs, ordered=ordered)
+
+
+def test_close_flushes_every_queued_log_to_mongomock():
+    collection = mongomock.MongoClient().db.stress_logs
+    stored = []
+    writer = BufferedLogWriter(collection, flush_size=7, flush_interval_ms=1000, on_written=stored.extend)
+    assert all(writer.write(stress_log(i)) for i in range(50))
+    writer.close()
+
+    assert collection.count_documents({}) == 50
+    assert len(stored) == 50
+    stats = writer.stats()
+    assert (stats['queued'], stats['written'], stats['dropped'], stats['failed']) == (0, 50, 0, 0)
+    assert not writer.write(stress_log(50))
+
+
+def test_queue_full_policies():
+    assert check_policies()
+
+
+@pytest.mark.parametrize('policy', ['drop-newest', 'drop-oldest'])
+def test_full_queue_never_blocks_the_request(policy):
+    writer = BufferedLogWriter(FakeCollection(rtt_ms=200), max_queue=2, flush_size=1, policy=policy)
+    t0 = time.perf_counter()
+    for i in range(20):
+        writer.write({'seq': i})
+    elapsed = time.perf_counter() - t0
+    writer.close()
+    assert writer.stats()['dropped'] > 0
+    assert elapsed < 0.1
+
+
+def test_transient_errors_are_retried():
+    collection = FlakyCollection(failures=2)
+    writer = BufferedLogWriter(collection, flush_size=5, flush_interval_ms=10, retry_delay_ms=1)
+    for i in range(5):
+        writer.write(stress_log(i))
+    writer.close()
+
+    stats = writer.stats()
+    assert stats['retries'] == 2
+    assert stats['written'] == 5
+    assert stats['failed'] == 0
+    assert collection.collection.count_documents({}) == 5
+
+
+def test_batch_is_lost_once_retries_are_used_up():
+    collection = FlakyCollection(failures=10)
+    writer = BufferedLogWriter(collection, flush_size=5, flush_interval_ms=10, max_retries=2, retry_delay_ms=1)
+    for i in range(5):
+        writer.write(stress_log(i))
+    writer.close()
+
+    stats = writer.stats()
+    assert stats['retries'] == 2
+    assert stats['written'] == 0
+    assert stats['failed'] == 5
+
+
+def test_duplicates_from_a_lost_reply_count_as_stored():
+    docs = [stress_log(i) for i in range(4)]
+    details = {'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'duplicate key'},
+                               {'index': 3, 'code': 121, 'errmsg': 'document failed validation'}]}
+    collection = FlakyCollection(failures=1, error=BulkWriteError(details))
+    stored = []
+    writer = BufferedLogWriter(collection, flush_size=4, flush_interval_ms=1000, on_written=stored.extend)
+    for doc in docs:
+        writer.write(doc)
+    writer.close()
+
+    stats = writer.stats()
+    assert stats['written'] == 3
+    assert stats['failed'] == 1
+    assert stats['retries'] == 0
+    assert stored == docs[:3]
@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import mongomock
+import pytest
+
+from rollups import GLOBAL_USER_ID, apply_rollups, default_range, query_rollups, raw_stats_pipeline
+
+
+class RollupCollection:
+    # mongomock's bulk_write does not accept the UpdateOne operations of the
+    # installed pymongo, so apply them one by one
+    def __init__(self):
+        self.collection = mongomock.MongoClient().db.stress_rollups
+        self.bulk_writes = 0
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_writes += 1
+        for op in requests:
+            self.collection.update_one(op._filter, op._doc, upsert=op._upsert)
+
+    def find(self, *args, **kwargs):
+        return self.collection.find(*args, **kwargs)
+
+
+def log(user_id, level, emotion, hour, minute=0):
+    return {'user_id': user_id, 'stress_level': level, 'detected_emotion': emotion,
+            'timestamp': datetime(2025, 1, 1, hour, minute)}
+
+
+@pytest.fixture
+def rollups():
+    return RollupCollection()
+
+
+def test_one_upsert_per_touched_bucket(rollups):
+    logs = [log('u1', 40, 'Sad', 9), log('u1', 60, 'Happy', 9, 30), log('u2', 80, 'Angry', 10)]
+    # u1 hour 9, u2 hour 10, global hours 9 and 10, and the day for u1, u2 and global
+    assert apply_rollups(rollups, logs) == 7
+    assert rollups.bulk_writes == 1
+
+    bucket = rollups.collection.find_one({'granularity': 'hour', 'user_id': 'u1'})
+    assert (bucket['count'], bucket['sum'], bucket['min'], bucket['max']) == (2, 100, 40, 60)
+    assert bucket['emotions'] == {'Sad': 1, 'Happy': 1}
+
+
+def test_batches_accumulate_into_the_same_buckets(rollups):
+    apply_rollups(rollups, [log('u1', 40, 'Sad', 9)])
+    apply_rollups(rollups, [log('u1', 20, 'Sad', 9, 15), log('u1', 90, 'Fear', 23)])
+
+    buckets, summary = query_rollups(rollups, 'u1', 'day', datetime(2025, 1, 1), datetime(2025, 1, 2))
+    assert [b['count'] for b in buckets] == [3]
+    assert summary == {'count': 3, 'mean': 50.0, 'min': 20, 'max': 90, 'emotions': {'Sad': 2, 'Fear': 1}}
+
+    hours, _ = query_rollups(rollups, 'u1', 'hour', datetime(2025, 1, 1), datetime(2025, 1, 2))
+    assert [(h['start'], h['count'], h['mean']) for h in hours] == [
+        ('2025-01-01T09:00:00', 2, 30.0), ('2025-01-01T23:00:00', 1, 90.0)]
+
+
+def test_global_buckets_use_the_sentinel(rollups):
+    apply_rollups(rollups, [log('u1', 40, 'Sad', 9), log(None, 60, None, 9), log('u2', 50, 'Sad', 9)])
+
+    assert rollups.collection.count_documents({'user_id': None}) == 0
+    _, summary = query_rollups(rollups, GLOBAL_USER_ID, 'day', datetime(2025, 1, 1), datetime(2025, 1, 2))
+    assert summary == {'count': 3, 'mean': 50.0, 'min': 40, 'max': 60, 'emotions': {'Sad': 2, 'Unknown': 1}}
+
+
+def test_emotion_keys_are_safe_field_names(rollups):
+    apply_rollups(rollups, [log('u1', 40, 'Sa.d', 9), log('u1', 40, '$Fear', 9), log('u1', 40, '', 9)])
+    _, summary = query_rollups(rollups, 'u1', 'hour', datetime(2025, 1, 1), datetime(2025, 1, 2))
+    assert summary['emotions'] == {'Sa_d': 1, '_Fear': 1, 'Unknown': 1}
+
+
+def test_logs_without_level_or_timestamp_are_skipped(rollups):
+    assert apply_rollups(rollups, [{'user_id': 'u1', 'stress_level': None, 'timestamp': datetime(2025, 1, 1)},
+                                   {'user_id': 'u1', 'stress_level': 10}]) == 0
+    assert rollups.bulk_writes == 0
+
+
+def test_query_starts_at_the_bucket_containing_from(rollups):
+    apply_rollups(rollups, [log('u1', 40, 'Sad', 9)])
+    buckets, _ = query_rollups(rollups, 'u1', 'hour', datetime(2025, 1, 1, 9, 45), datetime(2025, 1, 1, 10))
+    assert [b['start'] for b in buckets] == ['2025-01-01T09:00:00']
+
+
+def test_default_ranges():
+    now = datetime(2025, 3, 1, 12)
+    assert default_range('hour', now) == (datetime(2025, 2, 27, 12), now)
+    assert default_range('day', now) == (datetime(2025, 1, 30, 12), now)
+
+
+def test_backfill_groups_by_user_or_sentinel():
+    group_id = raw_stats_pipeline({}, 'day', per_user=True)[1]['$group']['_id']
+    assert group_id['user_id'] == '$user_id'
+    pipeline = raw_stats_pipeline({}, 'day')
+    assert pipeline[1]['$group']['_id']['user_id'] == GLOBAL_USER_ID
+    assert 'user_id' not in pipeline[0]['$match']
@@ -0,0 +1,248 @@
+# video_stream.py - shared camera capture, analysis and MJPEG fan-out for /video_feed
+#
+# One CameraStream per camera runs three threads:
+#   reader    cv2.VideoCapture.read() as fast as the camera delivers, newest
+#             frames kept in a small ring buffer
+#   analyzer  runs face detection + emotion inference on every Nth frame (or
+#             once per time budget); boxes/labels are reused in between
+#   encoder   draws the latest boxes on the newest frame and JPEG-encodes it at
+#             most target_fps times per second
+# Every HTTP viewer iterates viewer_frames() and receives the same encoded
+# bytes, so N viewers cost one capture, one analysis and one encode.  The
+# threads start with the first viewer and stop when the last one leaves.
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class RateMeter:
+    def __init__(self, window=60):
+        self._ticks = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def tick(self):
+        with self._lock:
+            self._ticks.append(time.monotonic())
+
+    def rate(self):
+        with self._lock:
+            # nothing recent means the stage is idle, not running at its old rate
+            if len(self._ticks) < 2 or time.monotonic() - self._ticks[-1] > 2.0:
+                return 0.0
+            span = self._ticks[-1] - self._ticks[0]
+            return (len(self._ticks) - 1) / span if span > 0 else 0.0
+
+
+class CameraStream:
+    def __init__(self, source=0, analyze_fn=None, target_fps=15, jpeg_quality=80,
+                 analyze_every=3, analyze_interval_ms=0, buffer_size=4,
+                 capture_factory=cv2.VideoCapture):
+        self.source = source
+        self.analyze_fn = analyze_fn
+        self.target_fps = max(1.0, float(target_fps))
+        self.jpeg_quality = int(jpeg_quality)
+        self.analyze_every = max(1, int(analyze_every))
+        self.analyze_interval = max(0.0, float(analyze_interval_ms)) / 1000.0
+        self.capture_factory = capture_factory
+
+        self._cond = threading.Condition()
+        # Held around opening and releasing the capture (taken before _cond), so a
+        # viewer arriving while the last one leaves waits for the old capture to be
+        # released instead of opening the device a second time
+        self._device_lock = threading.Lock()
+        self._frames = deque(maxlen=max(1, int(buffer_size)))  # (seq, frame)
+        self._annotations = []  # [((x, y, w, h), label), ...]
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._viewers = 0
+        self._stop = None  # threading.Event of the current run, None when stopped
+        self._cap = None
+        self._threads = []
+
+        self.capture_meter = RateMeter()
+        self.analyze_meter = RateMeter()
+        self.encode_meter = RateMeter()
+
+    # ---------- lifecycle ----------
+    @property
+    def _running(self):
+        return self._stop is not None and not self._stop.is_set()
+
+    def attach(self):
+        with self._device_lock, self._cond:
+            self._viewers += 1
+            if not self._running:
+                self._start()
+
+    def detach(self):
+        with self._device_lock:
+            with self._cond:
+                self._viewers = max(0, self._viewers - 1)
+                if self._viewers > 0 or self._stop is None:
+                    return
+                self._stop.set()
+                self._cond.notify_all()
+                cap, threads = self._cap, self._threads
+                self._stop, self._cap, self._threads = None, None, []
+            # outside _cond (the threads need it to exit), inside _device_lock
+            for t in threads:
+                t.join(timeout=2.0)
+            cap.release()
+
+    def _start(self):
+        # called with self._cond held; each run gets its own stop event so
+        # threads of a previous run can never pick up again
+        if self._cap is not None:
+            self._cap.release()
+        self._cap = self.capture_factory(self.source)
+        self._stop = stop = threading.Event()
+        self._frames.clear()
+        self._annotations = []
+        self._jpeg = None
+        self._threads = [
+            threading.Thread(target=self._read_loop, args=(self._cap, stop),
+                             name=f"camera-{self.source}-reader", daemon=True),
+            threading.Thread(target=self._analyze_loop, args=(stop,),
+                             name=f"camera-{self.source}-analyzer", daemon=True),
+            threading.Thread(target=self._encode_loop, args=(stop,),
+                             name=f"camera-{self.source}-encoder", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    # ---------- worker threads ----------
+    def _read_loop(self, cap, stop):
+        seq = 0
+        while not stop.is_set():
+            success, frame = cap.read()
+            if not success:
+                print(f"Camera {self.source}: read failed, stopping stream")
+                with self._cond:
+                    stop.set()
+                    self._cond.notify_all()
+                break
+            seq += 1
+            with self._cond:
+                self._frames.append((seq, frame))
+                self._cond.notify_all()
+            self.capture_meter.tick()
+
+    def _wait_for_frame(self, stop, after_seq):
+        with self._cond:
+            self._cond.wait_for(
+                lambda: stop.is_set() or (self._frames and self._frames[-1][0] != after_seq),
+                timeout=1.0,
+            )
+            if stop.is_set() or not self._frames:
+                return None, None
+            return self._frames[-1]
+
+    def _analyze_loop(self, stop):
+        seen_seq = analyzed_seq = 0
+        analyzed_at = 0.0
+        while not stop.is_set():
+            seq, frame = self._wait_for_frame(stop, seen_seq)
+            if frame is None or seq == seen_seq:
+                continue
+            seen_seq = seq
+            if self.analyze_fn is None:
+                continue
+            if self.analyze_interval:
+                due = time.monotonic() - analyzed_at >= self.analyze_interval
+            else:
+                due = seq - analyzed_seq >= self.analyze_every or analyzed_seq == 0
+            if not due:
+                continue
+            try:
+                annotations = self.analyze_fn(frame)
+            except Exception as e:
+                print(f"Camera {self.source}: analysis error: {e}")
+                continue
+            analyzed_seq, analyzed_at = seq, time.monotonic()
+            with self._cond:
+                self._annotations = annotations
+            self.analyze_meter.tick()
+
+    def _encode_loop(self, stop):
+        period = 1.0 / self.target_fps
+        encoded_seq = 0
+        next_at = time.monotonic()
+        while not stop.is_set():
+            seq, frame = self._wait_for_frame(stop, encoded_seq)
+            if frame is None or seq == encoded_seq:
+                continue
+            encoded_seq = seq
+            with self._cond:
+                annotations = list(self._annotations)
+
+            frame = frame.copy()
+            for (x, y, w, h), label in annotations:
+                cv2.putText(frame, label, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                with self._cond:
+                    self._jpeg = buffer.tobytes()
+                    self._jpeg_seq += 1
+                    self._cond.notify_all()
+                self.encode_meter.tick()
+
+            next_at += period
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                stop.wait(delay)
+            else:
+                next_at = time.monotonic()
+
+    # ---------- viewers ----------
+    def viewer_frames(self):
+        self.attach()
+        try:
+            last_seq = 0
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: not self._running or self._jpeg_seq != last_seq, timeout=5.0)
+                    if not self._running:
+                        break
+                    if self._jpeg_seq == last_seq or self._jpeg is None:
+                        continue
+                    jpeg, last_seq = self._jpeg, self._jpeg_seq
+                yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+        finally:
+            self.detach()
+
+    def stats(self):
+        with self._cond:
+            viewers, running = self._viewers, self._running
+        return {
+            'source': self.source,
+            'running': running,
+            'viewers': viewers,
+            'target_fps': self.target_fps,
+            'jpeg_quality': self.jpeg_quality,
+            'analyze_every': self.analyze_every,
+            'analyze_interval_ms': self.analyze_interval * 1000.0,
+            'capture_fps': round(self.capture_meter.rate(), 2),
+            'analyze_fps': round(self.analyze_meter.rate(), 2),
+            'encode_fps': round(self.encode_meter.rate(), 2),
+        }
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def get_camera_stream(source, **kwargs):
+    # One shared stream per camera; kwargs only apply when it is first created
+    with _streams_lock:
+        if source not in _streams:
+            _streams[source] = CameraStream(source, **kwargs)
+        return _streams[source]
+
+
+def all_stream_stats():
+    with _streams_lock:
+        streams = list(_streams.values())
+    return [s.stats() for s in streams]